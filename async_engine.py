@@ -0,0 +1,419 @@
+"""
+Async Engine untuk Ebook Downloader
+===================================
+Menjalankan download dan pencarian dalam satu event loop asyncio di satu
+thread latar belakang. GUI dan CLI mengirim pekerjaan lewat method
+submit_*() dan menerima concurrent.futures.Future.
+
+Jika aiohttp terpasang, transfer berjalan non-blocking di event loop
+sehingga ratusan download bisa berjalan tanpa ratusan thread. Tanpa
+aiohttp, download dijalankan lewat EbookDownloader.fetch di thread pool
+yang ukurannya dibatasi.
+"""
+
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial as bind
+from urllib.parse import urlparse
+
+import requests
+
+from ebook_downloader import (
+    DRAIN_LIMIT, ContentSniffer, ContentTypeError, CorruptFileError, DownloadResult, PartialDownload
+)
+from retry_policy import CircuitOpenError
+
+try:
+    import aiohttp
+except ImportError:  # aiohttp opsional
+    aiohttp = None
+
+
+class AsyncEngine:
+    """Event loop bersama untuk download dan pencarian."""
+    
+    # Data download dikumpulkan sampai sebesar ini sebelum ditulis ke disk
+    WRITE_BUFFER = 256 * 1024
+    
+    def __init__(self, downloader, max_downloads=64, per_host=4, max_searches=8, executor_workers=8):
+        """
+        Args:
+            downloader: EbookDownloader yang menentukan folder, nama file dan pool
+            max_downloads: Jumlah download yang berjalan bersamaan (global)
+            per_host: Jumlah download bersamaan per host
+            max_searches: Jumlah sumber pencarian yang diproses bersamaan
+            executor_workers: Ukuran thread pool untuk pekerjaan blocking
+        """
+        self.downloader = downloader
+        self.max_downloads = max_downloads
+        self.per_host = per_host
+        self.max_searches = max_searches
+        self.loop = asyncio.new_event_loop()
+        self._executor = ThreadPoolExecutor(max_workers=executor_workers, thread_name_prefix="engine")
+        # Terpisah dari _executor: download thread/mirror yang lama tidak boleh
+        # menahan penulisan file download aiohttp
+        self._io_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="engine-io")
+        self._thread = threading.Thread(target=self._run, name="async-engine", daemon=True)
+        self._ready = threading.Event()
+        self._session = None
+        self._host_slots = {}
+    
+    def start(self):
+        """Jalankan event loop di thread latar belakang."""
+        self._thread.start()
+        self._ready.wait()
+        return self
+    
+    def stop(self, timeout=5):
+        """
+        Hentikan event loop dan tutup semua koneksi.
+        
+        Download yang masih berjalan dibatalkan (Future-nya cancelled, bukan
+        gagal); progres .part-nya disimpan agar bisa dilanjutkan nanti.
+        """
+        if not self._thread.is_alive():
+            return
+        asyncio.run_coroutine_threadsafe(self._close(), self.loop).result(timeout)
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._thread.join(timeout)
+        self._executor.shutdown(wait=False)
+        self._io_executor.shutdown(wait=False)
+    
+    @property
+    def transport(self):
+        """Nama transport yang dipakai untuk download ('aiohttp' atau 'thread')."""
+        return 'aiohttp' if aiohttp else 'thread'
+    
+    def _run(self):
+        asyncio.set_event_loop(self.loop)
+        self._download_slots = asyncio.Semaphore(self.max_downloads)
+        self._search_slots = asyncio.Semaphore(self.max_searches)
+        if aiohttp:
+            self.loop.run_until_complete(self._open())
+        self.loop.call_soon(self._ready.set)
+        self.loop.run_forever()
+        self.loop.close()
+    
+    async def _open(self):
+        # Koneksi dari preflight harus tetap hidup sampai download dimulai
+        connector = aiohttp.TCPConnector(limit=self.max_downloads, limit_per_host=self.per_host,
+                                         keepalive_timeout=self.downloader.PREFLIGHT_TTL)
+        self._session = aiohttp.ClientSession(
+            connector=connector,
+            headers=dict(self.downloader.pool.session.headers),
+            timeout=aiohttp.ClientTimeout(total=None, sock_connect=30, sock_read=30),
+        )
+    
+    async def _close(self):
+        tasks = [task for task in asyncio.all_tasks() if task is not asyncio.current_task()]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        if self._session is not None:
+            await self._session.close()
+    
+    def submit(self, coro):
+        """Jadwalkan coroutine di event loop engine; mengembalikan Future."""
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+    
+    # Download
+    def submit_fetch(self, url, filename=None, on_progress=None, on_start=None,
+                     reject_html=True, unique=False):
+        """
+        Jadwalkan download satu URL.
+        
+        Returns:
+            Future berisi tuple (path file, jumlah byte); exception dari
+            download (RequestException, ContentTypeError, ...) diteruskan
+            lewat Future
+        """
+        return self.submit(self._fetch(url, filename, on_progress, on_start, reject_html, unique))
+    
+    def submit_download(self, url, filename=None, on_progress=None):
+        """Jadwalkan download satu URL; Future berisi DownloadResult (tidak pernah raise)."""
+        return self.submit(self._download(url, filename, on_progress))
+    
+    def download_many(self, urls, on_result=None):
+        """
+        Download banyak URL lewat engine dan tunggu semuanya selesai.
+        
+        Returns:
+            List DownloadResult dengan urutan sama seperti urls
+        """
+        futures = [self.submit_download(url) for url in urls]
+        if on_result:
+            for future in futures:
+                future.add_done_callback(lambda f: on_result(f.result()))
+        return [future.result() for future in futures]
+    
+    def submit_preflight(self, url, timeout=10):
+        """
+        Jadwalkan preflight URL (EbookDownloader.preflight) lewat transport
+        yang nanti dipakai download, supaya koneksinya sudah terbuka.
+        
+        Returns:
+            Future berisi Preflight
+        """
+        return self.submit(self._preflight(url, timeout))
+    
+    async def _preflight(self, url, timeout):
+        downloader = self.downloader
+        if self._session is None or downloader.segments > 1:
+            return await self.loop.run_in_executor(self._executor, downloader.preflight, url, timeout)
+        start = time.perf_counter()
+        downloader.breaker.check(url)
+        await self._throttle(downloader.limiter, downloader.limiter.reserve_request(url))
+        try:
+            async with self._session.head(url, allow_redirects=True,
+                                          timeout=aiohttp.ClientTimeout(total=timeout)) as response:
+                return downloader.store_preflight(url, str(response.url), response.status, response.headers,
+                                                  time.perf_counter() - start)
+        except asyncio.TimeoutError as e:
+            raise requests.exceptions.Timeout(f"Timeout: {url}") from e
+        except aiohttp.ClientError as e:
+            raise requests.exceptions.ConnectionError(str(e)) from e
+    
+    def _host_slot(self, url):
+        host = urlparse(url).netloc.lower()
+        if host not in self._host_slots:
+            self._host_slots[host] = asyncio.Semaphore(self.per_host)
+        return self._host_slots[host]
+    
+    async def _download(self, url, filename, on_progress):
+        start = time.perf_counter()
+        try:
+            if len(url.split()) > 1:
+                filepath, size, url = await self._fetch_mirrors(url.split(), filename, on_progress, True, True)
+            else:
+                filepath, size = await self._fetch(url, filename, on_progress, None, True, True)
+            return DownloadResult(url, filepath, size, time.perf_counter() - start)
+        except (requests.exceptions.RequestException, ContentTypeError, CorruptFileError, OSError) as e:
+            return DownloadResult(url, None, 0, time.perf_counter() - start, str(e))
+    
+    async def _fetch_mirrors(self, urls, filename, on_progress, reject_html, unique):
+        """Balapan mirror (EbookDownloader.fetch_first); hasil (path, byte, URL pemenang)."""
+        async with self._host_slot(urls[0]), self._download_slots:
+            fetch = bind(self.downloader.fetch_first, urls, filename, on_progress, unique, reject_html)
+            return await self.loop.run_in_executor(self._executor, fetch)
+    
+    async def _fetch(self, url, filename, on_progress, on_start, reject_html, unique):
+        if len(url.split()) > 1:
+            # Beberapa URL dipisah spasi: mirror dari dokumen yang sama
+            filepath, size, _ = await self._fetch_mirrors(url.split(), filename, on_progress, reject_html, unique)
+            return filepath, size
+        async with self._host_slot(url), self._download_slots:
+            if self._session is None or self.downloader.segments > 1:
+                fetch = bind(self.downloader.fetch, url, filename, on_progress, unique,
+                             on_start=on_start, reject_html=reject_html)
+                return await self.loop.run_in_executor(self._executor, fetch)
+            try:
+                return await self._fetch_aiohttp(url, filename, on_progress, on_start, reject_html, unique)
+            except asyncio.TimeoutError as e:
+                raise requests.exceptions.Timeout(f"Timeout: {url}") from e
+            except aiohttp.ClientError as e:
+                raise requests.exceptions.ConnectionError(str(e)) from e
+    
+    def _finalize(self, url, partial):
+        """Pindahkan .part ke nama akhir, simpan ke cache (hash SHA-256) dan rename opsional."""
+        return self.downloader.finalize_download(url, partial.finish(), partial.etag, partial.last_modified)
+    
+    async def _io(self, func, *args, **kwargs):
+        """Jalankan I/O file (tulis, sidecar, hash, rename) di luar event loop."""
+        return await self.loop.run_in_executor(self._io_executor, bind(func, *args, **kwargs))
+    
+    @staticmethod
+    def _write(partial, f, chunks, written):
+        f.write(b''.join(chunks))
+        partial.advance(f, written)
+    
+    @staticmethod
+    async def _throttle(limiter, delay):
+        for pause in limiter.sleep_slices(delay):
+            await asyncio.sleep(pause)
+    
+    @staticmethod
+    async def _discard(response):
+        """Versi aiohttp dari ebook_downloader.discard_response."""
+        drained = 0
+        try:
+            while drained <= DRAIN_LIMIT:
+                chunk = await response.content.read(16 * 1024)
+                if not chunk:
+                    break
+                drained += len(chunk)
+        except aiohttp.ClientError:
+            pass
+        response.release()
+    
+    async def _fetch_aiohttp(self, url, filename, on_progress, on_start, reject_html, unique, retries=None):
+        """Versi non-blocking dari EbookDownloader.fetch (termasuk resume .part dan retry)."""
+        downloader = self.downloader
+        partial = await self._io(downloader.find_partial, url, filename)
+        cached = await self._io(downloader.cached_entry, url) if partial is None else None
+        reserved = None
+        retries = downloader.retry.retries if retries is None else retries
+        
+        try:
+            attempt = 0
+            while attempt <= retries:
+                # Batas host dan circuit breaker memakai host URL akhir (lihat EbookDownloader.fetch)
+                target = downloader.resolved_url(url)
+                try:
+                    headers = downloader.conditional_headers(partial, cached)
+                    downloader.breaker.check(target)
+                    await self._throttle(downloader.limiter, downloader.limiter.reserve_request(target))
+                    async with self._session.get(target, headers=headers) as response:
+                        delay = downloader.retry_delay(target, response.status, response.headers, attempt, retries)
+                        if delay is not None:
+                            await self._discard(response)
+                            await asyncio.sleep(delay)
+                            attempt += 1
+                            continue
+                        if response.status == 304 and cached and partial is None:
+                            filepath, size = await self._io(downloader.restore_cached, url, cached, filename,
+                                                            unique)
+                            if on_progress:
+                                on_progress(size, size)
+                            return filepath, size
+                        resumed = await self._io(getattr, partial, 'offset') if partial else 0
+                        if response.status == 416 and resumed:
+                            await self._discard(response)
+                            if await self._io(partial.complete_by, response.status, response.headers):
+                                downloaded = resumed
+                                filepath = await self._io(downloader.complete_partial, url, partial, reject_html)
+                                if on_progress:
+                                    on_progress(downloaded, downloaded)
+                                return filepath, downloaded
+                            # Mulai dari awal tanpa mengurangi jatah percobaan ulang (lihat fetch)
+                            await self._io(partial.discard)
+                            continue
+                        if response.status >= 400:
+                            raise requests.exceptions.HTTPError(
+                                f"{response.status} {response.reason} for url: {url}")
+                        
+                        content_type = response.headers.get('Content-Type', '').lower()
+                        if reject_html and 'text/html' in content_type:
+                            raise ContentTypeError(content_type)
+                        
+                        if partial is None:
+                            filepath = await self._io(downloader.target_path, url, response, filename, unique)
+                            if unique:
+                                reserved = filepath
+                            partial = PartialDownload(filepath, url)
+                        
+                        offset = await self._io(partial.begin, response.status, response.headers)
+                        downloaded = offset
+                        total_size = partial.total
+                        if offset:
+                            sniffer = await self._io(ContentSniffer.from_part, partial.part_path, offset)
+                        else:
+                            sniffer = ContentSniffer()
+                        if on_start:
+                            on_start(partial.filepath, total_size, offset, content_type)
+                        
+                        f = await self._io(partial.open, offset)
+                        try:
+                            # iter_any() memberi semua data yang sudah ada di buffer
+                            # sekaligus, jadi ukuran chunk mengikuti throughput. Chunk
+                            # dikumpulkan sampai WRITE_BUFFER lalu ditulis di thread I/O.
+                            buffer = []
+                            buffered = 0
+                            async for chunk in response.content.iter_any():
+                                if reject_html:
+                                    sniffer.feed(chunk)
+                                buffer.append(chunk)
+                                buffered += len(chunk)
+                                downloaded += len(chunk)
+                                if buffered >= self.WRITE_BUFFER:
+                                    await self._io(self._write, partial, f, buffer, downloaded)
+                                    buffer = []
+                                    buffered = 0
+                                if on_progress:
+                                    on_progress(downloaded, total_size)
+                                await self._throttle(downloader.limiter,
+                                                     downloader.limiter.reserve_bytes(target, len(chunk)))
+                            await self._io(self._write, partial, f, buffer, downloaded)
+                            await self._io(f.truncate)
+                        finally:
+                            await self._io(f.close)
+                        if reject_html:
+                            sniffer.finish()
+                    
+                    filepath = await self._io(self._finalize, url, partial)
+                    return filepath, downloaded
+                
+                except (ContentTypeError, CorruptFileError):
+                    if partial:
+                        await self._io(partial.discard)
+                    raise
+                except CircuitOpenError:
+                    raise
+                except asyncio.CancelledError:
+                    # engine.stop(): simpan progres supaya sesi berikutnya melanjutkan
+                    if partial:
+                        await self._io(partial.save)
+                    raise
+                except (aiohttp.ClientPayloadError, aiohttp.ClientConnectionError, asyncio.TimeoutError):
+                    downloader.breaker.record_failure(target)
+                    if partial:
+                        await self._io(partial.save)
+                    if attempt >= retries:
+                        raise
+                    await asyncio.sleep(downloader.retry.backoff(attempt))
+                    attempt += 1
+            
+            raise requests.exceptions.RetryError(f"Range tidak dapat dipenuhi: {url}")
+        finally:
+            if reserved is not None:
+                downloader.release_path(reserved)
+    
+    # Search
+    def submit_search(self, query, sources):
+        """
+        Jalankan beberapa sumber pencarian secara paralel.
+        
+        Args:
+            query: Kata kunci
+            sources: List callable(query) -> list hasil; boleh fungsi biasa
+                (dijalankan di thread pool) atau coroutine function. Atribut
+                `deadline` pada sumber membatasi lama sumber itu ditunggu.
+        
+        Returns:
+            Future berisi gabungan hasil semua sumber (urutan sesuai sources).
+            Jika semua sumber gagal, Future berisi exception sumber pertama.
+        """
+        return self.submit(self._search(query, sources))
+    
+    async def _search_one(self, source, query):
+        # Sumber boleh punya atribut deadline (detik); sumber yang melewatinya
+        # dianggap gagal supaya tidak menahan hasil sumber lain
+        deadline = getattr(source, 'deadline', None)
+        async with self._search_slots:
+            if asyncio.iscoroutinefunction(source):
+                pending = source(query)
+            else:
+                pending = self.loop.run_in_executor(self._executor, source, query)
+            if deadline is None:
+                return await pending
+            try:
+                return await asyncio.wait_for(pending, deadline + 1)
+            except asyncio.TimeoutError as e:
+                raise requests.exceptions.Timeout(f"{source!r}: melewati deadline {deadline}s") from e
+    
+    async def _search(self, query, sources):
+        outcomes = await asyncio.gather(
+            *(self._search_one(source, query) for source in sources),
+            return_exceptions=True,
+        )
+        results = []
+        errors = []
+        for outcome in outcomes:
+            if isinstance(outcome, BaseException):
+                errors.append(outcome)
+            else:
+                results.extend(outcome)
+        if errors and len(errors) == len(outcomes):
+            raise errors[0]
+        return results
@@ -0,0 +1,441 @@
+"""
+Benchmark Ebook Downloader
+==========================
+Mengukur throughput dan latensi EbookDownloader tanpa internet.
+
+Server HTTP lokal (dijalankan sebagai proses terpisah agar CPU-nya tidak
+ikut terhitung) menyajikan PDF sintetis dan bisa meniru kondisi server
+nyata lewat query string:
+
+    /book/<ukuran>-<n>.pdf?latency=0.05   jeda sebelum header dikirim (detik)
+                          &rate=2000000   batasi kecepatan (byte/detik)
+                          &nolength=1     tanpa Content-Length (body sampai koneksi ditutup)
+                          &redirects=3    rantai redirect 302 sebelum file
+                          &html=1         halaman error HTML berlabel application/pdf
+
+Setiap kombinasi skenario x ukuran chunk x jumlah download paralel
+mencatat MB/s, time to first byte, waktu CPU dan puncak memori (Python
+heap, lewat tracemalloc). Hasil bisa disimpan sebagai baseline JSON dan
+dibandingkan dengan run berikutnya.
+
+Pemakaian:
+    python benchmark_downloader.py -o baseline.json
+    python benchmark_downloader.py --quick --compare baseline.json
+"""
+
+import argparse
+import http.server
+import json
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from urllib.parse import parse_qs, urlencode, urlparse
+
+from ebook_downloader import ConnectionPool, EbookDownloader
+from rate_limit import RateLimiter
+
+# Nama skenario -> (parameter server, apakah download diharapkan berhasil)
+SCENARIOS = {
+    'baseline': ({}, True),
+    'latency': ({'latency': 0.05}, True),
+    'throttled': ({'rate': 8 * 1024 * 1024}, True),
+    'no-length': ({'nolength': 1}, True),
+    'redirects': ({'redirects': 3}, True),
+    'html-error': ({'html': 1}, False),
+}
+
+HTML_ERROR_PAGE = (
+    b"<!DOCTYPE html>\n<html><head><title>403 Forbidden</title></head>"
+    b"<body><h1>Akses ditolak</h1><p>Silakan login untuk mengunduh file ini.</p>"
+    + b" " * 4096 + b"</body></html>\n"
+)
+
+_pdf_cache = {}
+
+
+def synthetic_pdf(size):
+    """Isi PDF sintetis sebesar size byte (header %PDF dan trailer %%EOF valid)."""
+    if size not in _pdf_cache:
+        head = b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n"
+        tail = b"\n%%EOF\n"
+        filler = bytes(range(256)) * (size // 256 + 1)
+        _pdf_cache[size] = head + filler[:max(size - len(head) - len(tail), 0)] + tail
+    return _pdf_cache[size]
+
+
+class StandInHandler(http.server.BaseHTTPRequestHandler):
+    """Handler server pengganti; perilaku diatur lewat query string."""
+    
+    protocol_version = 'HTTP/1.1'
+    
+    def log_message(self, format, *args):
+        pass
+    
+    def do_GET(self):
+        parsed = urlparse(self.path)
+        params = {k: v[-1] for k, v in parse_qs(parsed.query).items()}
+        
+        if float(params.get('latency', 0)):
+            time.sleep(float(params['latency']))
+        
+        redirects = int(params.get('redirects', 0))
+        if redirects:
+            params['redirects'] = redirects - 1
+            self.send_response(302)
+            self.send_header('Location', f"{parsed.path}?{urlencode(params)}")
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        
+        try:
+            size = int(parsed.path.rsplit('/', 1)[-1].split('-', 1)[0])
+        except ValueError:
+            self.send_error(404)
+            return
+        body = HTML_ERROR_PAGE if params.get('html') else synthetic_pdf(size)
+        
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/pdf')
+        if params.get('nolength'):
+            self.send_header('Connection', 'close')
+            self.close_connection = True
+        else:
+            self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self._send_body(body, int(params.get('rate', 0)))
+    
+    def _send_body(self, body, rate):
+        view = memoryview(body)
+        if not rate:
+            self.wfile.write(view)
+            return
+        block = 16 * 1024
+        start = time.perf_counter()
+        for offset in range(0, len(view), block):
+            self.wfile.write(view[offset:offset + block])
+            # Tidur sampai jadwal kecepatan target tercapai
+            delay = (offset + block) / rate - (time.perf_counter() - start)
+            if delay > 0:
+                time.sleep(delay)
+
+
+def serve(port=0):
+    """Jalankan server pengganti di proses ini (dipakai oleh start_server)."""
+    server = http.server.ThreadingHTTPServer(('127.0.0.1', port), StandInHandler)
+    server.daemon_threads = True
+    print(server.server_address[1], flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+def start_server():
+    """
+    Jalankan server pengganti sebagai subprocess.
+    
+    Returns:
+        Tuple (Popen, base URL)
+    """
+    process = subprocess.Popen(
+        [sys.executable, __file__, '--serve'],
+        stdout=subprocess.PIPE, text=True,
+    )
+    port = int(process.stdout.readline())
+    return process, f"http://127.0.0.1:{port}"
+
+
+def run_case(base_url, scenario, size, chunk_size, concurrency, files, trace_memory=False):
+    """
+    Download `files` file sekaligus dengan `concurrency` worker.
+    
+    Returns:
+        Dict metrik satu run (bytes, wall_s, cpu_s, ttfb list, error, peak_bytes)
+    """
+    params, _ = SCENARIOS[scenario]
+    folder = tempfile.mkdtemp(prefix="ebook-bench-")
+    pool = ConnectionPool(pool_maxsize=max(concurrency, 10))
+    # Tanpa batas kecepatan, apa pun isi ~/.ebook_downloader/limits.json
+    downloader = EbookDownloader(folder, pool=pool, chunk_size=chunk_size, limiter=RateLimiter())
+    query = f"?{urlencode(params)}" if params else ""
+    urls = [f"{base_url}/book/{size}-{i}.pdf{query}" for i in range(files)]
+    
+    def fetch(url):
+        start = time.perf_counter()
+        first_byte = []
+        
+        def on_progress(downloaded, total_size):
+            if not first_byte:
+                first_byte.append(time.perf_counter() - start)
+        
+        try:
+            _, downloaded = downloader.fetch(url, on_progress=on_progress, unique=True, retries=0)
+            return downloaded, first_byte[0] if first_byte else None, None
+        except Exception as e:
+            return 0, first_byte[0] if first_byte else None, type(e).__name__
+    
+    if trace_memory:
+        tracemalloc.start()
+    cpu_start = time.process_time()
+    wall_start = time.perf_counter()
+    try:
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            outcomes = list(executor.map(fetch, urls))
+        wall = time.perf_counter() - wall_start
+        cpu = time.process_time() - cpu_start
+        peak = tracemalloc.get_traced_memory()[1] if trace_memory else None
+    finally:
+        if trace_memory:
+            tracemalloc.stop()
+        pool.close()
+        shutil.rmtree(folder, ignore_errors=True)
+    
+    errors = [error for _, _, error in outcomes if error]
+    return {
+        'bytes': sum(n for n, _, _ in outcomes),
+        'wall_s': wall,
+        'cpu_s': cpu,
+        'ttfb': [t for _, t, _ in outcomes if t is not None],
+        'error': errors[0] if errors else None,
+        'failed': len(errors),
+        'peak_bytes': peak,
+    }
+
+
+def benchmark(base_url, scenarios, chunk_sizes, concurrency_levels, size, repeat=3, on_result=None):
+    """
+    Jalankan seluruh matriks benchmark.
+    
+    Setiap kasus dijalankan `repeat` kali untuk waktu (nilai median dipakai)
+    dan satu kali lagi dengan tracemalloc untuk puncak memori, supaya
+    overhead tracemalloc tidak mempengaruhi angka throughput.
+    
+    Returns:
+        List dict hasil per kasus
+    """
+    results = []
+    for scenario in scenarios:
+        expect_ok = SCENARIOS[scenario][1]
+        for chunk_size in chunk_sizes:
+            for concurrency in concurrency_levels:
+                files = concurrency * 2
+                runs = [run_case(base_url, scenario, size, chunk_size, concurrency, files)
+                        for _ in range(repeat)]
+                memory = run_case(base_url, scenario, size, chunk_size, concurrency, files,
+                                  trace_memory=True)
+                wall = statistics.median(r['wall_s'] for r in runs)
+                total = statistics.median(r['bytes'] for r in runs)
+                ttfb = [t for r in runs for t in r['ttfb']]
+                failed = max(r['failed'] for r in runs)
+                result = {
+                    'scenario': scenario,
+                    'chunk_size': chunk_size or 'auto',
+                    'concurrency': concurrency,
+                    'files': files,
+                    'file_size': size,
+                    'mb_per_s': round(total / wall / 1e6, 2) if wall else 0.0,
+                    'ttfb_ms': round(statistics.median(ttfb) * 1000, 2) if ttfb else None,
+                    'ttfb_max_ms': round(max(ttfb) * 1000, 2) if ttfb else None,
+                    'wall_s': round(wall, 4),
+                    'cpu_s': round(statistics.median(r['cpu_s'] for r in runs), 4),
+                    'peak_mem_kb': round(memory['peak_bytes'] / 1024, 1),
+                    'failed': failed,
+                    'error': next((r['error'] for r in runs if r['error']), None),
+                    # Skenario error dianggap lolos jika download memang ditolak
+                    'ok': (failed == 0) if expect_ok else (failed == files),
+                }
+                results.append(result)
+                if on_result:
+                    on_result(result)
+    return results
+
+
+def measure_cold_start(runs=10):
+    """
+    Ukur waktu start CLI (proses Python baru setiap kali).
+    
+    Returns:
+        Dict median milidetik untuk interpreter kosong, import
+        ebook_downloader dan `ebook_downloader.py --help`, plus apakah
+        import CLI ikut memuat tkinter
+    """
+    script = str(Path(__file__).with_name('ebook_downloader.py'))
+    commands = {
+        'python_ms': [sys.executable, '-c', 'pass'],
+        'import_ms': [sys.executable, '-c', 'import ebook_downloader'],
+        'cli_help_ms': [sys.executable, script, '--help'],
+    }
+    timings = {}
+    for name, command in commands.items():
+        samples = []
+        for _ in range(runs):
+            start = time.perf_counter()
+            subprocess.run(command, stdout=subprocess.DEVNULL, check=True, cwd=Path(script).parent)
+            samples.append((time.perf_counter() - start) * 1000)
+        timings[name] = round(statistics.median(samples), 1)
+    
+    check = subprocess.run(
+        [sys.executable, '-c', "import sys, ebook_downloader; print('tkinter' in sys.modules)"],
+        capture_output=True, text=True, check=True, cwd=Path(script).parent,
+    )
+    timings['imports_tkinter'] = check.stdout.strip() == 'True'
+    return timings
+
+
+def compare_cold_start(current, baseline, tolerance=0.15):
+    """Pesan regresi waktu start CLI dibanding baseline (list kosong jika tidak ada)."""
+    regressions = []
+    old = baseline.get('cold_start')
+    if not old:
+        return regressions
+    for name in ('import_ms', 'cli_help_ms'):
+        # Dibandingkan setelah dikurangi waktu start interpreter kosong
+        before = old[name] - old['python_ms']
+        after = current[name] - current['python_ms']
+        if after > before * (1 + tolerance) + 5:
+            regressions.append(f"cold start {name}: {before:.1f} -> {after:.1f} ms (di atas interpreter)")
+    if current['imports_tkinter']:
+        regressions.append("cold start: import ebook_downloader memuat tkinter")
+    return regressions
+
+
+def case_key(result):
+    return (result['scenario'], str(result['chunk_size']), result['concurrency'])
+
+
+def compare(results, baseline, tolerance=0.15):
+    """
+    Bandingkan hasil dengan baseline.
+    
+    Returns:
+        List pesan regresi (kosong jika tidak ada)
+    """
+    previous = {case_key(r): r for r in baseline['results']}
+    regressions = []
+    for result in results:
+        old = previous.get(case_key(result))
+        if old is None:
+            continue
+        name = "{} chunk={} c={}".format(*case_key(result))
+        if result['ok'] is False and old['ok']:
+            regressions.append(f"{name}: sekarang gagal ({result['error']})")
+        if old['mb_per_s'] and result['mb_per_s'] < old['mb_per_s'] * (1 - tolerance):
+            regressions.append(f"{name}: {old['mb_per_s']} -> {result['mb_per_s']} MB/s")
+        if old['ttfb_ms'] and result['ttfb_ms'] and result['ttfb_ms'] > old['ttfb_ms'] * (1 + tolerance) + 1:
+            regressions.append(f"{name}: TTFB {old['ttfb_ms']} -> {result['ttfb_ms']} ms")
+        # Buffer baca adaptif membuat puncak memori bervariasi antar run; beri kelonggaran 1 MB
+        if result['peak_mem_kb'] > old['peak_mem_kb'] * (1 + tolerance) + 1024:
+            regressions.append(f"{name}: memori {old['peak_mem_kb']} -> {result['peak_mem_kb']} KB")
+    return regressions
+
+
+def format_result(result):
+    ttfb = f"{result['ttfb_ms']:8.2f}" if result['ttfb_ms'] is not None else "       -"
+    status = "OK" if result['ok'] else "GAGAL"
+    return (f"{result['scenario']:<11} {str(result['chunk_size']):>8} {result['concurrency']:>3}"
+            f" {result['mb_per_s']:>9.2f} {ttfb} {result['cpu_s']:>7.3f} {result['peak_mem_kb']:>9.1f}  {status}")
+
+
+def parse_size(text):
+    """'4M' -> 4194304, '512K' -> 524288, '1000' -> 1000."""
+    units = {'K': 1024, 'M': 1024 ** 2, 'G': 1024 ** 3}
+    text = text.strip().upper()
+    if text and text[-1] in units:
+        return int(float(text[:-1]) * units[text[-1]])
+    return int(text)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark Ebook Downloader (offline)")
+    parser.add_argument("--serve", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--scenario", action="append", choices=list(SCENARIOS),
+                        help="Skenario yang dijalankan (boleh diulang; default semua)")
+    parser.add_argument("--size", default="4M", help="Ukuran PDF sintetis (mis. 512K, 4M)")
+    parser.add_argument("--chunk-sizes", default="auto,16K,256K,1M",
+                        help="Ukuran chunk dipisah koma; 'auto' = adaptif")
+    parser.add_argument("--concurrency", default="1,4,8", help="Jumlah download paralel dipisah koma")
+    parser.add_argument("--repeat", type=int, default=3, help="Jumlah pengulangan per kasus")
+    parser.add_argument("--quick", action="store_true",
+                        help="Matriks kecil untuk pemeriksaan cepat (1M, chunk auto, 1 dan 4 paralel)")
+    parser.add_argument("--cold-start-runs", type=int, default=10,
+                        help="Jumlah proses baru untuk mengukur waktu start CLI (0 = lewati)")
+    parser.add_argument("-o", "--output", help="Simpan hasil sebagai baseline JSON")
+    parser.add_argument("--compare", metavar="BASELINE", help="Bandingkan dengan baseline JSON")
+    parser.add_argument("--tolerance", type=float, default=0.15,
+                        help="Batas penurunan relatif sebelum dianggap regresi (default 0.15)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.serve:
+        serve()
+        return 0
+    
+    if args.quick:
+        args.size, args.chunk_sizes, args.concurrency, args.repeat = "1M", "auto", "1,4", 1
+        args.cold_start_runs = min(args.cold_start_runs, 3)
+    size = parse_size(args.size)
+    chunk_sizes = [None if c.strip() == 'auto' else parse_size(c) for c in args.chunk_sizes.split(',')]
+    concurrency_levels = [int(c) for c in args.concurrency.split(',')]
+    scenarios = args.scenario or list(SCENARIOS)
+    
+    process, base_url = start_server()
+    print(f"{'skenario':<11} {'chunk':>8} {'par':>3} {'MB/s':>9} {'TTFB ms':>8} {'CPU s':>7} {'peak KB':>9}")
+    try:
+        results = benchmark(base_url, scenarios, chunk_sizes, concurrency_levels, size, args.repeat,
+                            on_result=lambda r: print(format_result(r), flush=True))
+    finally:
+        process.terminate()
+        process.wait()
+    
+    cold_start = None
+    if args.cold_start_runs:
+        cold_start = measure_cold_start(args.cold_start_runs)
+        print(f"\ncold start: python {cold_start['python_ms']} ms, import {cold_start['import_ms']} ms, "
+              f"--help {cold_start['cli_help_ms']} ms, tkinter dimuat: {cold_start['imports_tkinter']}")
+    
+    report = {
+        'meta': {
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'file_size': size,
+            'repeat': args.repeat,
+        },
+        'results': results,
+        'cold_start': cold_start,
+    }
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"\nBaseline disimpan ke {args.output}")
+    
+    failed = [r for r in results if not r['ok']]
+    for result in failed:
+        print(f"GAGAL {case_key(result)}: {result['error']}", file=sys.stderr)
+    
+    regressions = []
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.tolerance)
+        if cold_start:
+            regressions += compare_cold_start(cold_start, baseline, args.tolerance)
+        for line in regressions:
+            print(f"REGRESI {line}", file=sys.stderr)
+        if not regressions:
+            print(f"\nTidak ada regresi dibanding {args.compare}")
+    
+    return 1 if failed or regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,210 @@
+"""
+Download Cache untuk Ebook Downloader
+=====================================
+Penyimpanan lokal berbasis isi (content-addressed) untuk file yang sudah
+pernah didownload.
+
+- Objek disimpan di `objects/<2 hex>/<sha256>` sehingga file yang sama
+  hanya disimpan sekali walaupun berasal dari beberapa URL.
+- Indeks URL (SQLite) mencatat sha256, ETag, Last-Modified, ukuran, dan
+  nama file terakhir untuk setiap URL.
+
+Download ulang mengirim If-None-Match/If-Modified-Since. Jika server
+membalas 304, file diambil dari cache (reflink, hardlink, atau salinan).
+"""
+
+import hashlib
+import os
+import shutil
+import sqlite3
+import sys
+import threading
+from pathlib import Path
+
+DEFAULT_CACHE_DIR = Path.home() / ".ebook_downloader" / "cache"
+
+# Lama menunggu jika index.sqlite3 sedang ditulis proses lain (GUI dan
+# batch CLI memakai cache yang sama)
+BUSY_TIMEOUT = 30.0
+
+# ioctl FICLONE (Linux): salinan copy-on-write di btrfs/xfs
+FICLONE = 0x40049409
+
+
+def hash_file(path, chunk_size=1024 * 1024):
+    """Hitung SHA-256 file secara streaming."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _reflink(src, dst):
+    """Buat salinan copy-on-write; False jika filesystem tidak mendukung."""
+    if not sys.platform.startswith('linux'):
+        return False
+    import fcntl
+    try:
+        with open(src, 'rb') as s, open(dst, 'wb') as d:
+            fcntl.ioctl(d.fileno(), FICLONE, s.fileno())
+        return True
+    except OSError:
+        try:
+            os.unlink(dst)
+        except OSError:
+            pass
+        return False
+
+
+def link_or_copy(src, dst):
+    """
+    Materialisasi src di dst: reflink, lalu hardlink, lalu salinan biasa.
+    
+    Returns:
+        Metode yang dipakai: 'reflink', 'hardlink', atau 'copy'
+    """
+    dst = Path(dst)
+    tmp = dst.with_name(f".{dst.name}.tmp")
+    if tmp.exists():
+        tmp.unlink()
+    if _reflink(src, tmp):
+        method = 'reflink'
+    else:
+        try:
+            os.link(src, tmp)
+            method = 'hardlink'
+        except OSError:
+            shutil.copyfile(src, tmp)
+            method = 'copy'
+    os.replace(tmp, dst)
+    return method
+
+
+class DownloadCache:
+    """Cache objek SHA-256 dengan indeks URL untuk revalidasi kondisional."""
+    
+    def __init__(self, root=DEFAULT_CACHE_DIR, timeout=BUSY_TIMEOUT):
+        """
+        Args:
+            root: Folder cache (objects/ dan index.sqlite3)
+            timeout: Detik menunggu kunci database yang dipegang proses lain
+        """
+        self.root = Path(root)
+        self.objects = self.root / "objects"
+        self.objects.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(str(self.root / "index.sqlite3"), timeout=timeout, check_same_thread=False)
+        # WAL: pembaca tidak diblokir penulis dari proses lain
+        self._db.execute("PRAGMA journal_mode=WAL")
+        with self._db:
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS urls ("
+                " url TEXT PRIMARY KEY, sha256 TEXT NOT NULL, etag TEXT,"
+                " last_modified TEXT, size INTEGER NOT NULL, filename TEXT)"
+            )
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS objects ("
+                " sha256 TEXT PRIMARY KEY, size INTEGER NOT NULL, mtime_ns INTEGER NOT NULL)"
+            )
+    
+    def object_path(self, sha256):
+        return self.objects / sha256[:2] / sha256
+    
+    def lookup(self, url):
+        """
+        Entri cache untuk URL, atau None jika tidak ada / objeknya rusak.
+        
+        Returns:
+            Dict dengan kunci sha256, etag, last_modified, size, filename
+        """
+        with self._lock:
+            row = self._db.execute(
+                "SELECT u.sha256, u.etag, u.last_modified, u.size, u.filename, o.size, o.mtime_ns"
+                " FROM urls u JOIN objects o ON o.sha256 = u.sha256 WHERE u.url = ?",
+                (url,),
+            ).fetchone()
+        if row is None:
+            return None
+        
+        sha256, etag, last_modified, size, filename, obj_size, obj_mtime = row
+        try:
+            st = self.object_path(sha256).stat()
+        except OSError:
+            st = None
+        if st is None or st.st_size != obj_size or st.st_mtime_ns != obj_mtime:
+            # Objek hilang atau berubah (mis. file hardlink diedit): buang
+            self.forget(url, sha256)
+            return None
+        
+        return {
+            'sha256': sha256,
+            'etag': etag,
+            'last_modified': last_modified,
+            'size': size,
+            'filename': filename,
+        }
+    
+    def conditional_headers(self, entry):
+        """Header If-None-Match/If-Modified-Since untuk entri cache."""
+        headers = {}
+        if entry and entry['etag']:
+            headers['If-None-Match'] = entry['etag']
+        if entry and entry['last_modified']:
+            headers['If-Modified-Since'] = entry['last_modified']
+        return headers
+    
+    def store(self, url, filepath, etag=None, last_modified=None):
+        """
+        Simpan file hasil download ke cache dan catat di indeks URL.
+        
+        Returns:
+            SHA-256 isi file
+        """
+        filepath = Path(filepath)
+        sha256 = hash_file(filepath)
+        obj = self.object_path(sha256)
+        
+        with self._lock:
+            if not obj.exists():
+                obj.parent.mkdir(exist_ok=True)
+                link_or_copy(filepath, obj)
+            st = obj.stat()
+            with self._db:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO objects (sha256, size, mtime_ns) VALUES (?, ?, ?)",
+                    (sha256, st.st_size, st.st_mtime_ns),
+                )
+                self._db.execute(
+                    "INSERT OR REPLACE INTO urls (url, sha256, etag, last_modified, size, filename)"
+                    " VALUES (?, ?, ?, ?, ?, ?)",
+                    (url, sha256, etag, last_modified, st.st_size, filepath.name),
+                )
+        return sha256
+    
+    def materialize(self, entry, dest):
+        """Tempatkan objek cache di dest; mengembalikan metode yang dipakai."""
+        dest = Path(dest)
+        obj = self.object_path(entry['sha256'])
+        try:
+            if os.path.samefile(obj, dest):
+                return 'hardlink'
+        except OSError:
+            pass
+        return link_or_copy(obj, dest)
+    
+    def forget(self, url, sha256=None):
+        """Hapus URL dari indeks (objek yang tidak dipakai URL lain ikut dihapus)."""
+        with self._lock, self._db:
+            self._db.execute("DELETE FROM urls WHERE url = ?", (url,))
+            if sha256 and not self._db.execute(
+                    "SELECT 1 FROM urls WHERE sha256 = ?", (sha256,)).fetchone():
+                self._db.execute("DELETE FROM objects WHERE sha256 = ?", (sha256,))
+                try:
+                    self.object_path(sha256).unlink()
+                except OSError:
+                    pass
+    
+    def close(self):
+        with self._lock:
+            self._db.close()
@@ -0,0 +1,208 @@
+"""
+Duplicates untuk Ebook Downloader
+=================================
+Deteksi file duplikat di folder download, memakai indeks library_index
+(yang sudah menyimpan SHA-256 setiap PDF/EPUB dan hanya membaca ulang
+file yang berubah).
+
+- Duplikat persis: file dengan SHA-256 sama, mis. satu skripsi yang
+  tersimpan sebagai ebook_downloaded.pdf, nama dari Content-Disposition
+  dan nama dari URL. link_duplicates() mengganti salinannya dengan
+  hardlink ke satu file sehingga ruang disk hanya terpakai sekali.
+- Hampir duplikat: dokumen yang teksnya hampir sama (versi lain, halaman
+  sampul berbeda, hasil kompresi ulang). Kemiripan diperkirakan dengan
+  MinHash atas shingle kata; signature dihitung sekali saat dokumen
+  diindeks, dan kandidat pasangan dicari dengan LSH (banding) sehingga
+  tidak semua pasangan dibandingkan.
+
+MinHash memakai one permutation hashing: setiap shingle di-hash sekali
+lalu masuk ke salah satu dari NUM_BINS bin, bin kosong diisi dari bin
+tetangga (densifikasi). Hasilnya setara dengan NUM_BINS permutasi, tetapi
+cukup satu hash per shingle.
+"""
+
+import os
+import re
+import hashlib
+from array import array
+from collections import defaultdict
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import List
+
+NUM_BINS = 128
+SHINGLE_WORDS = 5
+# LSH: BANDS x ROWS = NUM_BINS. Pasangan dengan kemiripan ~0.7 ke atas
+# hampir pasti menjadi kandidat; di bawah ~0.4 hampir tidak pernah.
+BANDS = 32
+ROWS = NUM_BINS // BANDS
+DEFAULT_THRESHOLD = 0.8
+
+_MASK = (1 << 64) - 1
+
+
+def _shingle_hashes(text, k=SHINGLE_WORDS):
+    words = re.findall(r'\w+', text.casefold())
+    if not words:
+        return
+    for i in range(max(len(words) - k + 1, 1)):
+        shingle = ' '.join(words[i:i + k]).encode('utf-8')
+        yield int.from_bytes(hashlib.blake2b(shingle, digest_size=8).digest(), 'little')
+
+
+def minhash_signature(text):
+    """
+    Signature MinHash dari teks dokumen.
+    
+    Returns:
+        bytes (NUM_BINS nilai 64-bit), atau b'' jika teks tidak berisi kata
+    """
+    empty = _MASK
+    bins = [empty] * NUM_BINS
+    for value in _shingle_hashes(text):
+        index = value % NUM_BINS
+        value //= NUM_BINS
+        if value < bins[index]:
+            bins[index] = value
+    if all(value == empty for value in bins):
+        return b''
+    # Densifikasi: bin kosong memakai bin terisi berikutnya (melingkar),
+    # digeser menurut jaraknya agar tidak sama persis dengan bin sumber
+    for index in range(NUM_BINS):
+        if bins[index] != empty:
+            continue
+        distance = 1
+        while bins[(index + distance) % NUM_BINS] == empty:
+            distance += 1
+        bins[index] = (bins[(index + distance) % NUM_BINS] + distance * 0x9E3779B97F4A7C15) & (_MASK >> 7)
+    return array('Q', bins).tobytes()
+
+
+def similarity(signature_a, signature_b):
+    """Perkiraan kemiripan Jaccard (0-1) dari dua signature MinHash."""
+    if not signature_a or not signature_b:
+        return 0.0
+    a, b = array('Q', signature_a), array('Q', signature_b)
+    return sum(1 for x, y in zip(a, b) if x == y) / NUM_BINS
+
+
+@dataclass
+class DuplicateGroup:
+    """File-file dengan isi sama persis. paths[0] adalah file yang dipertahankan."""
+    sha256: str
+    size: int
+    paths: List[Path] = field(default_factory=list)
+    
+    @property
+    def wasted(self):
+        """Byte yang bisa dihemat (salinan yang belum berbagi inode dengan paths[0])."""
+        return self.size * sum(1 for path in self.paths[1:] if not _same_file(self.paths[0], path))
+
+
+def _same_file(a, b):
+    try:
+        return os.path.samefile(a, b)
+    except OSError:
+        return False
+
+
+def find_duplicates(index, folder=None):
+    """
+    Kelompok duplikat persis di indeks, dari yang paling boros ruang.
+    
+    Args:
+        index: LibraryIndex yang sudah diperbarui (update())
+        folder: Batasi ke file di folder ini (default: seluruh indeks)
+    
+    Returns:
+        List DuplicateGroup; di setiap kelompok file yang paling dulu
+        diindeks (biasanya download pertama) berada di depan
+    """
+    groups = {}
+    for sha256, size, path in index.duplicate_rows(folder):
+        groups.setdefault(sha256, DuplicateGroup(sha256, size)).paths.append(Path(path))
+    return sorted(groups.values(), key=lambda group: group.wasted, reverse=True)
+
+
+def find_near_duplicates(index, threshold=DEFAULT_THRESHOLD, folder=None):
+    """
+    Pasangan dokumen yang teksnya hampir sama (tetapi SHA-256 berbeda).
+    
+    Args:
+        index: LibraryIndex yang sudah diperbarui (update())
+        threshold: Kemiripan minimum (0-1)
+        folder: Batasi ke file di folder ini (default: seluruh indeks)
+    
+    Returns:
+        List tuple (kemiripan, path_a, path_b), dari yang paling mirip
+    """
+    documents = {}
+    buckets = defaultdict(list)
+    for doc_id, path, sha256, signature in index.signatures(folder):
+        documents[doc_id] = (Path(path), sha256, signature)
+        for band in range(BANDS):
+            key = signature[band * ROWS * 8:(band + 1) * ROWS * 8]
+            buckets[band, key].append(doc_id)
+    
+    candidates = set()
+    for ids in buckets.values():
+        for i, first in enumerate(ids):
+            for second in ids[i + 1:]:
+                candidates.add((first, second))
+    
+    pairs = []
+    for first, second in candidates:
+        path_a, sha_a, signature_a = documents[first]
+        path_b, sha_b, signature_b = documents[second]
+        if sha_a == sha_b:
+            continue
+        score = similarity(signature_a, signature_b)
+        if score >= threshold:
+            pairs.append((score, path_a, path_b))
+    pairs.sort(key=lambda pair: (-pair[0], str(pair[1]), str(pair[2])))
+    return pairs
+
+
+def link_duplicates(index, groups, dry_run=False):
+    """
+    Ganti salinan di setiap kelompok dengan hardlink ke paths[0].
+    
+    File yang berubah sejak diindeks dilewati. Penggantian atomik: hardlink
+    dibuat dengan nama sementara lalu dipindah menimpa salinan.
+    
+    Args:
+        index: LibraryIndex tempat groups berasal (dicatat ulang setelah di-link)
+        groups: Hasil find_duplicates()
+        dry_run: Hanya hitung tanpa mengubah file
+    
+    Returns:
+        Tuple (jumlah file yang di-link, byte yang dihemat, list (path, alasan) yang dilewati)
+    """
+    linked = 0
+    saved = 0
+    skipped = []
+    for group in groups:
+        keep = group.paths[0]
+        for path in group.paths[1:]:
+            if _same_file(keep, path):
+                continue
+            if not index.is_current(keep) or not index.is_current(path):
+                skipped.append((path, "berubah sejak diindeks"))
+                continue
+            if dry_run:
+                linked += 1
+                saved += group.size
+                continue
+            tmp = path.with_name(f".{path.name}.tmp")
+            try:
+                if tmp.exists():
+                    tmp.unlink()
+                os.link(keep, tmp)
+                os.replace(tmp, path)
+            except OSError as e:
+                skipped.append((path, str(e) or type(e).__name__))
+                continue
+            index.add_file(path)
+            linked += 1
+            saved += group.size
+    return linked, saved, skipped
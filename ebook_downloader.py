@@ -9,22 +9,726 @@ Catatan Penting:
 """
 
 import requests
+from requests.adapters import HTTPAdapter
+import urllib3
 import os
 from urllib.parse import urlparse, unquote
 from pathlib import Path
 import re
+import sys
+import http.client
+import json
+import time
+import argparse
+import threading
+import shutil
+import sqlite3
+import hashlib
+from types import SimpleNamespace
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from dataclasses import dataclass, asdict, field
+from typing import Optional
+
+from rate_limit import get_rate_limiter, parse_rate, format_rate
+from retry_policy import RetryPolicy, CircuitOpenError, get_circuit_breaker
+from repo_health import get_health_store
+from pdf_metadata import read_pdf_metadata, metadata_filename, describe as describe_pdf, is_pdf
+
+
+DEFAULT_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
+    'Accept-Language': 'id-ID,id;q=0.9,en-US;q=0.8,en;q=0.7',
+}
+
+
+class ConnectionPool:
+    """
+    Session HTTP bersama dengan pool koneksi keep-alive per host.
+    
+    Satu session dipakai untuk semua download sehingga koneksi TCP/TLS ke
+    host yang sama (mis. repository.upi.edu) dipakai ulang, bukan dibuka
+    ulang untuk setiap file.
+    """
+    
+    def __init__(self, headers=None, pool_connections=10, pool_maxsize=10, host_pool_sizes=None):
+        """
+        Args:
+            headers: Header default yang dipasang sekali di session
+            pool_connections: Jumlah host yang pool-nya disimpan
+            pool_maxsize: Jumlah koneksi maksimum per host (default)
+            host_pool_sizes: Dict {host: ukuran pool} untuk host tertentu
+        """
+        self.session = requests.Session()
+        self.session.headers.update(headers or DEFAULT_HEADERS)
+        self._adapters = [HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize)]
+        self.session.mount('http://', self._adapters[0])
+        self.session.mount('https://', self._adapters[0])
+        
+        for host, size in (host_pool_sizes or {}).items():
+            self.set_host_pool_size(host, size)
+    
+    def set_host_pool_size(self, host, size):
+        """Pasang adapter khusus dengan ukuran pool tersendiri untuk satu host."""
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=size)
+        self._adapters.append(adapter)
+        for scheme in ('http://', 'https://'):
+            self.session.mount(f"{scheme}{host}/", adapter)
+    
+    def get(self, url, **kwargs):
+        """Kirim GET lewat session bersama."""
+        return self.session.get(url, **kwargs)
+    
+    def head(self, url, **kwargs):
+        """Kirim HEAD lewat session bersama."""
+        return self.session.head(url, **kwargs)
+    
+    def stats(self):
+        """
+        Statistik pemakaian ulang koneksi per host.
+        
+        Returns:
+            Dict {host: {'connections': n, 'requests': n, 'reused': n}}
+            untuk pool yang masih aktif
+        """
+        stats = {}
+        for adapter in self._adapters:
+            pools = adapter.poolmanager.pools
+            for key in pools.keys():
+                pool = pools.get(key)
+                if pool is None:
+                    continue
+                host = stats.setdefault(pool.host, {'connections': 0, 'requests': 0, 'reused': 0})
+                host['connections'] += pool.num_connections
+                host['requests'] += pool.num_requests
+                host['reused'] += max(pool.num_requests - pool.num_connections, 0)
+        return stats
+    
+    def close(self):
+        """Tutup semua koneksi di pool."""
+        self.session.close()
+
+
+_default_pool = None
+_default_pool_lock = threading.Lock()
+
+
+def get_connection_pool():
+    """
+    Ambil pool koneksi bersama untuk proses ini (dibuat saat pertama dipanggil).
+    
+    Pool bersama selalu memakai DEFAULT_HEADERS dan opsi default agar tidak
+    bergantung pada siapa yang memanggil lebih dulu. Butuh header atau
+    ukuran pool lain: buat ConnectionPool sendiri dan berikan ke
+    EbookDownloader(pool=...), atau kirim header per request.
+    """
+    global _default_pool
+    with _default_pool_lock:
+        if _default_pool is None:
+            _default_pool = ConnectionPool()
+        return _default_pool
+
+
+def format_pool_stats(stats):
+    """Format statistik pool menjadi baris-baris teks untuk ditampilkan."""
+    return [
+        f"{host}: {s['requests']} request, {s['connections']} koneksi baru, {s['reused']} dipakai ulang"
+        for host, s in sorted(stats.items())
+    ]
+
+
+class ContentTypeError(Exception):
+    """Server mengirim konten yang bukan ebook (mis. halaman HTML)."""
+    
+    def __init__(self, content_type):
+        super().__init__(f"Server mengembalikan {content_type}, bukan file ebook")
+        self.content_type = content_type
+
+
+class CorruptFileError(Exception):
+    """File selesai diunduh tetapi tidak utuh (mis. PDF tanpa penanda %%EOF)."""
+
+
+HTML_MARKERS = (b'<!doctype html', b'<html', b'<head', b'<body', b'<!--', b'<script', b'<meta', b'<title')
+
+
+def sniff_type(head, final=False):
+    """
+    Tebak jenis file dari byte-byte awalnya.
+    
+    Args:
+        head: Byte awal stream (idealnya 1024 byte pertama)
+        final: True jika tidak akan ada byte tambahan untuk diperiksa
+    
+    Returns:
+        'pdf', 'epub', 'zip', 'djvu', 'html', 'unknown', atau None jika
+        belum bisa diputuskan
+    """
+    if head.startswith(b'%PDF-'):
+        return 'pdf'
+    if head.startswith(b'PK\x03\x04'):
+        if len(head) < 58 and not final:
+            return None
+        return 'epub' if head[30:58] == b'mimetypeapplication/epub+zip' else 'zip'
+    if head.startswith(b'AT&TFORM'):
+        return 'djvu'
+    
+    text = head.lstrip(b'\xef\xbb\xbf \t\r\n').lower()
+    if text.startswith(HTML_MARKERS):
+        return 'html'
+    if len(head) < ContentSniffer.HEAD_SIZE and not final:
+        return None
+    # PDF boleh diawali sampah sampai 1024 byte sebelum %PDF-
+    if b'%PDF-' in head[:1024]:
+        return 'pdf'
+    return 'unknown'
+
+
+class ContentSniffer:
+    """
+    Periksa isi stream sambil diunduh: magic bytes di chunk pertama dan
+    penanda akhir file di byte-byte terakhir, tanpa membaca ulang file.
+    """
+    
+    HEAD_SIZE = 1024
+    TAIL_SIZE = 1024
+    
+    def __init__(self):
+        self.head = b''
+        self.tail = b''
+        self.kind = None
+    
+    @classmethod
+    def from_part(cls, part_path, offset):
+        """
+        Sniffer untuk download yang dilanjutkan: jenis diambil dari awal file .part.
+        
+        Raises:
+            ContentTypeError jika awal .part ternyata halaman HTML
+        """
+        sniffer = cls()
+        with open(part_path, 'rb') as f:
+            sniffer.head = f.read(min(cls.HEAD_SIZE, offset))
+            f.seek(max(offset - cls.TAIL_SIZE, 0))
+            sniffer.tail = f.read(min(cls.TAIL_SIZE, offset))
+        sniffer._decide(sniff_type(sniffer.head, final=True))
+        return sniffer
+    
+    def feed(self, chunk):
+        """
+        Periksa satu chunk.
+        
+        Raises:
+            ContentTypeError jika isi stream ternyata halaman HTML
+        """
+        if self.kind is None:
+            self.head += chunk[:self.HEAD_SIZE - len(self.head)]
+            self._decide(sniff_type(self.head))
+        if len(chunk) >= self.TAIL_SIZE:
+            self.tail = bytes(chunk[-self.TAIL_SIZE:])
+        else:
+            self.tail = (self.tail + chunk)[-self.TAIL_SIZE:]
+    
+    def finish(self):
+        """
+        Pemeriksaan akhir setelah byte terakhir diterima.
+        
+        Raises:
+            ContentTypeError jika isi berupa HTML
+            CorruptFileError jika PDF tidak diakhiri %%EOF
+        """
+        if self.kind is None:
+            self._decide(sniff_type(self.head, final=True))
+        if self.kind == 'pdf' and b'%%EOF' not in self.tail:
+            raise CorruptFileError("File PDF tidak lengkap (penanda %%EOF tidak ditemukan)")
+    
+    def _decide(self, kind):
+        self.kind = kind
+        if kind == 'html':
+            raise ContentTypeError('text/html (terdeteksi dari isi file)')
+
+
+def preallocate(f, size):
+    """Alokasikan ruang file sebesar size byte (posix_fallocate jika tersedia)."""
+    if size <= 0:
+        return
+    if hasattr(os, 'posix_fallocate'):
+        try:
+            os.posix_fallocate(f.fileno(), 0, size)
+            return
+        except OSError:
+            # Filesystem tidak mendukung fallocate (mis. beberapa FS jaringan)
+            pass
+    f.truncate(size)
+
+
+# Body response error (429/503) sebesar ini dibaca habis agar koneksinya
+# kembali ke pool; yang lebih besar koneksinya ditutup saja
+DRAIN_LIMIT = 64 * 1024
+
+
+def discard_response(response, limit=DRAIN_LIMIT):
+    """Buang body response yang tidak dipakai dan lepaskan koneksinya sebelum menunggu retry."""
+    drained = 0
+    try:
+        for chunk in response.iter_content(16 * 1024):
+            drained += len(chunk)
+            if drained > limit:
+                break
+    except requests.exceptions.RequestException:
+        pass
+    response.close()
+
+
+class BodyReader:
+    """
+    Iterator body response requests dengan buffer yang dipakai ulang.
+    
+    Ukuran baca menyesuaikan throughput: membesar saat data datang cepat
+    dan mengecil saat satu kali baca terlalu lama (agar progress tetap
+    lancar di koneksi lambat). Body tanpa Content-Encoding dibaca dengan
+    readinto() langsung ke buffer, sehingga tidak ada objek bytes baru
+    per chunk. Chunk yang dihasilkan berupa memoryview yang hanya valid
+    sampai iterasi berikutnya.
+    """
+    
+    MIN_CHUNK = 16 * 1024
+    MAX_CHUNK = 4 * 1024 * 1024
+    DEFAULT_CHUNK = 64 * 1024
+    TARGET_SECONDS = 0.1
+    
+    def __init__(self, response, chunk_size=None, max_chunk=None):
+        """
+        Args:
+            response: Response requests dengan stream=True
+            chunk_size: Ukuran baca tetap; None = adaptif mulai dari DEFAULT_CHUNK
+            max_chunk: Callable tanpa argumen yang mengembalikan ukuran baca
+                maksimum saat ini atau None (mis. RateLimiter.chunk_limit)
+        """
+        self.response = response
+        self.max_chunk = max_chunk
+        self.adaptive = chunk_size is None
+        self.chunk_size = chunk_size or self.DEFAULT_CHUNK
+        self._buffer = bytearray(self.chunk_size)
+    
+    def _direct_fp(self):
+        """File object http.client di bawah urllib3, jika aman dibaca langsung."""
+        encoding = self.response.headers.get('Content-Encoding', '').lower()
+        fp = getattr(self.response.raw, '_fp', None)
+        if encoding not in ('', 'identity') or not hasattr(fp, 'readinto'):
+            return None
+        return fp
+    
+    def __iter__(self):
+        raw = self.response.raw
+        fp = self._direct_fp()
+        view = memoryview(self._buffer)
+        
+        while True:
+            size = self.chunk_size
+            limit = self.max_chunk() if self.max_chunk else None
+            if limit:
+                size = min(size, limit)
+            if len(self._buffer) < size:
+                self._buffer = bytearray(size)
+                view = memoryview(self._buffer)
+            
+            start = time.perf_counter()
+            try:
+                if fp is not None:
+                    n = fp.readinto(view[:size])
+                    chunk = view[:n]
+                else:
+                    chunk = raw.read(size, decode_content=True)
+                    n = len(chunk)
+            except http.client.IncompleteRead as e:
+                raise requests.exceptions.ChunkedEncodingError(e)
+            except urllib3.exceptions.ProtocolError as e:
+                raise requests.exceptions.ChunkedEncodingError(e)
+            except urllib3.exceptions.DecodeError as e:
+                raise requests.exceptions.ContentDecodingError(e)
+            except (urllib3.exceptions.ReadTimeoutError, TimeoutError) as e:
+                raise requests.exceptions.ReadTimeout(e)
+            except OSError as e:
+                raise requests.exceptions.ConnectionError(e)
+            
+            if not n:
+                if fp is not None and fp.length:
+                    # http.client tidak memeriksa Content-Length saat socket ditutup
+                    raise requests.exceptions.ChunkedEncodingError(
+                        http.client.IncompleteRead(b'', fp.length))
+                break
+            if self.adaptive:
+                self._adapt(n, time.perf_counter() - start)
+            yield chunk
+        
+        if fp is not None:
+            # Body sudah habis dibaca: kembalikan koneksi ke pool (keep-alive)
+            raw.release_conn()
+    
+    def _adapt(self, n, elapsed):
+        if n >= self.chunk_size and elapsed < self.TARGET_SECONDS / 2:
+            self.chunk_size = min(self.chunk_size * 2, self.MAX_CHUNK)
+        elif elapsed > self.TARGET_SECONDS * 2:
+            self.chunk_size = max(self.chunk_size // 2, self.MIN_CHUNK)
+
+
+class PartialDownload:
+    """
+    Download yang belum selesai: data di `<nama>.part` dan metadata di
+    `<nama>.part.json` (URL, ETag/Last-Modified, offset, ukuran total).
+    """
+    
+    def __init__(self, filepath, url):
+        self.filepath = Path(filepath)
+        self.part_path = self.filepath.with_name(self.filepath.name + '.part')
+        self.meta_path = self.filepath.with_name(self.filepath.name + '.part.json')
+        self.url = url
+        self.etag = None
+        self.last_modified = None
+        self.total = 0
+        self.written = 0
+        self._checkpoint = 0
+    
+    # Offset di sidecar diperbarui setiap kali sebanyak ini data tertulis
+    CHECKPOINT_BYTES = 8 * 1024 * 1024
+    
+    @classmethod
+    def find(cls, folder, url):
+        """Cari sidecar di folder yang cocok dengan URL."""
+        for meta_path in Path(folder).glob('*.part.json'):
+            partial = cls(meta_path.with_name(meta_path.name[:-len('.part.json')]), url)
+            if partial.load():
+                return partial
+        return None
+    
+    def load(self):
+        """Baca sidecar; True jika ada dan milik URL yang sama."""
+        try:
+            with open(self.meta_path, encoding='utf-8') as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            return False
+        if meta.get('url') != self.url:
+            return False
+        self.etag = meta.get('etag')
+        self.last_modified = meta.get('last_modified')
+        self.total = meta.get('total', 0)
+        self.written = meta.get('offset', 0)
+        return True
+    
+    def save(self):
+        """Tulis sidecar dengan offset terkini."""
+        meta = {
+            'url': self.url,
+            'etag': self.etag,
+            'last_modified': self.last_modified,
+            'offset': self.written,
+            'total': self.total,
+        }
+        tmp_path = self.meta_path.with_name(self.meta_path.name + '.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(meta, f)
+        os.replace(tmp_path, self.meta_path)
+    
+    @property
+    def offset(self):
+        """
+        Jumlah byte yang sudah pasti tertulis. File .part bisa lebih besar
+        karena dialokasikan penuh sejak awal, jadi offset diambil dari sidecar.
+        """
+        try:
+            return min(self.written, self.part_path.stat().st_size)
+        except OSError:
+            return 0
+    
+    @property
+    def validator(self):
+        """Validator untuk If-Range (ETag kuat, atau Last-Modified)."""
+        if self.etag and not self.etag.startswith('W/'):
+            return self.etag
+        return self.last_modified
+    
+    def range_headers(self):
+        """Header Range/If-Range untuk melanjutkan, atau {} jika tidak bisa."""
+        if self.offset and self.validator:
+            return {'Range': f'bytes={self.offset}-', 'If-Range': self.validator}
+        return {}
+    
+    def begin(self, status_code, headers):
+        """
+        Catat validator dari header response dan tentukan offset awal penulisan.
+        
+        Returns:
+            Offset tempat data response ditulis (0 = mulai dari awal)
+        """
+        offset = self.offset
+        content_range = headers.get('Content-Range', '')
+        resumed = (status_code == 206 and offset > 0
+                   and content_range.startswith(f'bytes {offset}-'))
+        if not resumed:
+            # Server tidak mendukung Range atau file berubah: unduh ulang penuh
+            offset = 0
+            if self.part_path.exists():
+                self.part_path.unlink()
+        
+        self.etag = headers.get('ETag') or (self.etag if resumed else None)
+        self.last_modified = headers.get('Last-Modified') or (self.last_modified if resumed else None)
+        self.total = offset + int(headers.get('content-length', 0))
+        if resumed and '/' in content_range and content_range.rsplit('/', 1)[1].isdigit():
+            self.total = int(content_range.rsplit('/', 1)[1])
+        self.written = self._checkpoint = offset
+        self.save()
+        return offset
+    
+    def complete_by(self, status_code, headers):
+        """
+        True jika server menolak Range (416) karena .part sudah lengkap:
+        proses berhenti setelah byte terakhir ditulis tetapi sebelum .part
+        di-rename. Content-Range "bytes */N" harus sama dengan ukuran total
+        yang dicatat di sidecar.
+        """
+        return (status_code == 416 and self.total > 0 and self.offset == self.total
+                and headers.get('Content-Range', '').strip() == f'bytes */{self.total}')
+    
+    def open(self, offset):
+        """
+        Buka file .part untuk ditulis mulai dari offset.
+        
+        Download baru dialokasikan sebesar ukuran total (jika diketahui)
+        agar file tidak terfragmentasi dan disk penuh ketahuan di awal.
+        """
+        if offset:
+            f = open(self.part_path, 'r+b')
+            f.seek(offset)
+            return f
+        f = open(self.part_path, 'wb')
+        preallocate(f, self.total)
+        return f
+    
+    def advance(self, f, written):
+        """Catat jumlah byte tertulis; simpan sidecar setiap CHECKPOINT_BYTES."""
+        self.written = written
+        if written - self._checkpoint >= self.CHECKPOINT_BYTES:
+            f.flush()
+            self._checkpoint = written
+            self.save()
+    
+    def finish(self):
+        """Pindahkan .part ke nama akhir dan hapus sidecar."""
+        os.replace(self.part_path, self.filepath)
+        self.discard()
+        return self.filepath
+    
+    def discard(self):
+        """Hapus file .part (jika masih ada) dan sidecar."""
+        for path in (self.part_path, self.meta_path):
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                pass
+
+
+class SegmentError(requests.exceptions.RequestException):
+    """Satu segmen download paralel gagal atau hasilnya tidak lengkap."""
+
+
+class DownloadCancelled(Exception):
+    """Download dihentikan karena mirror lain sudah menang."""
+
+
+def _check_cancelled(cancel, url):
+    """Raise DownloadCancelled jika event pembatalan sudah di-set."""
+    if cancel is not None and cancel.is_set():
+        raise DownloadCancelled(url)
+
+
+class MirrorRacer:
+    """Satu kandidat URL dalam balapan mirror (lihat EbookDownloader.fetch_first)."""
+    
+    # Folder sementara kandidat: .mirror-<hash URL> di folder download
+    FOLDER_PREFIX = ".mirror-"
+    
+    def __init__(self, url, folder):
+        self.url = url
+        self.folder = folder
+        self.started = time.monotonic()
+        self.first_byte_at = None
+        self.downloaded = 0
+        self.total = 0
+        self.cancelled = threading.Event()
+        self.future = None
+    
+    @classmethod
+    def for_url(cls, url, download_folder):
+        """
+        Kandidat dengan folder sementara yang selalu sama untuk URL yang sama,
+        sehingga .part dari balapan sebelumnya dilanjutkan.
+        """
+        digest = hashlib.sha1(url.encode('utf-8')).hexdigest()[:16]
+        return cls(url, Path(download_folder) / f"{cls.FOLDER_PREFIX}{digest}")
+    
+    def progress(self, downloaded, total):
+        if self.first_byte_at is None:
+            self.first_byte_at = time.monotonic()
+        self.downloaded = downloaded
+        self.total = total
+    
+    def lagging(self, now, ttfb, min_rate):
+        """True jika time to first byte atau throughput kandidat ini di bawah target."""
+        if self.first_byte_at is None:
+            return now - self.started > ttfb
+        elapsed = now - self.first_byte_at
+        # Throughput baru dinilai setelah sempat berjalan sebentar
+        return elapsed > 1.0 and self.downloaded / elapsed < min_rate
+    
+    def cleanup(self, keep_partial=False):
+        """
+        Hapus folder sementara kandidat.
+        
+        Args:
+            keep_partial: Biarkan folder jika masih ada .part yang bisa dilanjutkan
+        """
+        if keep_partial and any(self.folder.glob('*.part')):
+            return
+        shutil.rmtree(self.folder, ignore_errors=True)
+
+
+@dataclass
+class DownloadResult:
+    """Hasil download satu URL dalam batch."""
+    url: str
+    path: Optional[Path]
+    bytes: int
+    duration: float
+    error: Optional[str] = None
+    
+    @property
+    def ok(self):
+        return self.error is None
+    
+    def to_dict(self):
+        data = asdict(self)
+        data['path'] = str(self.path) if self.path else None
+        return data
+
+
+@dataclass
+class Preflight:
+    """Hasil HEAD (dengan redirect) sebelum download dimulai."""
+    url: str
+    final_url: str
+    status: int
+    size: int
+    content_type: str
+    accept_ranges: bool
+    filename: str
+    elapsed: float
+    headers: dict = field(repr=False, default_factory=dict)
+    checked_at: float = field(repr=False, default_factory=time.monotonic)
+    
+    @property
+    def ok(self):
+        return self.status < 400
+    
+    @property
+    def is_html(self):
+        return 'text/html' in self.content_type
+    
+    def fresh(self, max_age):
+        return time.monotonic() - self.checked_at < max_age
+
+
+def read_url_list(path):
+    """
+    Baca daftar URL dari file teks (satu dokumen per baris, '#' untuk komentar).
+    
+    Beberapa URL dalam satu baris (dipisah spasi) adalah mirror dari dokumen
+    yang sama dan dibiarkan dalam satu string.
+    """
+    urls = []
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if line and not line.startswith('#'):
+                urls.append(' '.join(line.split()))
+    return urls
 
 
 class EbookDownloader:
-    def __init__(self, download_folder="downloads"):
-        """Inisialisasi downloader dengan folder tujuan download."""
+    # Ukuran minimum satu segmen; file yang lebih kecil diunduh dengan satu stream
+    MIN_SEGMENT_SIZE = 2 * 1024 * 1024
+    
+    # Balapan mirror: kandidat berikutnya dimulai jika byte pertama belum
+    # datang setelah HEDGE_TTFB detik atau throughput di bawah HEDGE_MIN_RATE
+    HEDGE_TTFB = 3.0
+    HEDGE_MIN_RATE = 64 * 1024
+    MAX_RACERS = 2
+    
+    # Hasil preflight (URL akhir setelah redirect, ukuran, header) dipakai
+    # download berikutnya selama masih semuda ini (detik)
+    PREFLIGHT_TTL = 60.0
+    # Folder .mirror-* yang tidak tersentuh selama ini dihapus saat downloader dibuat (detik)
+    MIRROR_MAX_AGE = 24 * 3600
+    
+    def __init__(self, download_folder="downloads", pool=None, segments=1, cache=None, chunk_size=None,
+                 limiter=None, retry=None, breaker=None, rename_pdfs=False):
+        """
+        Inisialisasi downloader dengan folder tujuan download.
+        
+        Args:
+            download_folder: Folder tujuan download
+            pool: ConnectionPool (default: pool bersama proses ini)
+            segments: Jumlah koneksi paralel per file (1 = satu stream)
+            cache: DownloadCache untuk revalidasi kondisional (opsional)
+            chunk_size: Ukuran baca tetap dalam byte (None = adaptif)
+            limiter: RateLimiter (default: pembatas bersama proses ini)
+            retry: RetryPolicy untuk error koneksi, 429 dan 5xx (default: RetryPolicy())
+            breaker: CircuitBreaker per host (default: breaker bersama proses ini)
+            rename_pdfs: Ganti nama PDF yang selesai diunduh menjadi
+                "Penulis - Judul.pdf" dari metadata di dalam file
+        """
         self.download_folder = Path(download_folder)
         self.download_folder.mkdir(exist_ok=True)
-        self.headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
-            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
-            'Accept-Language': 'id-ID,id;q=0.9,en-US;q=0.8,en;q=0.7',
-        }
+        self.headers = dict(DEFAULT_HEADERS)
+        self.pool = pool or get_connection_pool()
+        self.segments = segments
+        self.cache = cache
+        self.chunk_size = chunk_size
+        self.limiter = limiter or get_rate_limiter()
+        self.retry = retry or RetryPolicy()
+        self.breaker = breaker or get_circuit_breaker()
+        self.rename_pdfs = rename_pdfs
+        self._reserved = set()
+        self._reserved_lock = threading.Lock()
+        self._preflights = {}
+        self._preflights_lock = threading.Lock()
+        self.remove_stale_mirrors()
+    
+    def remove_stale_mirrors(self, max_age=None):
+        """
+        Hapus folder kandidat mirror (.mirror-*) sisa balapan lama.
+        
+        Folder yang isinya masih diubah dalam max_age detik dibiarkan, supaya
+        .part di dalamnya bisa dilanjutkan balapan berikutnya.
+        
+        Returns:
+            Jumlah folder yang dihapus
+        """
+        max_age = self.MIRROR_MAX_AGE if max_age is None else max_age
+        now = time.time()
+        removed = 0
+        for folder in self.download_folder.glob(f"{MirrorRacer.FOLDER_PREFIX}*"):
+            try:
+                if not folder.is_dir():
+                    continue
+                touched = max([folder.stat().st_mtime] + [path.stat().st_mtime for path in folder.iterdir()])
+            except OSError:
+                continue
+            if now - touched >= max_age:
+                shutil.rmtree(folder, ignore_errors=True)
+                removed += 1
+        return removed
     
     def sanitize_filename(self, filename):
         """Bersihkan nama file dari karakter yang tidak valid."""
@@ -34,76 +738,1336 @@ class EbookDownloader:
             filename = filename.replace(char, '_')
         return filename[:200]  # Batasi panjang nama file
     
-    def download_file(self, url, filename=None):
+    def _filename_from_response(self, url, response):
+        """Tentukan nama file dari Content-Disposition, URL, atau Content-Type."""
+        filename = None
+        
+        # Coba dapatkan dari Content-Disposition header
+        content_disp = response.headers.get('Content-Disposition')
+        if content_disp and 'filename=' in content_disp:
+            filename = re.findall('filename="?([^"]+)"?', content_disp)
+            filename = filename[0] if filename else None
+        
+        # Jika tidak ada, ambil dari URL
+        if not filename:
+            parsed_url = urlparse(url)
+            filename = unquote(os.path.basename(parsed_url.path))
+        
+        # Jika masih kosong atau tanpa ekstensi, beri nama default
+        if not filename or '.' not in filename:
+            content_type = response.headers.get('Content-Type', '').lower()
+            if 'epub' in content_type:
+                filename = 'ebook_downloaded.epub'
+            else:
+                filename = 'ebook_downloaded.pdf'
+        
+        return filename
+    
+    def _reserve_path(self, filename):
         """
-        Download file dari URL.
+        Pesan path unik di folder download (untuk download paralel).
+        
+        Jika nama sudah dipakai (di disk, oleh file .part, atau oleh download
+        lain yang sedang berjalan), tambahkan akhiran " (1)", " (2)", dst.
+        """
+        base = Path(filename)
+        with self._reserved_lock:
+            candidate = self.download_folder / filename
+            n = 1
+            while (candidate in self._reserved or candidate.exists()
+                   or PartialDownload(candidate, None).part_path.exists()):
+                candidate = self.download_folder / f"{base.stem} ({n}){base.suffix}"
+                n += 1
+            self._reserved.add(candidate)
+            return candidate
+    
+    def release_path(self, filepath):
+        """Lepaskan path yang dipesan lewat _reserve_path."""
+        with self._reserved_lock:
+            self._reserved.discard(filepath)
+    
+    def target_path(self, url, response, filename=None, unique=False):
+        """
+        Tentukan path tujuan untuk response (nama dari argumen atau header).
+        
+        Jika unique, path dipesan dan harus dilepas dengan release_path().
+        """
+        name = self.sanitize_filename(filename or self._filename_from_response(url, response))
+        if unique:
+            return self._reserve_path(name)
+        return self.download_folder / name
+    
+    def cached_entry(self, url):
+        """Entri cache untuk URL (None jika cache tidak aktif, tidak ada, atau tidak bisa dibaca)."""
+        if not self.cache:
+            return None
+        try:
+            return self.cache.lookup(url)
+        except sqlite3.Error:
+            # Database cache terkunci/rusak: download biasa tanpa revalidasi
+            return None
+    
+    def conditional_headers(self, partial, cached):
+        """Header Range (melanjutkan .part) atau If-None-Match (revalidasi cache)."""
+        if partial:
+            return partial.range_headers()
+        if cached:
+            return self.cache.conditional_headers(cached)
+        return {}
+    
+    def restore_cached(self, url, cached, filename=None, unique=False):
+        """Ambil file dari cache setelah server membalas 304 Not Modified."""
+        name = self.sanitize_filename(filename or cached['filename'])
+        filepath = self._reserve_path(name) if unique else self.download_folder / name
+        try:
+            self.cache.materialize(cached, filepath)
+        finally:
+            if unique:
+                self.release_path(filepath)
+        return filepath, cached['size']
+    
+    def remember(self, url, filepath, etag=None, last_modified=None):
+        """Simpan hasil download ke cache (kegagalan cache tidak menggagalkan download)."""
+        if self.cache:
+            try:
+                self.cache.store(url, filepath, etag, last_modified)
+            except (OSError, sqlite3.Error):
+                # Mis. "database is locked" saat GUI dan batch CLI memakai cache yang sama
+                pass
+    
+    def rename_from_metadata(self, filepath):
+        """
+        Ganti nama PDF menjadi "Penulis - Judul.pdf" dari metadatanya.
+        
+        File tanpa judul di metadata, bukan PDF, atau yang strukturnya tidak
+        bisa dibaca dibiarkan dengan nama lamanya.
+        
+        Returns:
+            Path file setelah (atau tanpa) rename
+        """
+        filepath = Path(filepath)
+        if not is_pdf(filepath):
+            return filepath
+        try:
+            name = metadata_filename(read_pdf_metadata(filepath))
+        except (OSError, ValueError):
+            return filepath
+        if not name or self.sanitize_filename(name) == filepath.name:
+            return filepath
+        target = self._reserve_path(self.sanitize_filename(name))
+        try:
+            os.replace(filepath, target)
+        except OSError:
+            return filepath
+        finally:
+            self.release_path(target)
+        return target
+    
+    def finalize_download(self, url, filepath, etag=None, last_modified=None):
+        """Tahap setelah download selesai: rename dari metadata (opsional) lalu simpan ke cache."""
+        if self.rename_pdfs:
+            filepath = self.rename_from_metadata(filepath)
+        self.remember(url, filepath, etag, last_modified)
+        return filepath
+    
+    def complete_partial(self, url, partial, reject_html=True):
+        """
+        Selesaikan .part yang ternyata sudah lengkap (lihat PartialDownload.complete_by):
+        periksa isinya seperti download biasa lalu finalize_download.
+        
+        Raises:
+            ContentTypeError / CorruptFileError jika isi .part tidak valid
+        """
+        if reject_html:
+            ContentSniffer.from_part(partial.part_path, partial.offset).finish()
+        return self.finalize_download(url, partial.finish(), partial.etag, partial.last_modified)
+    
+    def find_partial(self, url, filename=None):
+        """Cari download yang terputus untuk URL ini di folder download."""
+        if filename:
+            partial = PartialDownload(self.download_folder / self.sanitize_filename(filename), url)
+            return partial if partial.load() else None
+        return PartialDownload.find(self.download_folder, url)
+    
+    def store_preflight(self, url, final_url, status, headers, elapsed):
+        """Catat hasil HEAD untuk url (dipakai oleh preflight() dan AsyncEngine)."""
+        headers = requests.structures.CaseInsensitiveDict(headers)
+        content_type = headers.get('Content-Type', '').lower()
+        result = Preflight(
+            url=url,
+            final_url=final_url,
+            status=status,
+            size=int(headers.get('Content-Length') or 0) if status < 400 else 0,
+            content_type=content_type,
+            accept_ranges=headers.get('Accept-Ranges', '').lower() == 'bytes',
+            filename=self.sanitize_filename(self._filename_from_response(url, SimpleNamespace(headers=headers))),
+            elapsed=elapsed,
+            headers=headers,
+        )
+        with self._preflights_lock:
+            self._preflights[url] = result
+        return result
+    
+    def preflight(self, url, timeout=10):
+        """
+        Siapkan download sebelum dimulai: resolve DNS, buka koneksi di pool,
+        ikuti redirect dengan HEAD, lalu catat ukuran, tipe dan dukungan Range.
+        
+        Download URL yang sama dalam PREFLIGHT_TTL detik langsung meminta URL
+        akhir lewat koneksi yang sudah terbuka (tanpa redirect dan handshake).
+        
+        Returns:
+            Preflight (status >= 400 berarti server menolak HEAD; download
+            tetap bisa dicoba dengan GET)
+        
+        Raises:
+            requests.exceptions.RequestException jika server tidak bisa dihubungi
+        """
+        start = time.perf_counter()
+        self.breaker.check(url)
+        self.limiter.throttle_request(url)
+        with self.pool.head(url, allow_redirects=True, timeout=timeout) as response:
+            return self.store_preflight(url, response.url, response.status_code, response.headers,
+                                        time.perf_counter() - start)
+    
+    def preflight_for(self, url):
+        """Preflight berhasil yang masih segar untuk url, atau None."""
+        with self._preflights_lock:
+            result = self._preflights.get(url)
+        if result is not None and result.ok and result.fresh(self.PREFLIGHT_TTL):
+            return result
+        return None
+    
+    def resolved_url(self, url):
+        """URL akhir setelah redirect menurut preflight (atau url itu sendiri)."""
+        result = self.preflight_for(url)
+        return result.final_url if result else url
+    
+    def retry_delay(self, url, status, headers, attempt, retries):
+        """
+        Catat status response di circuit breaker dan tentukan apakah request diulang.
+        
+        Returns:
+            Detik tunggu sebelum percobaan berikutnya, atau None jika response
+            dipakai apa adanya (berhasil, tidak bisa diulang, atau percobaan habis)
+        """
+        if status >= 500:
+            self.breaker.record_failure(url)
+        else:
+            self.breaker.record_success(url)
+        if attempt >= retries or not self.retry.should_retry(status):
+            return None
+        return self.retry.delay(attempt, headers.get('Retry-After'))
+    
+    def fetch(self, url, filename=None, on_progress=None, unique=False,
+              on_start=None, reject_html=True, retries=None, timeout=30, segments=None, cancel=None):
+        """
+        Unduh URL ke folder download tanpa mencetak apa pun.
+        
+        Data ditulis ke file .part dulu. Jika koneksi putus, download
+        dilanjutkan dengan header Range/If-Range (bila server mendukung),
+        baik pada percobaan ulang maupun saat program dijalankan lagi.
+        Error koneksi, 429 dan 5xx diulang dengan backoff (lihat
+        retry_policy); host yang terus gagal langsung ditolak oleh circuit
+        breaker.
         
         Args:
             url: URL file yang akan didownload
-            filename: Nama file (opsional, akan diambil dari URL jika tidak disediakan)
+            filename: Nama file (opsional)
+            on_progress: Callback (downloaded, total_size) setiap chunk
+            unique: Jangan timpa file yang sudah ada
+            on_start: Callback (filepath, total_size, offset, content_type) sebelum data ditulis
+            reject_html: Tolak halaman HTML (dari header Content-Type atau
+                dari isi chunk pertama) dengan ContentTypeError
+            retries: Jumlah percobaan ulang (default: self.retry.retries)
+            timeout: Timeout koneksi/baca dalam detik
+            segments: Jumlah koneksi paralel (default: self.segments); dipakai
+                hanya jika server mendukung Range dan file cukup besar
+            cancel: threading.Event; jika di-set, download dihentikan sebelum
+                percobaan berikutnya atau chunk berikutnya (.part disimpan)
         
         Returns:
-            Path file yang telah didownload, atau None jika gagal
+            Tuple (path file, jumlah byte)
+        
+        Raises:
+            requests.exceptions.RequestException jika download gagal
+            ContentTypeError jika reject_html dan server mengirim HTML
+            CorruptFileError jika PDF yang diterima tidak utuh
+            DownloadCancelled jika cancel di-set sebelum download selesai
         """
+        partial = self.find_partial(url, filename)
+        cached = self.cached_entry(url) if partial is None else None
+        reserved = None
+        retries = self.retry.retries if retries is None else retries
+        
+        segments = segments or self.segments
+        if segments > 1 and partial is None and cached is None:
+            result = self._fetch_segmented(url, filename, segments, on_progress, unique,
+                                           on_start, reject_html, retries, timeout, cancel)
+            if result is not None:
+                return result
+        
         try:
-            print(f"\n📥 Mencoba mengunduh dari: {url}")
+            attempt = 0
+            while attempt <= retries:
+                _check_cancelled(cancel, url)
+                # Host yang benar-benar dihubungi (URL akhir dari preflight) yang
+                # dibatasi rate limiter dan circuit breaker, bukan host URL asal
+                target = self.resolved_url(url)
+                try:
+                    headers = self.conditional_headers(partial, cached)
+                    
+                    # Kirim request lewat session bersama (koneksi keep-alive)
+                    self.breaker.check(target)
+                    self.limiter.throttle_request(target)
+                    with self.pool.get(target, stream=True, timeout=timeout, headers=headers) as response:
+                        delay = self.retry_delay(target, response.status_code, response.headers, attempt, retries)
+                        if delay is not None:
+                            # Jangan tahan koneksi selama menunggu Retry-After
+                            discard_response(response)
+                            time.sleep(delay)
+                            attempt += 1
+                            continue
+                        if response.status_code == 304 and cached and partial is None:
+                            # Tidak berubah sejak download terakhir: ambil dari cache
+                            filepath, size = self.restore_cached(url, cached, filename, unique)
+                            if on_progress:
+                                on_progress(size, size)
+                            return filepath, size
+                        if response.status_code == 416 and partial and partial.offset:
+                            discard_response(response)
+                            if partial.complete_by(response.status_code, response.headers):
+                                downloaded = partial.offset
+                                filepath = self.complete_partial(url, partial, reject_html)
+                                if on_progress:
+                                    on_progress(downloaded, downloaded)
+                                return filepath, downloaded
+                            # Range tidak valid lagi, mulai dari awal. Bukan kegagalan
+                            # jaringan, jadi tidak mengurangi jatah percobaan ulang
+                            partial.discard()
+                            continue
+                        response.raise_for_status()
+                        
+                        content_type = response.headers.get('Content-Type', '').lower()
+                        if reject_html and 'text/html' in content_type:
+                            raise ContentTypeError(content_type)
+                        
+                        if partial is None:
+                            filepath = self.target_path(url, response, filename, unique)
+                            if unique:
+                                reserved = filepath
+                            partial = PartialDownload(filepath, url)
+                        
+                        offset = partial.begin(response.status_code, response.headers)
+                        downloaded = offset
+                        total_size = partial.total
+                        sniffer = ContentSniffer.from_part(partial.part_path, offset) if offset else ContentSniffer()
+                        if on_start:
+                            on_start(partial.filepath, total_size, offset, content_type)
+                        
+                        with partial.open(offset) as f:
+                            for chunk in BodyReader(response, self.chunk_size,
+                                                    lambda: self.limiter.chunk_limit(target)):
+                                _check_cancelled(cancel, url)
+                                if reject_html:
+                                    sniffer.feed(chunk)
+                                f.write(chunk)
+                                downloaded += len(chunk)
+                                partial.advance(f, downloaded)
+                                if on_progress:
+                                    on_progress(downloaded, total_size)
+                                self.limiter.throttle_bytes(target, len(chunk))
+                            f.truncate()
+                        if reject_html:
+                            sniffer.finish()
+                    
+                    _check_cancelled(cancel, url)
+                    filepath = self.finalize_download(url, partial.finish(), partial.etag,
+                                                      partial.last_modified)
+                    return filepath, downloaded
+                
+                except (ContentTypeError, CorruptFileError):
+                    # Isi tidak valid: jangan simpan untuk dilanjutkan
+                    if partial:
+                        partial.discard()
+                    raise
+                except DownloadCancelled:
+                    if partial:
+                        partial.save()
+                    raise
+                except CircuitOpenError:
+                    raise
+                except (requests.exceptions.ConnectionError,
+                        requests.exceptions.ChunkedEncodingError,
+                        requests.exceptions.Timeout):
+                    self.breaker.record_failure(target)
+                    if partial:
+                        partial.save()
+                    if attempt >= retries:
+                        raise
+                    time.sleep(self.retry.backoff(attempt))
+                    attempt += 1
             
-            # Kirim request
-            response = requests.get(url, headers=self.headers, stream=True, timeout=30)
-            response.raise_for_status()
+            raise requests.exceptions.RetryError(f"Range tidak dapat dipenuhi: {url}")
+        finally:
+            if reserved is not None:
+                self.release_path(reserved)
+    
+    def _fetch_segmented(self, url, filename, segments, on_progress, unique,
+                         on_start, reject_html, retries, timeout, cancel=None):
+        """
+        Unduh file besar dalam beberapa rentang byte secara paralel.
+        
+        Returns:
+            Tuple (path file, jumlah byte), atau None jika server tidak
+            mendukung Range / file terlalu kecil (pakai satu stream saja)
+        """
+        # HEAD dari preflight yang masih segar tidak perlu diulang
+        probe = self.preflight_for(url)
+        if probe is None:
+            if self.breaker.is_open(url):
+                return None
+            try:
+                probe = self.preflight(url, timeout)
+            except requests.exceptions.RequestException:
+                return None
+            if not probe.ok:
+                return None
+        
+        total_size = probe.size
+        content_type = probe.content_type
+        validator = probe.headers.get('ETag') or probe.headers.get('Last-Modified')
+        if (not probe.accept_ranges
+                or total_size < 2 * self.MIN_SEGMENT_SIZE
+                or (validator or '').startswith('W/')):
+            return None
+        if reject_html and probe.is_html:
+            raise ContentTypeError(content_type)
+        
+        filepath = self.target_path(url, probe, filename, unique)
+        # Sidecar sengaja tidak ditulis: file .part berukuran penuh sejak awal
+        # sehingga tidak bisa dilanjutkan sebagai satu stream
+        partial = PartialDownload(filepath, url)
+        
+        segments = min(segments, total_size // self.MIN_SEGMENT_SIZE)
+        size = total_size // segments
+        ranges = [(i * size, total_size - 1 if i == segments - 1 else (i + 1) * size - 1)
+                  for i in range(segments)]
+        
+        if on_start:
+            on_start(filepath, total_size, 0, content_type)
+        
+        progress_lock = threading.Lock()
+        state = {'downloaded': 0}
+        failed = threading.Event()
+        # Posisi akhir setiap segmen (byte berikutnya yang akan ditulis)
+        finished = {}
+        
+        def fetch_range(start, end):
+            try:
+                finished[start, end] = download_range(start, end)
+            except BaseException:
+                # Hentikan segmen lain secepatnya
+                failed.set()
+                raise
+        
+        def download_range(start, end):
+            position = start
+            for attempt in range(retries + 1):
+                _check_cancelled(cancel, url)
+                headers = {'Range': f'bytes={position}-{end}'}
+                if validator:
+                    headers['If-Range'] = validator
+                try:
+                    self.breaker.check(probe.final_url)
+                    self.limiter.throttle_request(probe.final_url)
+                    with self.pool.get(probe.final_url, stream=True, timeout=timeout, headers=headers) as response:
+                        delay = self.retry_delay(probe.final_url, response.status_code, response.headers,
+                                                 attempt, retries)
+                        if delay is not None:
+                            discard_response(response)
+                            time.sleep(delay)
+                            continue
+                        response.raise_for_status()
+                        if (response.status_code != 206 or not response.headers.get(
+                                'Content-Range', '').startswith(f'bytes {position}-{end}/')):
+                            raise SegmentError(f"Server tidak mengirim rentang {position}-{end}")
+                        sniffer = ContentSniffer() if reject_html and position == 0 else None
+                        with open(partial.part_path, 'r+b') as f:
+                            f.seek(position)
+                            for chunk in BodyReader(response, self.chunk_size,
+                                                    lambda: self.limiter.chunk_limit(probe.final_url)):
+                                if failed.is_set():
+                                    raise SegmentError("Dibatalkan karena segmen lain gagal")
+                                _check_cancelled(cancel, url)
+                                if sniffer is not None and sniffer.kind is None:
+                                    sniffer.feed(chunk)
+                                written = f.write(chunk[:end + 1 - position])
+                                position += written
+                                with progress_lock:
+                                    state['downloaded'] += written
+                                    if on_progress:
+                                        on_progress(state['downloaded'], total_size)
+                                self.limiter.throttle_bytes(probe.final_url, written)
+                    if position != end + 1:
+                        raise SegmentError(f"Segmen {start}-{end} tidak lengkap")
+                    return position
+                except CircuitOpenError:
+                    raise
+                except (requests.exceptions.ConnectionError,
+                        requests.exceptions.ChunkedEncodingError,
+                        requests.exceptions.Timeout):
+                    self.breaker.record_failure(probe.final_url)
+                    if attempt >= retries:
+                        raise
+                    time.sleep(self.retry.backoff(attempt))
+        
+        try:
+            with open(partial.part_path, 'wb') as f:
+                preallocate(f, total_size)
+            with ThreadPoolExecutor(max_workers=segments) as executor:
+                for future in [executor.submit(fetch_range, start, end) for start, end in ranges]:
+                    future.result()
             
-            # Tentukan nama file
-            if not filename:
-                # Coba dapatkan dari Content-Disposition header
-                content_disp = response.headers.get('Content-Disposition')
-                if content_disp and 'filename=' in content_disp:
-                    filename = re.findall('filename="?([^"]+)"?', content_disp)
-                    filename = filename[0] if filename else None
+            # Verifikasi hasil gabungan sebelum dipindahkan ke nama akhir: setiap
+            # segmen berakhir tepat di ujung rentangnya, jumlah byte yang diterima
+            # dan ukuran file di disk sama dengan Content-Length dari probe
+            incomplete = [f"{start}-{end}" for start, end in ranges if finished.get((start, end)) != end + 1]
+            if incomplete:
+                raise SegmentError(f"Segmen tidak lengkap: {', '.join(incomplete)}")
+            if state['downloaded'] != total_size:
+                raise SegmentError(f"Byte diterima {state['downloaded']} != {total_size}")
+            with open(partial.part_path, 'rb') as f:
+                size_on_disk = os.fstat(f.fileno()).st_size
+            if size_on_disk != total_size:
+                raise SegmentError(f"Ukuran file {size_on_disk} != {total_size}")
+            partial.written = total_size
+            # PDF harus diakhiri %%EOF (CorruptFileError), sama seperti download satu stream
+            ContentSniffer.from_part(partial.part_path, total_size).finish()
+            _check_cancelled(cancel, url)
+            partial.finish()
+            return self.finalize_download(url, filepath, probe.headers.get('ETag'),
+                                          probe.headers.get('Last-Modified')), total_size
+        except BaseException:
+            partial.discard()
+            raise
+        finally:
+            if unique:
+                self.release_path(filepath)
+    
+    def _mirror_downloader(self, folder):
+        """Downloader untuk satu kandidat mirror: folder sendiri, pool dan batas yang sama."""
+        return EbookDownloader(folder, pool=self.pool, segments=self.segments, cache=self.cache,
+                               chunk_size=self.chunk_size, limiter=self.limiter, retry=self.retry,
+                               breaker=self.breaker, rename_pdfs=self.rename_pdfs)
+    
+    def fetch_first(self, urls, filename=None, on_progress=None, unique=False, reject_html=True,
+                    hedge_ttfb=None, hedge_min_rate=None, max_racers=None):
+        """
+        Unduh satu dokumen yang tersedia di beberapa mirror (hedged request).
+        
+        Kandidat diurutkan dulu menurut kesehatan host (repo_health; host
+        yang belum pernah diukur tetap di urutan asal), lalu kandidat
+        pertama dimulai lebih dulu. Jika time to first byte atau
+        throughput semua kandidat yang berjalan di bawah target, kandidat
+        berikutnya ikut dimulai (paling banyak max_racers bersamaan);
+        kandidat yang gagal langsung digantikan. Kandidat pertama yang
+        selesai menang, sisanya dihentikan dan file sementaranya dihapus.
+        
+        Setiap kandidat mengunduh ke folder .mirror-<hash URL>, jadi .part
+        kandidat yang gagal dilanjutkan saat dokumen yang sama dicoba lagi.
+        
+        Args:
+            urls: List URL kandidat, urut dari yang paling diharapkan
+            filename: Nama file (opsional)
+            on_progress: Callback (downloaded, total_size) dari kandidat terdepan
+            unique: Jangan timpa file yang sudah ada
+            reject_html: Tolak halaman HTML (lihat fetch)
+            hedge_ttfb: Target time to first byte (default HEDGE_TTFB)
+            hedge_min_rate: Target throughput byte/detik (default HEDGE_MIN_RATE)
+            max_racers: Jumlah kandidat yang berjalan bersamaan (default MAX_RACERS)
+        
+        Returns:
+            Tuple (path file, jumlah byte, URL pemenang)
+        
+        Raises:
+            Exception dari kandidat pertama jika semua kandidat gagal
+        """
+        urls = get_health_store().rank(list(dict.fromkeys(urls)))
+        hedge_ttfb = self.HEDGE_TTFB if hedge_ttfb is None else hedge_ttfb
+        hedge_min_rate = self.HEDGE_MIN_RATE if hedge_min_rate is None else hedge_min_rate
+        max_racers = max_racers or self.MAX_RACERS
+        if len(urls) == 1:
+            filepath, size = self.fetch(urls[0], filename, on_progress, unique, reject_html=reject_html)
+            return filepath, size, urls[0]
+        
+        racers = []
+        # Kandidat gagal yang sudah digantikan kandidat berikutnya
+        replaced = set()
+        executor = ThreadPoolExecutor(max_workers=len(urls), thread_name_prefix="mirror")
+        progress_lock = threading.Lock()
+        
+        def run(racer):
+            try:
+                result = self._mirror_downloader(racer.folder).fetch(
+                    racer.url, filename, lambda d, t: report(racer, d, t), reject_html=reject_html,
+                    cancel=racer.cancelled)
+                _check_cancelled(racer.cancelled, racer.url)
+                return result
+            except DownloadCancelled:
+                racer.cleanup()
+                raise
+            except BaseException:
+                # .part disimpan untuk dilanjutkan percobaan berikutnya
+                racer.cleanup(keep_partial=True)
+                raise
+        
+        def report(racer, downloaded, total):
+            racer.progress(downloaded, total)
+            if on_progress:
+                with progress_lock:
+                    if downloaded >= max(r.downloaded for r in racers):
+                        on_progress(downloaded, total)
+        
+        def launch():
+            racer = MirrorRacer.for_url(urls[len(racers)], self.download_folder)
+            racers.append(racer)
+            racer.future = executor.submit(run, racer)
+        
+        try:
+            launch()
+            while True:
+                running = [r for r in racers if not r.future.done()]
+                wait([r.future for r in running], timeout=0.1, return_when=FIRST_COMPLETED)
+                for racer in racers:
+                    if racer.future.done() and racer.future.exception() is None:
+                        winner = racer
+                        break
+                else:
+                    winner = None
+                if winner is not None:
+                    break
                 
-                # Jika tidak ada, ambil dari URL
-                if not filename:
-                    parsed_url = urlparse(url)
-                    filename = unquote(os.path.basename(parsed_url.path))
+                # Kandidat yang gagal langsung digantikan, tanpa menunggu yang lain tertinggal
+                for racer in racers[:]:
+                    if racer.future.done() and racer not in replaced:
+                        replaced.add(racer)
+                        if len(racers) < len(urls):
+                            launch()
                 
-                # Jika masih kosong, beri nama default
-                if not filename or filename == '':
-                    filename = 'ebook_downloaded.pdf'
-            
-            filename = self.sanitize_filename(filename)
-            filepath = self.download_folder / filename
-            
-            # Download dengan progress
-            total_size = int(response.headers.get('content-length', 0))
-            downloaded = 0
-            
-            with open(filepath, 'wb') as f:
-                for chunk in response.iter_content(chunk_size=8192):
-                    if chunk:
-                        f.write(chunk)
-                        downloaded += len(chunk)
-                        if total_size > 0:
-                            progress = (downloaded / total_size) * 100
-                            print(f"\r   Progress: {progress:.1f}%", end='', flush=True)
-            
+                running = [r for r in racers if not r.future.done()]
+                now = time.monotonic()
+                if len(racers) < len(urls) and (
+                        not running
+                        or (len(running) < max_racers
+                            and all(r.lagging(now, hedge_ttfb, hedge_min_rate) for r in running))):
+                    launch()
+                elif not running:
+                    # Semua kandidat gagal: laporkan error kandidat pertama
+                    raise racers[0].future.exception()
+        finally:
+            for racer in racers:
+                racer.cancelled.set()
+            executor.shutdown(wait=False)
+        
+        # Pindahkan file pemenang ke folder download
+        try:
+            path, size = winner.future.result()
+            target = self._reserve_path(path.name) if unique else self.download_folder / path.name
+            try:
+                os.replace(path, target)
+            finally:
+                if unique:
+                    self.release_path(target)
+        finally:
+            for racer in racers:
+                if racer.future.done():
+                    racer.cleanup()
+        return target, size, winner.url
+    
+    def download_file(self, url, filename=None):
+        """
+        Download file dari URL.
+        
+        Args:
+            url: URL file yang akan didownload, atau list URL mirror untuk
+                dokumen yang sama (lihat fetch_first)
+            filename: Nama file (opsional, akan diambil dari URL jika tidak disediakan)
+        
+        Returns:
+            Path file yang telah didownload, atau None jika gagal
+        """
+        def print_progress(downloaded, total_size):
+            if total_size > 0:
+                progress = (downloaded / total_size) * 100
+                print(f"\r   Progress: {progress:.1f}%", end='', flush=True)
+        
+        urls = [url] if isinstance(url, str) else list(url)
+        try:
+            if len(urls) > 1:
+                print(f"\n📥 Mencoba mengunduh dari {len(urls)} mirror: {urls[0]}, ...")
+            else:
+                print(f"\n📥 Mencoba mengunduh dari: {urls[0]}")
+            filepath, _, winner = self.fetch_first(urls, filename, on_progress=print_progress)
+            if len(urls) > 1:
+                print(f"\n🏁 Mirror tercepat: {winner}")
             print(f"\n✅ Berhasil mengunduh: {filepath}")
             return filepath
-            
-        except requests.exceptions.RequestException as e:
+        
+        except (requests.exceptions.RequestException, ContentTypeError, CorruptFileError) as e:
             print(f"❌ Gagal mengunduh: {e}")
             return None
     
     def download_from_direct_url(self, url):
         """Download dari URL langsung (jika tersedia)."""
         return self.download_file(url)
+    
+    def _download_one(self, url, filename=None, on_progress=None):
+        """
+        Download satu URL untuk batch dan bungkus hasilnya dalam DownloadResult.
+        
+        Beberapa URL dipisah spasi dianggap mirror dari dokumen yang sama
+        (lihat fetch_first); DownloadResult.url berisi mirror pemenang.
+        """
+        start = time.perf_counter()
+        urls = url.split()
+        try:
+            filepath, size, url = self.fetch_first(urls, filename, on_progress, unique=True)
+            return DownloadResult(url, filepath, size, time.perf_counter() - start)
+        except (requests.exceptions.RequestException, ContentTypeError, CorruptFileError, OSError) as e:
+            return DownloadResult(url, None, 0, time.perf_counter() - start, str(e))
+    
+    def download_many(self, urls, concurrency=8, per_host=4, on_result=None):
+        """
+        Download banyak URL secara paralel.
+        
+        Args:
+            urls: Daftar URL
+            concurrency: Jumlah download paralel maksimum (global)
+            per_host: Jumlah download paralel maksimum per host
+            on_result: Callback DownloadResult setiap kali satu URL selesai
+        
+        Returns:
+            List DownloadResult dengan urutan sama seperti urls
+        """
+        urls = list(urls)
+        return map_per_host(self._download_one, urls, urls, concurrency, per_host, on_result)
+
+
+def host_of(url):
+    """Host yang dipakai untuk batas per host (mirror: URL pertama)."""
+    return urlparse((url.split() or [url])[0]).netloc.lower()
+
+
+def map_per_host(work, items, urls, concurrency=8, per_host=4, on_result=None):
+    """
+    Jalankan work(item) untuk setiap item secara paralel dengan batas global
+    dan batas per host.
+    
+    Item hanya diberikan ke worker jika host-nya masih punya slot, sehingga
+    worker tidak pernah menganggur menunggu host yang penuh sementara URL
+    dari host lain masih antre. Batas per_host berlaku untuk panggilan ini
+    saja (tidak ada semaphore per host yang tersimpan antar batch).
+    
+    Args:
+        work: Fungsi yang dipanggil di worker untuk setiap item
+        items: List item
+        urls: URL setiap item (urutan sama dengan items), untuk menentukan host
+        concurrency: Jumlah worker maksimum (global)
+        per_host: Jumlah item berjalan maksimum per host
+        on_result: Callback hasil work setiap kali satu item selesai
+    
+    Returns:
+        List hasil dengan urutan sama seperti items
+    """
+    concurrency = max(1, concurrency)
+    per_host = max(1, per_host)
+    results = [None] * len(items)
+    waiting = {}
+    for i, url in enumerate(urls):
+        waiting.setdefault(host_of(url), []).append(i)
+    for queue in waiting.values():
+        queue.reverse()  # pop() dari belakang = urutan asli
+    active = dict.fromkeys(waiting, 0)
+    running = {}
+    
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        def dispatch():
+            while len(running) < concurrency:
+                # Item paling awal dari host yang masih punya slot
+                ready = [host for host, queue in waiting.items() if queue and active[host] < per_host]
+                if not ready:
+                    return
+                host = min(ready, key=lambda h: waiting[h][-1])
+                i = waiting[host].pop()
+                active[host] += 1
+                running[executor.submit(work, items[i])] = (i, host)
+        
+        dispatch()
+        while running:
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                i, host = running.pop(future)
+                active[host] -= 1
+                results[i] = future.result()
+                if on_result:
+                    on_result(results[i])
+            dispatch()
+    
+    return results
+
+
+def run_jobs(jobs, queue, concurrency=8, per_host=4, as_json=False, segments=1, engine="thread",
+             cache=None, rename=False):
+    """
+    Kerjakan job dari antrian download; status, progress dan hasil setiap
+    job dicatat di antrian sehingga pekerjaan bisa dilanjutkan setelah crash.
+    
+    Args:
+        jobs: List job_queue.Job
+        queue: job_queue.JobQueue tempat status job dicatat
+        engine: "async" (satu event loop, lihat async_engine) atau "thread"
+            (satu thread per download yang berjalan). Engine async hanya
+            dipakai jika semua job punya folder tujuan yang sama.
+        rename: Ganti nama PDF dari metadatanya ("Penulis - Judul.pdf")
+    
+    Returns:
+        List DownloadResult dengan urutan sama seperti jobs
+    """
+    downloaders = {}
+    for job in jobs:
+        if job.folder not in downloaders:
+            downloaders[job.folder] = EbookDownloader(download_folder=job.folder, segments=segments,
+                                                      cache=cache, rename_pdfs=rename)
+    
+    def progress_for(job):
+        return lambda downloaded, total: queue.progress(job.id, downloaded, total)
+    
+    def record(job, result):
+        if result.ok:
+            queue.finish(job.id, result.path, result.bytes)
+        else:
+            queue.fail(job.id, result.error)
+        print_result(result, as_json)
+        return result
+    
+    def busy(job):
+        # Job sedang dikerjakan proses lain (GUI/CLI lain): jangan ada dua penulis di .part yang sama
+        result = DownloadResult(job.url, None, 0, 0.0, "Sedang diunduh oleh proses lain")
+        print_result(result, as_json)
+        return result
+    
+    if engine == "async" and len(downloaders) == 1:
+        from async_engine import AsyncEngine
+        async_engine = AsyncEngine(downloaders[jobs[0].folder], max_downloads=concurrency,
+                                   per_host=per_host).start()
+        try:
+            futures = []
+            for job in jobs:
+                if not queue.start(job.id):
+                    futures.append(None)
+                    continue
+                future = async_engine.submit_download(job.url, job.filename, progress_for(job))
+                future.add_done_callback(lambda f, job=job: record(job, f.result()))
+                futures.append(future)
+            return [future.result() if future else busy(job) for job, future in zip(jobs, futures)]
+        finally:
+            async_engine.stop()
+    
+    def work(job):
+        downloader = downloaders[job.folder]
+        if not queue.start(job.id):
+            return busy(job)
+        return record(job, downloader._download_one(job.url, job.filename, progress_for(job)))
+    
+    return map_per_host(work, jobs, [job.url for job in jobs], concurrency, per_host)
+
+
+def open_job_queue(path=None):
+    """Buka antrian job dan pulihkan job yang terputus oleh sesi sebelumnya."""
+    from job_queue import JobQueue, DEFAULT_JOBS_DB
+    queue = JobQueue(path or DEFAULT_JOBS_DB)
+    recovered = queue.recover()
+    if recovered:
+        print(f"ℹ️  {recovered} job terputus dari sesi sebelumnya dikembalikan ke antrian", file=sys.stderr)
+    return queue
+
+
+def run_batch(url_file, output="downloads", concurrency=8, per_host=4, as_json=False, segments=1,
+              engine="async", cache=None, jobs_db=None, rename=False):
+    """
+    Download semua URL di file daftar secara paralel.
+    
+    Setiap file daftar adalah satu batch di antrian job. Menjalankan ulang
+    batch yang sama (mis. setelah crash atau Ctrl+C) hanya mengerjakan URL
+    yang belum berhasil; download yang terputus dilanjutkan dari file .part.
+    
+    Args:
+        engine: "async" (satu event loop, lihat async_engine) atau "thread"
+            (satu thread per download yang berjalan)
+        jobs_db: File antrian job (default: ~/.ebook_downloader/jobs.sqlite3)
+    
+    Returns:
+        Exit code: 0 jika semua berhasil, 1 jika ada yang gagal
+    """
+    urls = read_url_list(url_file)
+    queue = open_job_queue(jobs_db)
+    try:
+        batch = f"batch:{Path(url_file).resolve()}"
+        queue.add_many(urls, output, batch)
+        queue.requeue_missing(batch)
+        jobs = queue.unfinished(batch, include_failed=True)
+        skipped = len(set(urls)) - len(jobs)
+        if skipped and not as_json:
+            print(f"ℹ️  {skipped} URL sudah selesai di sesi sebelumnya, dilewati")
+        results = run_jobs(jobs, queue, concurrency, per_host, as_json, segments, engine, cache,
+                           rename) if jobs else []
+    finally:
+        queue.close()
+    failed = sum(1 for r in results if not r.ok)
+    if not as_json:
+        print(f"\n{len(results) - failed}/{len(results)} berhasil")
+    return 1 if failed else 0
+
+
+def print_result(result, as_json=False):
+    """Cetak satu DownloadResult sebagai baris teks atau JSON."""
+    if as_json:
+        print(json.dumps(result.to_dict()), flush=True)
+    elif result.ok:
+        print(f"OK    {result.bytes:>12} B  {result.duration:6.2f}s  {result.url} -> {result.path}", flush=True)
+    else:
+        print(f"GAGAL {result.url}: {result.error}", file=sys.stderr, flush=True)
+
+
+def run_get(urls, output="downloads", filename=None, concurrency=8, per_host=4, as_json=False,
+            segments=1, cache=None, jobs_db=None, rename=False):
+    """
+    Download satu atau beberapa URL dari argumen command line.
+    
+    URL dicatat di antrian job, jadi download yang terputus bisa dilanjutkan
+    dengan subcommand "jobs --resume".
+    
+    Returns:
+        Exit code: 0 jika semua berhasil, 1 jika ada yang gagal
+    """
+    queue = open_job_queue(jobs_db)
+    try:
+        ids = queue.add_many(urls, output, filename=filename)
+        jobs = [queue.get(job_id) for job_id in ids]
+        results = run_jobs(jobs, queue, concurrency, per_host, as_json, segments, "thread", cache, rename)
+    finally:
+        queue.close()
+    return 1 if any(not r.ok for r in results) else 0
+
+
+def run_jobs_command(resume=False, include_failed=False, concurrency=8, per_host=4, as_json=False,
+                     segments=1, cache=None, jobs_db=None, rename=False):
+    """
+    Tampilkan isi antrian job, atau lanjutkan job yang belum selesai.
+    
+    Returns:
+        Exit code: 0 jika semua berhasil, 1 jika ada yang gagal
+    """
+    queue = open_job_queue(jobs_db)
+    try:
+        jobs = queue.unfinished(include_failed=include_failed or not resume, any_batch=True)
+        if not resume:
+            counts = queue.counts(any_batch=True)
+            for job in jobs:
+                if as_json:
+                    print(json.dumps(asdict(job)), flush=True)
+                else:
+                    progress = f"{job.bytes_done}/{job.total or '?'} B"
+                    print(f"#{job.id:<5} {job.state:<7} {progress:>20}  {job.url}"
+                          + (f"\n       {job.error}" if job.error else ""))
+            if not as_json:
+                summary = ", ".join(f"{state}: {n}" for state, n in sorted(counts.items()))
+                print(f"\n{summary or 'Antrian kosong'}")
+            return 0
+        
+        results = run_jobs(jobs, queue, concurrency, per_host, as_json, segments, "thread", cache,
+                           rename) if jobs else []
+    finally:
+        queue.close()
+    failed = sum(1 for r in results if not r.ok)
+    if not as_json:
+        print(f"\n{len(results) - failed}/{len(results)} berhasil")
+    return 1 if failed else 0
+
+
+def run_search(query, source="repo_id", as_json=False, direct_only=False, limit=None, use_cache=True):
+    """
+    Cari query di repository dan cetak hasilnya.
+    
+    Semua sumber dijalankan paralel; setiap adapter repository dibatasi
+    deadline-nya sendiri. Hasil yang masih segar diambil dari cache
+    pencarian yang sama dengan GUI.
+    
+    Returns:
+        Exit code: 0 jika ada sumber yang berhasil, 1 jika semua gagal
+    """
+    # Diimpor di sini agar get/batch tidak ikut memuat BeautifulSoup
+    from repository_search import search_sources
+    
+    cache = None
+    cached = None
+    if use_cache:
+        from search_cache import SearchCache
+        cache = SearchCache()
+        cached = cache.get(query, source)
+    
+    if cached and cached[1]:
+        results = cached[0]
+    else:
+        sources = search_sources(source)
+        results = []
+        errors = []
+        with ThreadPoolExecutor(max_workers=len(sources)) as executor:
+            for future in [executor.submit(search, query) for search in sources]:
+                try:
+                    results.extend(future.result())
+                except requests.exceptions.RequestException as e:
+                    errors.append(e)
+                    print(f"GAGAL {e}", file=sys.stderr, flush=True)
+        if errors and len(errors) == len(sources):
+            if not cached:
+                return 1
+            # Semua sumber gagal: pakai hasil basi dari cache
+            results = cached[0]
+        elif cache is not None:
+            cache.put(query, source, results)
+    if cache is not None:
+        cache.close()
+    
+    if direct_only:
+        results = [r for r in results if r.get('is_direct')]
+    if limit:
+        results = results[:limit]
+    for result in results:
+        if as_json:
+            print(json.dumps(result, ensure_ascii=False), flush=True)
+        else:
+            kind = "PDF " if result.get('is_direct') else "LINK"
+            print(f"{kind} [{result['source']}] {result['title']}\n     {result['url']}", flush=True)
+    if not as_json:
+        print(f"\n{len(results)} hasil", file=sys.stderr)
+    return 0
 
 
-def main():
+def run_health(as_json=False):
+    """
+    Ukur kesehatan semua repository sekarang (paralel) dan cetak hasilnya,
+    urut dari yang paling sehat. Hasil ditambahkan ke statistik bergulir
+    yang dipakai untuk mengurutkan sumber pencarian dan mirror.
+    
+    Returns:
+        Exit code: 0 jika ada repository yang bisa dihubungi, 1 jika tidak ada
+    """
+    from repository_search import REPOSITORIES
+    from repo_health import RepositoryProber, host_of
+    
+    prober = RepositoryProber([repo.base_url for repo in REPOSITORIES])
+    results = {result['host']: result for result in prober.probe_all()}
+    store = prober.store
+    
+    def ms(value):
+        return f"{value:7.0f}" if value is not None else "      -"
+    
+    for url in store.rank(prober.urls):
+        host = host_of(url)
+        result = results[host]
+        if as_json:
+            print(json.dumps(dict(result, stats=store.stats(host))), flush=True)
+        else:
+            print(f"{store.describe(host):<26} {host:<26} dns{ms(result['dns_ms'])}  "
+                  f"connect{ms(result['connect_ms'])}  tls{ms(result['tls_ms'])}  "
+                  f"ttfb{ms(result['ttfb_ms'])} ms  {result['error'] or ''}".rstrip())
+    return 0 if any(result['ok'] for result in results.values()) else 1
+
+
+def run_info(paths, rename=False, as_json=False):
+    """
+    Tampilkan metadata PDF (judul, penulis, halaman, enkripsi) dan, jika
+    rename, ganti nama file menjadi "Penulis - Judul.pdf".
+    
+    Returns:
+        Exit code: 0 jika semua file terbaca, 1 jika ada yang gagal
+    """
+    failed = 0
+    for path in map(Path, paths):
+        try:
+            meta = read_pdf_metadata(path)
+        except (OSError, ValueError) as e:
+            failed += 1
+            if as_json:
+                print(json.dumps({'path': str(path), 'error': str(e)}), flush=True)
+            else:
+                print(f"❌ {path}: {e}")
+            continue
+        renamed = EbookDownloader(path.parent).rename_from_metadata(path) if rename else path
+        if as_json:
+            print(json.dumps(dict(meta.to_dict(), path=str(renamed))), flush=True)
+        else:
+            print(f"📄 {path.name}: {describe_pdf(meta)} (PDF {meta.version})")
+            if renamed != path:
+                print(f"   ✏️ -> {renamed.name}")
+    return 1 if failed else 0
+
+
+def run_library(query=None, folder="downloads", as_json=False, limit=None, update=True):
+    """
+    Perbarui indeks perpustakaan lokal untuk folder secara inkremental
+    lalu, jika query diberikan, cari di dalamnya.
+    
+    Returns:
+        Exit code: 0 jika ada hasil (atau hanya memperbarui indeks), 1 jika tidak
+    """
+    from library_index import get_library_index
+    
+    index = get_library_index()
+    if update:
+        def progress(path, status):
+            print(f"{status:<8} {path}", file=sys.stderr, flush=True)
+        
+        counts = index.update(folder, on_progress=progress if not as_json else None)
+        print(' · '.join(f"{key} {value}" for key, value in counts.items() if value) or "indeks kosong",
+              file=sys.stderr)
+    if not query:
+        stats = index.stats()
+        print(f"{stats['documents']} dokumen terindeks ({stats['failed']} tidak terbaca)", file=sys.stderr)
+        return 0
+    
+    start = time.perf_counter()
+    results = index.search(query, limit=limit or 50)
+    elapsed = (time.perf_counter() - start) * 1000
+    for result in results:
+        if as_json:
+            print(json.dumps(result, ensure_ascii=False), flush=True)
+        else:
+            print(f"📄 {result['title']}\n     {result['path']}\n     {result['description']}", flush=True)
+    if not as_json:
+        print(f"\n{len(results)} hasil ({elapsed:.1f} ms)", file=sys.stderr)
+    return 0 if results else 1
+
+
+def run_duplicates(folder="downloads", threshold=0.8, link=False, dry_run=False, as_json=False, update=True):
+    """
+    Cari PDF/EPUB duplikat di folder: duplikat persis (SHA-256 sama) dan
+    hampir duplikat (teks mirip menurut MinHash). Dengan link, salinan
+    duplikat persis diganti hardlink ke file pertama.
+    
+    Indeks yang sama dengan subcommand "library" dipakai dan diperbarui
+    dulu, jadi hanya file yang berubah sejak pemindaian terakhir yang dibaca.
+    
+    Returns:
+        Exit code: 0 jika tidak ada yang gagal di-link, 1 jika ada
+    """
+    from library_index import get_library_index
+    from duplicates import find_duplicates, find_near_duplicates, link_duplicates
+    
+    index = get_library_index()
+    if update:
+        counts = index.update(folder)
+        print(' · '.join(f"{key} {value}" for key, value in counts.items() if value) or "indeks kosong",
+              file=sys.stderr)
+    
+    groups = find_duplicates(index, folder)
+    near = find_near_duplicates(index, threshold, folder)
+    wasted = sum(group.wasted for group in groups)
+    for group in groups:
+        if as_json:
+            print(json.dumps({'type': 'exact', 'sha256': group.sha256, 'size': group.size,
+                              'wasted': group.wasted, 'paths': [str(p) for p in group.paths]}), flush=True)
+        else:
+            print(f"🟰 {len(group.paths)} salinan, {group.size / 1024 / 1024:.2f} MB "
+                  f"({group.wasted / 1024 / 1024:.2f} MB terbuang)")
+            for path in group.paths:
+                print(f"     {path}")
+    for score, path_a, path_b in near:
+        if as_json:
+            print(json.dumps({'type': 'near', 'similarity': score, 'paths': [str(path_a), str(path_b)]}),
+                  flush=True)
+        else:
+            print(f"≈ {score * 100:.0f}% mirip\n     {path_a}\n     {path_b}")
+    if not as_json:
+        print(f"\n{len(groups)} kelompok duplikat persis ({wasted / 1024 / 1024:.2f} MB bisa dihemat), "
+              f"{len(near)} pasangan hampir duplikat", file=sys.stderr)
+    if not link:
+        return 0
+    
+    linked, saved, skipped = link_duplicates(index, groups, dry_run)
+    for path, reason in skipped:
+        print(f"⚠️ Dilewati {path}: {reason}", file=sys.stderr)
+    action = "akan diganti" if dry_run else "diganti"
+    print(f"🔗 {linked} file {action} hardlink, {saved / 1024 / 1024:.2f} MB dihemat", file=sys.stderr)
+    return 1 if skipped else 0
+
+
+def run_limit(limit_rate=None, host_rate=None, host_requests=None):
+    """
+    Tampilkan atau ubah batas kecepatan bersama.
+    
+    Batas disimpan di file pengaturan yang dipantau proses lain, jadi
+    download yang sedang berjalan (GUI atau CLI) ikut menyesuaikan dalam
+    satu detik.
+    
+    Returns:
+        Exit code 0
+    """
+    limiter = get_rate_limiter()
+    if (limit_rate, host_rate, host_requests) != (None, None, None):
+        limiter.set_limits(limit_rate, host_rate, host_requests)
+        limiter.save()
+    print(f"Total    : {format_rate(limiter.global_bps)}")
+    print(f"Per host : {format_rate(limiter.host_bps)}")
+    print(f"Request  : {f'{limiter.host_rps:g}/s per host' if limiter.host_rps else 'tanpa batas'}")
+    return 0
+
+
+def parse_args(argv=None):
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("-o", "--output", default="downloads", help="Folder tujuan download")
+    common.add_argument("-c", "--concurrency", type=int, default=8, help="Jumlah download paralel")
+    common.add_argument("--per-host", type=int, default=4, help="Jumlah download paralel per host")
+    common.add_argument("--json", action="store_true", help="Cetak hasil per URL sebagai JSON lines")
+    common.add_argument("--cache-dir", default=None,
+                        help="Folder cache download (default: ~/.ebook_downloader/cache)")
+    common.add_argument("--no-cache", action="store_true",
+                        help="Jangan pakai cache; selalu unduh ulang penuh")
+    common.add_argument("--segments", type=int, default=1,
+                        help="Jumlah koneksi paralel per file besar (server harus mendukung Range)")
+    common.add_argument("--jobs-db", default=None,
+                        help="File antrian job (default: ~/.ebook_downloader/jobs.sqlite3)")
+    common.add_argument("--rename", action="store_true",
+                        help="Ganti nama PDF dari metadatanya menjadi \"Penulis - Judul.pdf\"")
+    
+    limits = argparse.ArgumentParser(add_help=False)
+    limits.add_argument("--limit-rate", type=parse_rate, metavar="RATE",
+                        help="Batas kecepatan total, mis. 500K atau 2M (0 = tanpa batas)")
+    limits.add_argument("--host-rate", type=parse_rate, metavar="RATE",
+                        help="Batas kecepatan per host (0 = tanpa batas)")
+    limits.add_argument("--host-requests", type=float, metavar="N",
+                        help="Batas request per detik per host (0 = tanpa batas)")
+    
+    parser = argparse.ArgumentParser(
+        description="Ebook Downloader. Tanpa subcommand, menu interaktif dijalankan.")
+    parser.set_defaults(output="downloads", segments=1, cache_dir=None, no_cache=False, rename=False,
+                        limit_rate=None, host_rate=None, host_requests=None)
+    commands = parser.add_subparsers(dest="command", metavar="{get,batch,search,jobs,limit,health,info,library,duplicates}")
+    
+    get = commands.add_parser("get", parents=[common, limits], help="Download satu atau beberapa URL")
+    get.add_argument("urls", nargs="+", metavar="URL")
+    get.add_argument("--mirrors", action="store_true",
+                     help="Semua URL adalah mirror dari satu dokumen; yang tercepat dipakai")
+    get.add_argument("-n", "--name", help="Nama file tujuan (hanya untuk satu URL)")
+    
+    batch = commands.add_parser("batch", parents=[common, limits], help="Download semua URL di file daftar")
+    batch.add_argument("batch", metavar="FILE", help="File berisi daftar URL (satu per baris)")
+    batch.add_argument("--engine", choices=["async", "thread"], default="async",
+                       help="Mesin download batch: event loop asyncio atau thread pool")
+    
+    search = commands.add_parser("search", help="Cari ebook di repository universitas")
+    search.add_argument("query")
+    search.add_argument("-s", "--source", choices=["repo_id", "scholar", "all", "library"], default="repo_id",
+                        help="Sumber pencarian (default: repo_id)")
+    search.add_argument("--json", action="store_true", help="Cetak hasil sebagai JSON lines")
+    search.add_argument("--direct", action="store_true", help="Hanya tampilkan link PDF langsung")
+    search.add_argument("--limit", type=int, help="Jumlah hasil maksimum")
+    search.add_argument("--no-cache", action="store_true", help="Jangan pakai cache pencarian")
+    
+    jobs = commands.add_parser("jobs", parents=[common, limits], help="Tampilkan atau lanjutkan antrian download")
+    jobs.add_argument("--resume", action="store_true", help="Lanjutkan job yang belum selesai")
+    jobs.add_argument("--failed", action="store_true", help="Ikutkan job yang gagal")
+    
+    commands.add_parser(
+        "limit", parents=[limits], help="Atur batas kecepatan (juga untuk download yang sedang berjalan)",
+        description="Tanpa opsi, batas yang berlaku ditampilkan. Batas disimpan di "
+                    "~/.ebook_downloader/limits.json dan dibaca ulang oleh GUI dan CLI yang sedang berjalan.")
+    
+    health = commands.add_parser("health", help="Ukur latensi dan ketersediaan repository")
+    health.add_argument("--json", action="store_true", help="Cetak hasil per host sebagai JSON lines")
+    
+    info = commands.add_parser("info", help="Tampilkan metadata PDF (judul, penulis, halaman)")
+    info.add_argument("paths", nargs="+", metavar="FILE")
+    info.add_argument("--rename", action="store_true", help="Ganti nama file menjadi \"Penulis - Judul.pdf\"")
+    info.add_argument("--json", action="store_true", help="Cetak hasil per file sebagai JSON lines")
+    
+    library = commands.add_parser("library", help="Cari teks di PDF/EPUB yang sudah diunduh",
+                                  description="Indeks folder diperbarui dulu (hanya file yang berubah), "
+                                              "lalu query dicari. Tanpa QUERY, hanya indeks yang diperbarui.")
+    library.add_argument("query", nargs="?", metavar="QUERY")
+    library.add_argument("-o", "--output", default="downloads", help="Folder yang diindeks")
+    library.add_argument("--json", action="store_true", help="Cetak hasil sebagai JSON lines")
+    library.add_argument("--limit", type=int, help="Jumlah hasil maksimum (default 50)")
+    library.add_argument("--no-update", action="store_true", help="Langsung cari tanpa memperbarui indeks")
+    
+    duplicates = commands.add_parser("duplicates", help="Cari PDF/EPUB duplikat dan hampir duplikat",
+                                     description="Duplikat persis dicocokkan dengan SHA-256, hampir duplikat "
+                                                 "dengan MinHash atas teks dokumen. Indeks perpustakaan lokal "
+                                                 "diperbarui dulu (hanya file yang berubah).")
+    duplicates.add_argument("-o", "--output", default="downloads", help="Folder yang diperiksa")
+    duplicates.add_argument("--threshold", type=float, default=0.8,
+                            help="Kemiripan minimum hampir duplikat, 0-1 (default 0.8)")
+    duplicates.add_argument("--link", action="store_true",
+                            help="Ganti salinan duplikat persis dengan hardlink ke file pertama")
+    duplicates.add_argument("--dry-run", action="store_true", help="Dengan --link: hanya tampilkan yang akan diganti")
+    duplicates.add_argument("--json", action="store_true", help="Cetak kelompok duplikat sebagai JSON lines")
+    duplicates.add_argument("--no-update", action="store_true", help="Jangan perbarui indeks dulu")
+    
+    argv = list(sys.argv[1:] if argv is None else argv)
+    if "--batch" in argv[:-1]:
+        # Bentuk lama "--batch FILE [opsi]" sama dengan "batch FILE [opsi]"
+        i = argv.index("--batch")
+        argv = ["batch", argv[i + 1]] + argv[:i] + argv[i + 2:]
+    
+    args = parser.parse_args(argv)
+    if args.command == "get" and args.mirrors:
+        args.urls = [' '.join(args.urls)]
+    if args.command == "get" and args.name and len(args.urls) > 1:
+        parser.error("--name hanya bisa dipakai dengan satu URL (atau dengan --mirrors)")
+    return args
+
+
+def main(argv=None):
     """Fungsi utama untuk menjalankan downloader."""
+    args = parse_args(argv)
+    if args.command == "search":
+        return run_search(args.query, args.source, args.json, args.direct, args.limit, not args.no_cache)
+    if args.command == "limit":
+        return run_limit(args.limit_rate, args.host_rate, args.host_requests)
+    if args.command == "health":
+        return run_health(args.json)
+    if args.command == "info":
+        return run_info(args.paths, args.rename, args.json)
+    if args.command == "library":
+        return run_library(args.query, args.output, args.json, args.limit, not args.no_update)
+    if args.command == "duplicates":
+        return run_duplicates(args.output, args.threshold, args.link, args.dry_run, args.json, not args.no_update)
+    # Batas dari opsi hanya berlaku untuk proses ini (lihat subcommand "limit")
+    get_rate_limiter().set_limits(args.limit_rate, args.host_rate, args.host_requests)
+    
+    cache = None
+    if not args.no_cache:
+        from download_cache import DownloadCache, DEFAULT_CACHE_DIR
+        cache = DownloadCache(args.cache_dir or DEFAULT_CACHE_DIR)
+    
+    if args.command == "batch":
+        return run_batch(args.batch, args.output, args.concurrency, args.per_host, args.json, args.segments,
+                         args.engine, cache, args.jobs_db, args.rename)
+    if args.command == "get":
+        return run_get(args.urls, args.output, args.name, args.concurrency, args.per_host, args.json,
+                       args.segments, cache, args.jobs_db, args.rename)
+    if args.command == "jobs":
+        return run_jobs_command(args.resume, args.failed, args.concurrency, args.per_host, args.json,
+                                args.segments, cache, args.jobs_db, args.rename)
+    
     print("=" * 60)
     print("📚 EBOOK DOWNLOADER - Pendidikan Anak Berkebutuhan Khusus")
     print("=" * 60)
     
-    downloader = EbookDownloader(download_folder="downloads")
+    downloader = EbookDownloader(download_folder=args.output, segments=args.segments, cache=cache,
+                                 rename_pdfs=args.rename)
     
     print("\n⚠️  CATATAN PENTING:")
     print("-" * 40)
@@ -155,16 +2119,21 @@ Sumber-sumber alternatif untuk ebook topik serupa:
                 print('   "Pendidikan Anak Berkebutuhan Khusus Tunagrahita filetype:pdf site:ac.id"')
             
             elif choice == "3":
+                stats = downloader.pool.stats()
+                if stats:
+                    print("\n🔌 Statistik koneksi:")
+                    for line in format_pool_stats(stats):
+                        print(f"   • {line}")
                 print("\n👋 Terima kasih telah menggunakan Ebook Downloader!")
                 break
             
             else:
                 print("❌ Pilihan tidak valid. Silakan pilih 1-3.")
-                
+        
         except KeyboardInterrupt:
             print("\n\n👋 Program dihentikan oleh pengguna.")
             break
 
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
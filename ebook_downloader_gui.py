@@ -5,15 +5,65 @@ Aplikasi GUI untuk mencari dan mengunduh ebook dari berbagai sumber.
 PERBAIKAN: Validasi file PDF dan peringatan link pencarian
 """
 
+import time
+
+# Diambil sebelum import lain agar laporan startup mencakup waktu import
+_PROCESS_START = time.perf_counter()
+
 import tkinter as tk
 from tkinter import ttk, messagebox, filedialog
 import requests
 import os
-from urllib.parse import urlparse, unquote, quote_plus
+from urllib.parse import urlparse
 from pathlib import Path
-import re
 import threading
 import webbrowser
+import logging.handlers
+from collections import deque
+
+from ebook_downloader import (
+    EbookDownloader, ContentTypeError, CorruptFileError, get_connection_pool, format_pool_stats
+)
+from download_cache import DownloadCache
+from search_cache import SearchCache
+from job_queue import JobQueue
+from rate_limit import parse_rate, format_rate
+from retry_policy import CircuitOpenError
+from repo_health import RepositoryProber, get_health_store, host_of
+from pdf_metadata import read_pdf_metadata, describe as describe_pdf, is_pdf
+from library_index import get_library_index
+from duplicates import find_duplicates
+
+# Riwayat log lengkap (dirotasi per 1 MB) di samping panel log yang dibatasi
+LOG_FILE = Path.home() / ".ebook_downloader" / "logs" / "ebook_downloader.log"
+
+# Kartu di tab "Sumber Ebook": (nama, URL, subjudul, keterangan)
+SOURCE_SITES = [
+    ("🔬 ResearchGate", "https://www.researchgate.net", 
+     "Jurnal & Paper", "Download paper ilmiah gratis"),
+    ("📚 Scribd", "https://www.scribd.com", 
+     "Ebook & Dokumen", "Perpustakaan digital gratis"),
+    ("🔍 Google Scholar", "https://scholar.google.com", 
+     "Pencarian Akademik", "Cari paper & jurnal"),
+    ("🎓 Repository UMJ", "https://repository.umj.ac.id", 
+     "Univ. Muhammadiyah JKT", "Skripsi & tesis"),
+    ("📖 Repository USD", "https://repository.usd.ac.id", 
+     "Univ. Sanata Dharma", "Karya ilmiah"),
+    ("🏛️ Perpusnas Digital", "https://e-resources.perpusnas.go.id", 
+     "Perpustakaan Nasional", "E-resources WNI"),
+    ("📕 Open Library", "https://openlibrary.org", 
+     "Internet Archive", "Jutaan buku digital"),
+    ("📗 Project Gutenberg", "https://www.gutenberg.org", 
+     "Buku Klasik", "60K+ ebook gratis"),
+    ("📘 Library Genesis", "https://libgen.is", 
+     "Perpustakaan Digital", "Paper akademik"),
+    ("🎓 Repository UPI", "http://repository.upi.edu", 
+     "Univ. Pendidikan ID", "Karya pendidikan"),
+    ("📚 Repository UNY", "https://eprints.uny.ac.id", 
+     "Univ. Negeri Yogya", "Repository ilmiah"),
+    ("🏫 Repository UGM", "https://etd.repository.ugm.ac.id", 
+     "Univ. Gadjah Mada", "Tesis & disertasi"),
+]
 
 
 class ModernStyle:
@@ -98,17 +148,19 @@ class AnimatedButton(tk.Canvas):
 
 
 class SearchResultItem(tk.Frame):
-    """Widget untuk menampilkan hasil pencarian."""
+    """
+    Widget untuk menampilkan hasil pencarian.
     
-    def __init__(self, parent, title, url, source, description="", 
-                 is_direct_download=False, on_download=None, on_open=None):
+    Widget dibuat sekali lalu dipakai ulang untuk hasil lain lewat show(),
+    sehingga VirtualResultList cukup membuat widget untuk baris yang terlihat.
+    """
+    
+    def __init__(self, parent, on_download=None):
         super().__init__(parent, bg=ModernStyle.BG_SECONDARY)
         
-        self.url = url
+        self.url = ""
         self.on_download = on_download
-        self.is_direct = is_direct_download
-        
-        self.pack(fill=tk.X, pady=3, padx=5)
+        self.is_direct = False
         
         content = tk.Frame(self, bg=ModernStyle.BG_SECONDARY)
         content.pack(fill=tk.X, padx=12, pady=10)
@@ -118,108 +170,72 @@ class SearchResultItem(tk.Frame):
         title_frame.pack(fill=tk.X)
         
         # Source badge with color based on type
-        badge_color = ModernStyle.ACCENT_SUCCESS if is_direct_download else ModernStyle.ACCENT_INFO
-        source_label = tk.Label(
+        self.source_label = tk.Label(
             title_frame,
-            text=source,
             font=(ModernStyle.FONT_FAMILY, 8, "bold"),
             fg=ModernStyle.BG_PRIMARY,
-            bg=badge_color,
             padx=6,
             pady=2
         )
-        source_label.pack(side=tk.LEFT, padx=(0, 8))
-        
-        # Direct download indicator
-        if is_direct_download:
-            direct_label = tk.Label(
-                title_frame,
-                text="📥 DIRECT",
-                font=(ModernStyle.FONT_FAMILY, 7, "bold"),
-                fg=ModernStyle.ACCENT_SUCCESS,
-                bg=ModernStyle.BG_SECONDARY,
-                padx=4
-            )
-            direct_label.pack(side=tk.LEFT, padx=(0, 8))
-        else:
-            search_label = tk.Label(
-                title_frame,
-                text="🔍 SEARCH",
-                font=(ModernStyle.FONT_FAMILY, 7),
-                fg=ModernStyle.ACCENT_WARNING,
-                bg=ModernStyle.BG_SECONDARY,
-                padx=4
-            )
-            search_label.pack(side=tk.LEFT, padx=(0, 8))
+        self.source_label.pack(side=tk.LEFT, padx=(0, 8))
+        
+        # Direct download / search indicator
+        self.kind_label = tk.Label(
+            title_frame,
+            bg=ModernStyle.BG_SECONDARY,
+            padx=4
+        )
+        self.kind_label.pack(side=tk.LEFT, padx=(0, 8))
         
         # Title
-        title_label = tk.Label(
+        self.title_label = tk.Label(
             title_frame,
-            text=title[:70] + "..." if len(title) > 70 else title,
             font=ModernStyle.FONT_BODY,
             fg=ModernStyle.ACCENT_PRIMARY,
             bg=ModernStyle.BG_SECONDARY,
             cursor="hand2"
         )
-        title_label.pack(side=tk.LEFT, fill=tk.X)
-        title_label.bind("<Button-1>", lambda e: webbrowser.open(url))
+        self.title_label.pack(side=tk.LEFT, fill=tk.X)
+        self.title_label.bind("<Button-1>", lambda e: webbrowser.open(self.url))
         
         # URL preview
-        url_label = tk.Label(
+        self.url_label = tk.Label(
             content,
-            text=url[:60] + "..." if len(url) > 60 else url,
             font=ModernStyle.FONT_SMALL,
             fg=ModernStyle.TEXT_MUTED,
             bg=ModernStyle.BG_SECONDARY,
             anchor=tk.W
         )
-        url_label.pack(fill=tk.X, pady=(3, 0))
+        self.url_label.pack(fill=tk.X, pady=(3, 0))
         
-        # Description
-        if description:
-            desc_label = tk.Label(
-                content,
-                text=description[:100] + "..." if len(description) > 100 else description,
-                font=ModernStyle.FONT_SMALL,
-                fg=ModernStyle.TEXT_SECONDARY,
-                bg=ModernStyle.BG_SECONDARY,
-                anchor=tk.W,
-                wraplength=500
-            )
-            desc_label.pack(fill=tk.X, pady=(3, 0))
+        # Description (tinggi tetap dua baris agar semua baris sama tinggi)
+        self.desc_label = tk.Label(
+            content,
+            font=ModernStyle.FONT_SMALL,
+            fg=ModernStyle.TEXT_SECONDARY,
+            bg=ModernStyle.BG_SECONDARY,
+            anchor=tk.NW,
+            justify=tk.LEFT,
+            wraplength=500,
+            height=2
+        )
+        self.desc_label.pack(fill=tk.X, pady=(3, 0))
         
         # Action buttons
         btn_frame = tk.Frame(content, bg=ModernStyle.BG_SECONDARY)
         btn_frame.pack(fill=tk.X, pady=(8, 0))
         
-        if is_direct_download:
-            # Download button for direct links
-            download_btn = tk.Label(
-                btn_frame,
-                text="⬇️ Download Langsung",
-                font=ModernStyle.FONT_SMALL,
-                fg=ModernStyle.TEXT_PRIMARY,
-                bg=ModernStyle.ACCENT_SUCCESS,
-                padx=12,
-                pady=5,
-                cursor="hand2"
-            )
-            download_btn.pack(side=tk.LEFT, padx=(0, 8))
-            download_btn.bind("<Button-1>", lambda e: on_download(url) if on_download else None)
-        else:
-            # Open in browser for search links
-            open_btn = tk.Label(
-                btn_frame,
-                text="🔍 Cari di Browser",
-                font=ModernStyle.FONT_SMALL,
-                fg=ModernStyle.TEXT_PRIMARY,
-                bg=ModernStyle.ACCENT_INFO,
-                padx=12,
-                pady=5,
-                cursor="hand2"
-            )
-            open_btn.pack(side=tk.LEFT, padx=(0, 8))
-            open_btn.bind("<Button-1>", lambda e: webbrowser.open(url))
+        # Download langsung untuk link PDF, buka browser untuk link pencarian
+        self.action_btn = tk.Label(
+            btn_frame,
+            font=ModernStyle.FONT_SMALL,
+            fg=ModernStyle.TEXT_PRIMARY,
+            padx=12,
+            pady=5,
+            cursor="hand2"
+        )
+        self.action_btn.pack(side=tk.LEFT, padx=(0, 8))
+        self.action_btn.bind("<Button-1>", self._on_action)
         
         # Copy URL button
         copy_btn = tk.Label(
@@ -233,7 +249,39 @@ class SearchResultItem(tk.Frame):
             cursor="hand2"
         )
         copy_btn.pack(side=tk.LEFT)
-        copy_btn.bind("<Button-1>", lambda e: self._copy_to_clipboard(url))
+        copy_btn.bind("<Button-1>", lambda e: self._copy_to_clipboard(self.url))
+    
+    def show(self, title, url, source, description="", is_direct_download=False):
+        """Tampilkan satu hasil pencarian di widget ini."""
+        self.url = url
+        self.is_direct = is_direct_download
+        
+        badge_color = ModernStyle.ACCENT_SUCCESS if is_direct_download else ModernStyle.ACCENT_INFO
+        self.source_label.config(text=source, bg=badge_color)
+        if url.startswith('file:'):
+            # Hasil dari perpustakaan lokal: file sudah ada, cukup dibuka
+            self.kind_label.config(text="📂 LOKAL", font=(ModernStyle.FONT_FAMILY, 7, "bold"),
+                                   fg=ModernStyle.ACCENT_SUCCESS)
+            self.action_btn.config(text="📂 Buka File", bg=ModernStyle.ACCENT_INFO)
+        elif is_direct_download:
+            self.kind_label.config(text="📥 DIRECT", font=(ModernStyle.FONT_FAMILY, 7, "bold"),
+                                   fg=ModernStyle.ACCENT_SUCCESS)
+            self.action_btn.config(text="⬇️ Download Langsung", bg=ModernStyle.ACCENT_SUCCESS)
+        else:
+            self.kind_label.config(text="🔍 SEARCH", font=(ModernStyle.FONT_FAMILY, 7),
+                                   fg=ModernStyle.ACCENT_WARNING)
+            self.action_btn.config(text="🔍 Cari di Browser", bg=ModernStyle.ACCENT_INFO)
+        
+        self.title_label.config(text=title[:70] + "..." if len(title) > 70 else title)
+        self.url_label.config(text=url[:60] + "..." if len(url) > 60 else url)
+        self.desc_label.config(
+            text=description[:100] + "..." if len(description) > 100 else description)
+    
+    def _on_action(self, event):
+        if not self.is_direct:
+            webbrowser.open(self.url)
+        elif self.on_download:
+            self.on_download(self.url)
     
     def _copy_to_clipboard(self, text):
         self.clipboard_clear()
@@ -241,10 +289,327 @@ class SearchResultItem(tk.Frame):
         messagebox.showinfo("Copied", "URL telah disalin ke clipboard!")
 
 
+class VirtualResultList:
+    """
+    Daftar hasil pencarian virtual di dalam Canvas.
+    
+    Frame isi selalu seukuran viewport dan tidak ikut di-scroll; posisi
+    scroll disimpan sendiri (dalam piksel) dan scrollbar digerakkan lewat
+    yscrollcommand. Widget hanya dibuat untuk baris yang terlihat dan
+    diletakkan relatif terhadap viewport, sehingga koordinatnya tidak pernah
+    melewati batas 16-bit X11/Tk dan biaya render tetap sama berapa pun
+    jumlah hasilnya.
+    """
+    
+    ROW_PADDING = 6
+    
+    def __init__(self, canvas, inner, on_download=None, yscrollcommand=None):
+        """
+        Args:
+            canvas: Canvas yang memuat frame isi (window item seukuran canvas)
+            inner: Frame isi di dalam canvas
+            on_download: Callback(url) untuk tombol download langsung
+            yscrollcommand: Callback(first, last) seperti milik widget Tk,
+                biasanya scrollbar.set
+        """
+        self.canvas = canvas
+        self.inner = inner
+        self.on_download = on_download
+        self.yscrollcommand = yscrollcommand
+        self.results = []
+        self.row_height = None
+        self.top = 0
+        self._rows = []
+        self._refresh_pending = False
+    
+    def set_results(self, results):
+        """Ganti isi daftar dan scroll ke atas."""
+        self.results = list(results)
+        for row in self._rows:
+            row.index = None
+        if self.results and self.row_height is None:
+            self.row_height = self._measure_row()
+        self.top = 0
+        self._render()
+    
+    def clear(self):
+        """Kosongkan daftar (widget baris disembunyikan untuk dipakai lagi)."""
+        self.results = []
+        self.top = 0
+        for row in self._rows:
+            row.place_forget()
+            row.index = None
+        self._update_scrollbar()
+    
+    def is_row(self, widget):
+        return widget in self._rows
+    
+    def refresh(self):
+        """Render ulang baris yang terlihat (digabung per idle; aman dipanggil sering)."""
+        if not self._refresh_pending:
+            self._refresh_pending = True
+            self.canvas.after_idle(self._render)
+    
+    def yview(self, *args):
+        """
+        Perintah scroll dari scrollbar, dengan argumen seperti Canvas.yview.
+        
+        Args:
+            args: ('moveto', fraction) atau ('scroll', n, 'units'|'pages')
+        """
+        if not self.results:
+            return
+        if args[0] == 'moveto':
+            self.top = float(args[1]) * self._total_height()
+        elif args[0] == 'scroll':
+            step = self.row_height if args[2] == 'units' else self._viewport_height()
+            self.top += int(args[1]) * step
+        self._render()
+    
+    def _total_height(self):
+        return len(self.results) * (self.row_height or 0)
+    
+    def _viewport_height(self):
+        return max(self.canvas.winfo_height(), 1)
+    
+    def _update_scrollbar(self):
+        if not self.yscrollcommand:
+            return
+        total = self._total_height()
+        if not total:
+            self.yscrollcommand(0.0, 1.0)
+            return
+        self.yscrollcommand(self.top / total, min((self.top + self._viewport_height()) / total, 1.0))
+    
+    def _measure_row(self):
+        row = self._new_row()
+        row.show("x", "x", "x", "x", True)
+        row.update_idletasks()
+        return row.winfo_reqheight() + self.ROW_PADDING
+    
+    def _new_row(self):
+        row = SearchResultItem(self.inner, on_download=self.on_download)
+        row.index = None
+        self._rows.append(row)
+        return row
+    
+    def _render(self):
+        self._refresh_pending = False
+        if not self.results:
+            return
+        
+        height = self._viewport_height()
+        self.top = int(min(max(self.top, 0), max(self._total_height() - height, 0)))
+        first = self.top // self.row_height
+        last = min(-(-(self.top + height) // self.row_height), len(self.results))
+        # Geser sub-baris agar scroll tetap halus; y selalu di dalam viewport
+        shift = self.top - first * self.row_height
+        
+        while len(self._rows) < last - first:
+            self._new_row()
+        
+        # Baris yang masih menampilkan hasil terlihat cukup dipindah; sisanya
+        # dipakai ulang untuk indeks yang belum punya widget
+        visible = range(first, last)
+        free = [row for row in self._rows if row.index not in visible]
+        shown = {row.index: row for row in self._rows if row.index in visible}
+        for index in visible:
+            row = shown.get(index)
+            if row is None:
+                row = free.pop()
+                result = self.results[index]
+                row.show(
+                    title=result['title'],
+                    url=result['url'],
+                    source=result['source'],
+                    description=result.get('description', ''),
+                    is_direct_download=result.get('is_direct', False)
+                )
+                row.index = index
+            row.place(x=5, y=(index - first) * self.row_height - shift + self.ROW_PADDING // 2,
+                      relwidth=1, width=-10, height=self.row_height - self.ROW_PADDING)
+        
+        for row in free:
+            row.place_forget()
+            row.index = None
+        
+        self._update_scrollbar()
+
+
+class UIEventQueue:
+    """
+    Saluran event dari thread mana pun ke thread Tk.
+    
+    Thread lain hanya memasukkan event ke antrian; thread Tk mengurasnya
+    dengan root.after pada interval tetap. Event dengan key yang sama
+    (mis. progress satu download) digabung sehingga hanya nilai terakhir
+    yang diterapkan per tick.
+    """
+    
+    def __init__(self, root, interval_ms=50):
+        self.root = root
+        self.interval_ms = interval_ms
+        self._lock = threading.Lock()
+        self._ordered = deque()
+        self._latest = {}
+    
+    def start(self):
+        self.root.after(self.interval_ms, self._drain)
+        return self
+    
+    def post(self, callback, *args, key=None):
+        """
+        Jadwalkan callback(*args) di thread Tk.
+        
+        Args:
+            key: Jika diisi, event lama dengan key yang sama yang belum
+                diterapkan akan diganti (hanya nilai terbaru yang dipakai)
+        """
+        with self._lock:
+            if key is None:
+                self._ordered.append((callback, args))
+            else:
+                self._latest[key] = (callback, args)
+    
+    def _drain(self):
+        with self._lock:
+            ordered, self._ordered = self._ordered, deque()
+            latest, self._latest = self._latest, {}
+        
+        for callback, args in ordered:
+            callback(*args)
+        for callback, args in latest.values():
+            callback(*args)
+        
+        self.root.after(self.interval_ms, self._drain)
+
+
+class LogSink:
+    """
+    Log aktivitas berbatas untuk panel log.
+    
+    Baris disimpan di ring buffer (deque dengan maxlen) dan ditulis ke
+    widget Text sekaligus satu kali per tick UIEventQueue, bukan satu
+    insert + see() per pesan. Baris tertua dibuang dari widget saat
+    jumlahnya melewati max_lines. Riwayat lengkap bisa disalin ke file
+    log berotasi di disk.
+    """
+    
+    def __init__(self, events, max_lines=2000, log_file=None, max_file_bytes=1024 * 1024, backups=3):
+        """
+        Args:
+            events: UIEventQueue untuk menjadwalkan flush di thread Tk
+            max_lines: Jumlah baris maksimum di panel log
+            log_file: Path file log berotasi (None = tidak ditulis ke disk)
+            max_file_bytes: Ukuran file log sebelum dirotasi
+            backups: Jumlah file log lama yang disimpan
+        """
+        self.events = events
+        self.lines = deque(maxlen=max_lines)
+        self.text = None
+        self._shown = 0
+        self._lock = threading.Lock()
+        self._pending = []
+        self._file = None
+        if log_file is not None:
+            log_file = Path(log_file)
+            log_file.parent.mkdir(parents=True, exist_ok=True)
+            self._file = logging.handlers.RotatingFileHandler(
+                log_file, maxBytes=max_file_bytes, backupCount=backups, encoding='utf-8')
+            self._file.setFormatter(logging.Formatter('%(asctime)s %(message)s'))
+    
+    def attach(self, text):
+        """Hubungkan ke widget Text; baris yang sudah ada langsung ditampilkan."""
+        self.text = text
+        self._rebuild()
+    
+    def write(self, message):
+        """Tambah pesan (aman dipanggil dari thread mana pun)."""
+        with self._lock:
+            self._pending.append(message)
+        self.events.post(self.flush, key='log')
+    
+    def flush(self):
+        """Terapkan semua pesan yang tertunda (dipanggil di thread Tk)."""
+        with self._lock:
+            pending, self._pending = self._pending, []
+        if not pending:
+            return
+        
+        new_lines = "\n".join(pending).split("\n")
+        self.lines.extend(new_lines)
+        if self._file is not None:
+            for message in pending:
+                self._file.handle(logging.makeLogRecord({'msg': message}))
+        if self.text is None:
+            return
+        
+        if len(new_lines) >= self.lines.maxlen:
+            self._rebuild()
+            return
+        self.text.insert(tk.END, "\n".join(new_lines) + "\n")
+        self._shown += len(new_lines)
+        overflow = self._shown - self.lines.maxlen
+        if overflow > 0:
+            self.text.delete("1.0", f"{overflow + 1}.0")
+            self._shown -= overflow
+        self.text.see(tk.END)
+    
+    def _rebuild(self):
+        if self.text is None:
+            return
+        self.text.delete("1.0", tk.END)
+        if self.lines:
+            self.text.insert(tk.END, "\n".join(self.lines) + "\n")
+        self._shown = len(self.lines)
+        self.text.see(tk.END)
+    
+    def clear(self):
+        """Kosongkan panel (file log di disk tidak ikut dihapus)."""
+        with self._lock:
+            self._pending = []
+        self.lines.clear()
+        self._rebuild()
+    
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+
+
+class StartupTimer:
+    """Catat durasi setiap fase startup GUI untuk laporan waktu start."""
+    
+    def __init__(self, start):
+        self.start = start
+        self._last = start
+        self.phases = []
+    
+    def mark(self, phase):
+        """Tutup fase yang sedang berjalan dengan nama phase."""
+        now = time.perf_counter()
+        self.phases.append((phase, (now - self._last) * 1000))
+        self._last = now
+    
+    def report(self):
+        """Baris laporan per fase ditambah total sejak proses mulai."""
+        lines = [f"   {phase:<32} {ms:8.1f} ms" for phase, ms in self.phases]
+        lines.append(f"   {'total':<32} {(self._last - self.start) * 1000:8.1f} ms")
+        return lines
+
+
 class EbookDownloaderGUI:
     """Aplikasi GUI utama untuk Ebook Downloader dengan fitur pencarian."""
     
-    def __init__(self):
+    def __init__(self, print_startup=False):
+        """
+        Args:
+            print_startup: Cetak laporan waktu startup ke stdout setelah
+                window tampil (laporan selalu ditulis ke log)
+        """
+        self.startup = StartupTimer(_PROCESS_START)
+        self.startup.mark("import modul")
+        self.print_startup = print_startup
+        
         self.root = tk.Tk()
         self.root.title("📚 Ebook Downloader - Search & Download")
         self.root.geometry("1000x800")
@@ -252,19 +617,31 @@ class EbookDownloaderGUI:
         self.root.resizable(True, True)
         
         self._center_window()
+        self.events = UIEventQueue(self.root).start()
+        self.log_sink = LogSink(self.events, log_file=LOG_FILE)
+        self.startup.mark("Tk root")
         
         self.download_folder = Path("downloads")
         self.download_folder.mkdir(exist_ok=True)
         
-        self.headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
-            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
-            'Accept-Language': 'id-ID,id;q=0.9,en-US;q=0.8,en;q=0.7',
-        }
+        # Pool bersama (header DEFAULT_HEADERS), juga dipakai pencarian repository
+        self.pool = get_connection_pool()
+        self.downloader = EbookDownloader(self.download_folder, pool=self.pool)
+        # Engine dan cache dibuat setelah window tampil (lihat _start_services)
+        self.engine = None
+        self.search_cache = None
+        self.jobs = None
+        self._closing = False
+        self.prober = None
+        self.repo_cards = {}
         
         self.search_results = []
+        self._current_search = None
+        self._preflight_pending = None
         self._create_widgets()
-        
+        self.startup.mark("widget (header, tab pencarian)")
+        self.root.bind("<Map>", self._on_first_map, add="+")
+    
     def _center_window(self):
         self.root.update_idletasks()
         width = 1000
@@ -322,20 +699,164 @@ class EbookDownloaderGUI:
         self.notebook = ttk.Notebook(parent, style='Custom.TNotebook')
         self.notebook.pack(fill=tk.BOTH, expand=True)
         
-        # Tab 1: Search
-        search_tab = tk.Frame(self.notebook, bg=ModernStyle.BG_PRIMARY)
-        self.notebook.add(search_tab, text="🔍 Pencarian Ebook")
-        self._create_search_tab(search_tab)
-        
-        # Tab 2: Direct Download
-        download_tab = tk.Frame(self.notebook, bg=ModernStyle.BG_PRIMARY)
-        self.notebook.add(download_tab, text="⬇️ Download Langsung")
-        self._create_download_tab(download_tab)
+        # Isi tab dibangun saat tab pertama kali dipilih (lihat _ensure_tab)
+        self._tab_builders = []
+        tabs = [
+            ("🔍 Pencarian Ebook", self._create_search_tab),
+            ("⬇️ Download Langsung", self._create_download_tab),
+            ("📖 Sumber Ebook", self._create_repository_tab),
+        ]
+        for text, builder in tabs:
+            tab = tk.Frame(self.notebook, bg=ModernStyle.BG_PRIMARY)
+            self.notebook.add(tab, text=text)
+            self._tab_builders.append([tab, text, builder])
         
-        # Tab 3: Repository Links
-        repo_tab = tk.Frame(self.notebook, bg=ModernStyle.BG_PRIMARY)
-        self.notebook.add(repo_tab, text="📖 Sumber Ebook")
-        self._create_repository_tab(repo_tab)
+        self._ensure_tab(0)
+        self.notebook.bind("<<NotebookTabChanged>>", self._on_tab_changed)
+    
+    def _ensure_tab(self, index):
+        """Bangun isi tab index jika belum pernah dibangun."""
+        entry = self._tab_builders[index]
+        tab, text, builder = entry
+        if builder is None:
+            return
+        entry[2] = None
+        start = time.perf_counter()
+        builder(tab)
+        if index:
+            self._log(f"⏱️ Tab '{text}' dibangun dalam {(time.perf_counter() - start) * 1000:.1f} ms")
+    
+    def _on_tab_changed(self, event):
+        self._ensure_tab(self.notebook.index(self.notebook.select()))
+    
+    def _select_tab(self, index):
+        """Pilih tab setelah memastikan widgetnya sudah ada."""
+        self._ensure_tab(index)
+        self.notebook.select(index)
+    
+    def _on_first_map(self, event):
+        if event.widget is not self.root:
+            return
+        self.root.unbind("<Map>")
+        self.startup.mark("window tampil")
+        self.root.after_idle(self._start_services)
+    
+    def _start_services(self):
+        """Buka cache dan jalankan engine setelah window tampil (sekali saja)."""
+        if self.engine is not None:
+            return
+        # Diimpor di sini: asyncio/aiohttp dan BeautifulSoup adalah import
+        # paling berat dan belum diperlukan untuk menampilkan window
+        from async_engine import AsyncEngine
+        
+        self.downloader.cache = DownloadCache()
+        self.search_cache = SearchCache()
+        self.jobs = JobQueue()
+        self.engine = AsyncEngine(self.downloader).start()
+        self.startup.mark("cache dan engine")
+        
+        self._log("⏱️ Waktu startup:")
+        for line in self.startup.report():
+            self._log(line)
+        if self.print_startup:
+            print("Waktu startup:")
+            print("\n".join(self.startup.report()), flush=True)
+        self._resume_jobs()
+        threading.Thread(target=self._start_prober, name="repo-prober-init", daemon=True).start()
+        self._index_library()
+    
+    def _start_prober(self):
+        """Mulai probe kesehatan repository berkala (di thread latar belakang)."""
+        # repository_search mengimpor BeautifulSoup; jangan di thread Tk
+        from repository_search import REPOSITORIES
+        urls = [url for _, url, _, _ in SOURCE_SITES] + [repo.base_url for repo in REPOSITORIES]
+        self.prober = RepositoryProber(urls).start(
+            on_update=lambda results: self.events.post(self._on_probe_results, results, key='probe'))
+    
+    def _index_library(self, filepath=None):
+        """
+        Perbarui indeks perpustakaan lokal di thread latar belakang: satu file
+        yang baru diunduh, atau seluruh folder download (inkremental).
+        """
+        folder = self.download_folder.resolve()
+        
+        def run():
+            index = get_library_index()
+            if filepath is not None:
+                index.add_file(filepath)
+                return
+            counts = index.update(folder)
+            changed = {key: value for key, value in counts.items() if value and key != 'unchanged'}
+            if changed:
+                summary = ", ".join(f"{value} {key}" for key, value in changed.items())
+                self.events.post(self._log, f"📚 Indeks perpustakaan lokal diperbarui: {summary}")
+            wasted = sum(group.wasted for group in find_duplicates(index, folder))
+            if wasted:
+                self.events.post(self._log, f"🟰 File duplikat di folder download memakai {wasted / 1024 / 1024:.1f} MB; "
+                                            f"jalankan \"ebook_downloader.py duplicates --link\" untuk menghemat")
+        
+        threading.Thread(target=run, name="library-index", daemon=True).start()
+    
+    def _on_probe_results(self, results):
+        if self.repo_cards:
+            self._layout_repo_cards()
+        healthy = sorted((r for r in results if r['ok']), key=lambda r: r['total_ms'])
+        message = f"🩺 Kesehatan repository: {len(healthy)}/{len(results)} sehat"
+        if healthy:
+            message += f", tercepat {healthy[0]['host']} ({healthy[0]['total_ms']:.0f} ms)"
+        self._log(message)
+    
+    def _resume_jobs(self):
+        """Lanjutkan download yang belum selesai saat aplikasi terakhir ditutup."""
+        recovered = self.jobs.recover()
+        if recovered:
+            self._log(f"♻️ {recovered} download terputus dari sesi sebelumnya")
+        folder = self.download_folder.resolve()
+        # Hanya job GUI: job CLI (get/batch) dilanjutkan oleh CLI
+        jobs = [job for job in self.jobs.unfinished(origin='gui') if Path(job.folder) == folder]
+        # Job yang sudah diklaim jendela GUI lain yang masih terbuka dilewati
+        jobs = [job for job in jobs if self.jobs.start(job.id)]
+        if not jobs:
+            return
+        self._log(f"⏯️ Melanjutkan {len(jobs)} download dari antrian")
+        for job in jobs:
+            future = self.engine.submit_fetch(
+                job.url,
+                job.filename,
+                on_progress=lambda downloaded, total, job_id=job.id: self.jobs.progress(job_id, downloaded, total),
+                reject_html=True,
+                unique=True
+            )
+            future.add_done_callback(lambda f, job=job: self._on_resumed_job_done(job, f))
+    
+    def _on_resumed_job_done(self, job, future):
+        """Catat hasil download lanjutan (dipanggil dari thread engine)."""
+        self._record_job(job.id, future)
+        if future.cancelled():
+            return
+        error = future.exception()
+        if error is None:
+            self._log(f"✅ Lanjutan selesai: {future.result()[0]}")
+        else:
+            self._log(f"❌ Lanjutan gagal: {job.url}: {error}")
+    
+    def _record_job(self, job_id, future):
+        """
+        Catat hasil download ke antrian job.
+        
+        Dipanggil dari thread engine, supaya hasil tetap tercatat walaupun
+        window sudah ditutup sebelum event Tk diproses. Download yang
+        dibatalkan saat window ditutup tidak dicatat gagal: JobQueue.close()
+        mengembalikannya ke antrian.
+        """
+        if future.cancelled() or self._closing:
+            return
+        error = future.exception()
+        if error is None:
+            filepath, size = future.result()
+            self.jobs.finish(job_id, filepath, size)
+        else:
+            self.jobs.fail(job_id, error)
     
     def _create_search_tab(self, parent):
         # Info banner
@@ -429,6 +950,7 @@ class EbookDownloaderGUI:
             ("Semua", "all"),
             ("Repository Indonesia", "repo_id"),
             ("Google Scholar", "scholar"),
+            ("Perpustakaan Lokal", "library"),
         ]
         
         for text, value in sources:
@@ -504,14 +1026,11 @@ class EbookDownloaderGUI:
         )
         self.results_scrollbar = ttk.Scrollbar(
             results_container, 
-            orient=tk.VERTICAL, 
-            command=self.results_canvas.yview
+            orient=tk.VERTICAL
         )
         
         self.results_inner = tk.Frame(self.results_canvas, bg=ModernStyle.BG_CARD)
         
-        self.results_canvas.configure(yscrollcommand=self.results_scrollbar.set)
-        
         self.results_scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
         self.results_canvas.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
         
@@ -521,20 +1040,33 @@ class EbookDownloaderGUI:
             anchor=tk.NW
         )
         
-        self.results_inner.bind("<Configure>", self._on_results_configure)
         self.results_canvas.bind("<Configure>", self._on_canvas_configure)
         
+        # Canvas sendiri tidak di-scroll: daftar virtual yang menggerakkan scrollbar
+        self.result_list = VirtualResultList(
+            self.results_canvas,
+            self.results_inner,
+            on_download=self._download_from_search,
+            yscrollcommand=self.results_scrollbar.set
+        )
+        self.results_scrollbar.config(command=self.result_list.yview)
+        
         self._show_search_placeholder()
     
-    def _on_results_configure(self, event):
-        self.results_canvas.configure(scrollregion=self.results_canvas.bbox("all"))
-    
     def _on_canvas_configure(self, event):
-        self.results_canvas.itemconfig(self.canvas_window, width=event.width)
+        # Frame isi selalu seukuran viewport
+        self.results_canvas.itemconfig(self.canvas_window, width=event.width, height=event.height)
+        self.result_list.refresh()
     
-    def _show_search_placeholder(self):
+    def _clear_results(self):
+        """Kosongkan area hasil (baris virtual disimpan untuk dipakai ulang)."""
         for widget in self.results_inner.winfo_children():
-            widget.destroy()
+            if not self.result_list.is_row(widget):
+                widget.destroy()
+        self.result_list.clear()
+    
+    def _show_search_placeholder(self):
+        self._clear_results()
         
         placeholder = tk.Label(
             self.results_inner,
@@ -585,7 +1117,8 @@ class EbookDownloaderGUI:
         tips_text = tk.Label(
             tips_frame,
             text="💡 Tips: URL yang valid biasanya berakhiran .pdf atau langsung mengarah ke file. "
-                 "Contoh: https://repository.upi.edu/files/thesis.pdf",
+                 "Contoh: https://repository.upi.edu/files/thesis.pdf. "
+                 "Punya beberapa mirror? Pisahkan URL dengan spasi, yang tercepat dipakai.",
             font=ModernStyle.FONT_SMALL,
             fg=ModernStyle.TEXT_PRIMARY,
             bg=ModernStyle.ACCENT_INFO,
@@ -614,6 +1147,8 @@ class EbookDownloaderGUI:
         self.url_entry.bind("<FocusIn>", self._on_url_focus_in)
         self.url_entry.bind("<FocusOut>", self._on_url_focus_out)
         self.url_entry.bind("<Return>", lambda e: self._start_download())
+        # Isi kolom baru berubah setelah event paste diproses
+        self.url_entry.bind("<<Paste>>", lambda e: self.root.after_idle(self._preflight_url), add="+")
         
         download_btn = AnimatedButton(
             url_row, 
@@ -627,6 +1162,16 @@ class EbookDownloaderGUI:
         )
         download_btn.pack(side=tk.RIGHT)
         
+        # Info file dari preflight (ukuran, tipe) sebelum download dimulai
+        self.preflight_label = tk.Label(
+            url_inner,
+            text="",
+            font=ModernStyle.FONT_SMALL,
+            fg=ModernStyle.TEXT_SECONDARY,
+            bg=ModernStyle.BG_CARD
+        )
+        self.preflight_label.pack(anchor=tk.W, pady=(6, 0))
+        
         # Folder selection
         folder_row = tk.Frame(url_inner, bg=ModernStyle.BG_CARD)
         folder_row.pack(fill=tk.X, pady=(15, 0))
@@ -662,6 +1207,72 @@ class EbookDownloaderGUI:
         open_folder_btn.pack(side=tk.LEFT, padx=(15, 0))
         open_folder_btn.bind("<Button-1>", lambda e: os.startfile(self.download_folder))
         
+        # Rename PDF dari metadata (judul/penulis) setelah download selesai
+        self.rename_pdfs = tk.BooleanVar(value=False)
+        tk.Checkbutton(
+            folder_row,
+            text="✏️ Beri nama dari metadata PDF",
+            variable=self.rename_pdfs,
+            command=lambda: setattr(self.downloader, 'rename_pdfs', self.rename_pdfs.get()),
+            font=ModernStyle.FONT_SMALL,
+            fg=ModernStyle.TEXT_SECONDARY,
+            bg=ModernStyle.BG_CARD,
+            selectcolor=ModernStyle.BG_INPUT,
+            activebackground=ModernStyle.BG_CARD,
+            activeforeground=ModernStyle.ACCENT_PRIMARY
+        ).pack(side=tk.LEFT, padx=(15, 0))
+        
+        # Batas kecepatan (berlaku langsung untuk download yang sedang berjalan)
+        limit_row = tk.Frame(url_inner, bg=ModernStyle.BG_CARD)
+        limit_row.pack(fill=tk.X, pady=(10, 0))
+        
+        tk.Label(
+            limit_row,
+            text="🚦 Batas kecepatan",
+            font=ModernStyle.FONT_SMALL,
+            fg=ModernStyle.TEXT_MUTED,
+            bg=ModernStyle.BG_CARD
+        ).pack(side=tk.LEFT)
+        
+        limits = self.downloader.limiter.limits()
+        self.limit_entries = {}
+        for key, label, value in (
+            ('global_bps', "Total", format_rate(limits['global_bps'], suffix="") if limits['global_bps'] else "0"),
+            ('host_bps', "Per host", format_rate(limits['host_bps'], suffix="") if limits['host_bps'] else "0"),
+            ('host_rps', "Request/detik", f"{limits['host_rps']:g}"),
+        ):
+            tk.Label(
+                limit_row,
+                text=label,
+                font=ModernStyle.FONT_SMALL,
+                fg=ModernStyle.TEXT_SECONDARY,
+                bg=ModernStyle.BG_CARD
+            ).pack(side=tk.LEFT, padx=(15, 5))
+            entry = tk.Entry(
+                limit_row,
+                width=7,
+                font=ModernStyle.FONT_SMALL,
+                bg=ModernStyle.BG_INPUT,
+                fg=ModernStyle.TEXT_PRIMARY,
+                insertbackground=ModernStyle.TEXT_PRIMARY,
+                relief=tk.FLAT
+            )
+            entry.insert(0, value)
+            entry.pack(side=tk.LEFT, ipady=3)
+            entry.bind("<Return>", self._apply_rate_limits)
+            self.limit_entries[key] = entry
+        
+        apply_limit_btn = tk.Label(
+            limit_row,
+            text="✔️ Terapkan",
+            font=ModernStyle.FONT_SMALL,
+            fg=ModernStyle.ACCENT_PRIMARY,
+            bg=ModernStyle.BG_CARD,
+            cursor="hand2"
+        )
+        apply_limit_btn.pack(side=tk.LEFT, padx=(15, 0))
+        apply_limit_btn.bind("<Button-1>", self._apply_rate_limits)
+        
         # Progress section
         progress_card = tk.Frame(parent, bg=ModernStyle.BG_CARD)
         progress_card.pack(fill=tk.X, pady=(0, 15), padx=5)
@@ -741,6 +1352,7 @@ class EbookDownloaderGUI:
         log_scroll = tk.Scrollbar(log_frame, command=self.log_text.yview)
         log_scroll.pack(side=tk.RIGHT, fill=tk.Y)
         self.log_text.config(yscrollcommand=log_scroll.set)
+        self.log_sink.attach(self.log_text)
         
         self._log("✨ Selamat datang di Ebook Downloader!")
         self._log("💡 Paste URL file PDF/ebook lalu klik Download")
@@ -772,45 +1384,14 @@ class EbookDownloaderGUI:
         )
         info_desc.pack(anchor=tk.W, pady=(2, 0))
         
-        # Repository grid
+        # Repository grid, diurutkan menurut kesehatan host (lihat _layout_repo_cards)
         repos_frame = tk.Frame(parent, bg=ModernStyle.BG_PRIMARY)
         repos_frame.pack(fill=tk.BOTH, expand=True, padx=5)
         
-        repositories = [
-            ("🔬 ResearchGate", "https://www.researchgate.net", 
-             "Jurnal & Paper", "Download paper ilmiah gratis"),
-            ("📚 Scribd", "https://www.scribd.com", 
-             "Ebook & Dokumen", "Perpustakaan digital gratis"),
-            ("🔍 Google Scholar", "https://scholar.google.com", 
-             "Pencarian Akademik", "Cari paper & jurnal"),
-            ("🎓 Repository UMJ", "https://repository.umj.ac.id", 
-             "Univ. Muhammadiyah JKT", "Skripsi & tesis"),
-            ("📖 Repository USD", "https://repository.usd.ac.id", 
-             "Univ. Sanata Dharma", "Karya ilmiah"),
-            ("🏛️ Perpusnas Digital", "https://e-resources.perpusnas.go.id", 
-             "Perpustakaan Nasional", "E-resources WNI"),
-            ("📕 Open Library", "https://openlibrary.org", 
-             "Internet Archive", "Jutaan buku digital"),
-            ("📗 Project Gutenberg", "https://www.gutenberg.org", 
-             "Buku Klasik", "60K+ ebook gratis"),
-            ("📘 Library Genesis", "https://libgen.is", 
-             "Perpustakaan Digital", "Paper akademik"),
-            ("🎓 Repository UPI", "http://repository.upi.edu", 
-             "Univ. Pendidikan ID", "Karya pendidikan"),
-            ("📚 Repository UNY", "https://eprints.uny.ac.id", 
-             "Univ. Negeri Yogya", "Repository ilmiah"),
-            ("🏫 Repository UGM", "https://etd.repository.ugm.ac.id", 
-             "Univ. Gadjah Mada", "Tesis & disertasi"),
-        ]
-        
-        for i, (name, url, subtitle, desc) in enumerate(repositories):
-            row = i // 3
-            col = i % 3
-            
+        health = get_health_store()
+        self.repo_cards = {}
+        for name, url, subtitle, desc in SOURCE_SITES:
             repo_card = tk.Frame(repos_frame, bg=ModernStyle.BG_CARD, cursor="hand2")
-            repo_card.grid(row=row, column=col, padx=5, pady=5, sticky="nsew")
-            repos_frame.columnconfigure(col, weight=1)
-            repos_frame.rowconfigure(row, weight=1)
             
             inner = tk.Frame(repo_card, bg=ModernStyle.BG_CARD)
             inner.pack(fill=tk.BOTH, expand=True, padx=15, pady=12)
@@ -843,10 +1424,35 @@ class EbookDownloaderGUI:
             )
             desc_label.pack(anchor=tk.W, pady=(3, 0))
             
-            for widget in [repo_card, inner, name_label, subtitle_label, desc_label]:
+            health_label = tk.Label(
+                inner,
+                text=health.describe(host_of(url)),
+                font=(ModernStyle.FONT_FAMILY, 8),
+                fg=ModernStyle.TEXT_SECONDARY,
+                bg=ModernStyle.BG_CARD
+            )
+            health_label.pack(anchor=tk.W, pady=(3, 0))
+            
+            for widget in [repo_card, inner, name_label, subtitle_label, desc_label, health_label]:
                 widget.bind("<Button-1>", lambda e, u=url: webbrowser.open(u))
                 widget.bind("<Enter>", lambda e, rc=repo_card: rc.configure(bg=ModernStyle.BG_SECONDARY))
                 widget.bind("<Leave>", lambda e, rc=repo_card: rc.configure(bg=ModernStyle.BG_CARD))
+            
+            self.repo_cards[url] = (repo_card, health_label)
+        
+        self._layout_repo_cards()
+    
+    def _layout_repo_cards(self):
+        """Susun ulang kartu repository: host sehat dan cepat di atas, yang bermasalah di bawah."""
+        health = get_health_store()
+        for i, url in enumerate(health.rank(list(self.repo_cards))):
+            repo_card, health_label = self.repo_cards[url]
+            row = i // 3
+            col = i % 3
+            repo_card.grid(row=row, column=col, padx=5, pady=5, sticky="nsew")
+            repo_card.master.columnconfigure(col, weight=1)
+            repo_card.master.rowconfigure(row, weight=1)
+            health_label.config(text=health.describe(host_of(url)))
     
     def _create_status_bar(self, parent):
         status_frame = tk.Frame(parent, bg=ModernStyle.BG_SECONDARY)
@@ -882,30 +1488,108 @@ class EbookDownloaderGUI:
         if not self.url_entry.get():
             self.url_entry.insert(0, "https://example.com/ebook.pdf")
             self.url_entry.config(fg=ModernStyle.TEXT_MUTED)
+        self._preflight_url()
+    
+    def _preflight_url(self):
+        """
+        Mulai preflight spekulatif untuk URL di kolom download: DNS, koneksi,
+        redirect dan info file sudah siap sebelum tombol Download diklik.
+        """
+        urls = self.url_entry.get().split()
+        if len(urls) != 1 or not urls[0].startswith(('http://', 'https://')):
+            return
+        url = urls[0]
+        if url in ("https://example.com/ebook.pdf", self._preflight_pending):
+            return
+        if self.engine is not None and self.downloader.preflight_for(url):
+            return
+        self._start_services()
+        self._preflight_pending = url
+        self.preflight_label.config(text="🔎 Memeriksa file...", fg=ModernStyle.TEXT_MUTED)
+        future = self.engine.submit_preflight(url)
+        future.add_done_callback(lambda f: self.events.post(self._on_preflight_done, url, f, key='preflight'))
+    
+    def _on_preflight_done(self, url, future):
+        """Tampilkan hasil preflight jika URL di kolom belum berganti (thread Tk)."""
+        if self._preflight_pending == url:
+            self._preflight_pending = None
+        if self.url_entry.get().strip() != url:
+            return
+        error = future.exception()
+        if error is not None:
+            self.preflight_label.config(text=f"⚠️ Server belum bisa dihubungi: {error}",
+                                        fg=ModernStyle.ACCENT_WARNING)
+            return
+        result = future.result()
+        if not result.ok:
+            # Sebagian server menolak HEAD tetapi tetap melayani download biasa
+            self.preflight_label.config(text=f"ℹ️ Info file tidak tersedia (HTTP {result.status})",
+                                        fg=ModernStyle.TEXT_MUTED)
+            return
+        if result.is_html:
+            self.preflight_label.config(text="⚠️ URL mengarah ke halaman web (HTML), bukan file ebook",
+                                        fg=ModernStyle.ACCENT_WARNING)
+            return
+        parts = [f"📄 {result.filename}"]
+        if result.size:
+            parts.append(f"{result.size / 1024 / 1024:.2f} MB")
+        if result.content_type:
+            parts.append(result.content_type.split(';')[0])
+        if result.accept_ranges:
+            parts.append("bisa dilanjutkan")
+        if result.final_url != url:
+            parts.append(f"dialihkan ke {urlparse(result.final_url).netloc}")
+        self.preflight_label.config(text=" · ".join(parts), fg=ModernStyle.TEXT_SECONDARY)
     
     def _change_folder(self, event=None):
         folder = filedialog.askdirectory(title="Pilih Folder Download")
         if folder:
             self.download_folder = Path(folder)
+            self.downloader.download_folder = self.download_folder
             self.folder_label.config(text=f"📁 Folder: {self.download_folder.absolute()}")
             self._log(f"📁 Folder download diubah ke: {self.download_folder}")
+            if self.engine is not None:
+                self._index_library()
+    
+    def _apply_rate_limits(self, event=None):
+        """Terapkan batas kecepatan dari form dan simpan untuk sesi berikutnya."""
+        try:
+            global_bps = parse_rate(self.limit_entries['global_bps'].get())
+            host_bps = parse_rate(self.limit_entries['host_bps'].get())
+            host_rps = float(self.limit_entries['host_rps'].get().strip() or 0)
+        except ValueError as e:
+            messagebox.showwarning("Peringatan", f"{e}\n\nContoh: 500K, 2M, atau 0 untuk tanpa batas")
+            return
+        limiter = self.downloader.limiter
+        limiter.set_limits(global_bps, host_bps, host_rps)
+        limiter.save()
+        requests_text = f"{host_rps:g} request/detik" if host_rps else "tanpa batas"
+        self._log(f"🚦 Batas kecepatan: total {format_rate(global_bps)}, "
+                  f"per host {format_rate(host_bps)}, {requests_text}")
     
     def _log(self, message):
-        self.log_text.insert(tk.END, f"{message}\n")
-        self.log_text.see(tk.END)
+        """Tambah baris log (aman dipanggil dari thread mana pun)."""
+        self.log_sink.write(message)
     
     def _clear_log(self):
-        self.log_text.delete(1.0, tk.END)
+        self.log_sink.clear()
         self._log("📋 Log dibersihkan")
     
     def _update_status(self, status, color=None):
+        """Perbarui label status (aman dari thread mana pun; hanya nilai terakhir per tick)."""
+        self.events.post(self._apply_status, status, color, key='status')
+    
+    def _apply_status(self, status, color):
         self.download_status.config(text=f"Status: {status}")
         if color:
             self.download_status.config(fg=color)
     
     def _update_progress(self, value):
+        """Perbarui progress bar (aman dari thread mana pun; hanya nilai terakhir per tick)."""
+        self.events.post(self._apply_progress, value, key='progress')
+    
+    def _apply_progress(self, value):
         self.progress_bar['value'] = value
-        self.root.update_idletasks()
     
     # Search functions
     def _start_search(self):
@@ -915,100 +1599,65 @@ class EbookDownloaderGUI:
             messagebox.showwarning("Peringatan", "Masukkan kata kunci pencarian!")
             return
         
-        for widget in self.results_inner.winfo_children():
-            widget.destroy()
-        
-        loading_label = tk.Label(
-            self.results_inner,
-            text="🔄 Membuat link pencarian...",
-            font=ModernStyle.FONT_BODY,
-            fg=ModernStyle.TEXT_SECONDARY,
-            bg=ModernStyle.BG_CARD
-        )
-        loading_label.pack(pady=30)
-        
-        self.results_count.config(text="Memproses...")
-        self.status_bar.config(text=f"🔍 Mencari: {query}")
-        
-        thread = threading.Thread(target=self._perform_search, args=(query,))
-        thread.daemon = True
-        thread.start()
-    
-    def _perform_search(self, query):
+        self._start_services()
         source = self.search_source.get()
-        results = []
-        
-        try:
-            if source == "all" or source == "repo_id":
-                results.extend(self._search_indonesian_repos(query))
-            
-            if source == "all" or source == "scholar":
-                results.extend(self._search_google_scholar(query))
+        self._current_search = (query, source)
+        cached = self.search_cache.get(query, source)
+        if cached:
+            results, fresh = cached
+            self._display_results(results)
+            self._log_search_cache(query, fresh)
+            if fresh:
+                return
+            # Hasil basi tetap ditampilkan; perbarui di latar belakang
+            self.status_bar.config(text=f"🔄 Memperbarui hasil: {query}")
+        else:
+            self._clear_results()
             
-            self.root.after(0, lambda: self._display_results(results))
+            loading_label = tk.Label(
+                self.results_inner,
+                text="🔄 Mencari di repository...",
+                font=ModernStyle.FONT_BODY,
+                fg=ModernStyle.TEXT_SECONDARY,
+                bg=ModernStyle.BG_CARD
+            )
+            loading_label.pack(pady=30)
             
-        except Exception as e:
-            self.root.after(0, lambda: self._show_search_error(str(e)))
-    
-    def _search_google_scholar(self, query):
-        """Create Google Scholar search links."""
-        results = []
-        encoded = quote_plus(query)
-        
-        results.append({
-            'title': f"📚 Cari '{query}' di Google Scholar",
-            'url': f"https://scholar.google.com/scholar?q={encoded}",
-            'source': 'Scholar',
-            'description': 'Cari paper dan jurnal akademik',
-            'is_direct': False
-        })
-        
-        results.append({
-            'title': f"📄 Cari '{query}' PDF di Google",
-            'url': f"https://www.google.com/search?q={encoded}+filetype:pdf",
-            'source': 'Google',
-            'description': 'Cari file PDF langsung',
-            'is_direct': False
-        })
-        
-        return results
-    
-    def _search_indonesian_repos(self, query):
-        """Create Indonesian repository search links."""
-        results = []
-        encoded = quote_plus(query)
-        
-        # Direct repo searches
-        repos = [
-            ("Repository UPI", "repository.upi.edu", "Universitas Pendidikan Indonesia"),
-            ("Repository UMJ", "repository.umj.ac.id", "Universitas Muhammadiyah Jakarta"),
-            ("Repository UNY", "eprints.uny.ac.id", "Universitas Negeri Yogyakarta"),
-            ("Repository UGM", "etd.repository.ugm.ac.id", "Universitas Gadjah Mada"),
-        ]
+            self.results_count.config(text="Memproses...")
+            self.status_bar.config(text=f"🔍 Mencari: {query}")
         
-        for name, domain, desc in repos:
-            results.append({
-                'title': f"🎓 Cari '{query}' di {name}",
-                'url': f"https://www.google.com/search?q={encoded}+site:{domain}+filetype:pdf",
-                'source': 'Repo ID',
-                'description': f'Cari PDF di {desc}',
-                'is_direct': False
-            })
-        
-        # General Indonesian academic search
-        results.append({
-            'title': f"🇮🇩 Cari '{query}' di semua universitas Indonesia",
-            'url': f"https://www.google.com/search?q={encoded}+site:ac.id+filetype:pdf",
-            'source': 'Repo ID',
-            'description': 'Cari PDF di semua universitas Indonesia (.ac.id)',
-            'is_direct': False
-        })
-        
-        return results
+        future = self.engine.submit_search(query, self._search_sources(source))
+        future.add_done_callback(
+            lambda f: self.events.post(self._on_search_done, query, source, f, cached is not None))
+    
+    def _log_search_cache(self, query, fresh):
+        stats = self.search_cache.stats()
+        state = "cache" if fresh else "cache basi, diperbarui"
+        self._log(f"🔎 '{query}' dari {state} (hit rate {stats['hit_rate']:.0%}, "
+                  f"{stats['entries']} entri)")
+    
+    def _search_sources(self, source):
+        """Fungsi pencarian yang dijalankan untuk pilihan sumber."""
+        from repository_search import search_sources
+        return search_sources(source)
+    
+    def _on_search_done(self, query, source, future, refreshing=False):
+        try:
+            results = future.result()
+        except Exception as e:
+            if refreshing:
+                # Hasil dari cache sudah tampil; cukup laporkan kegagalan
+                self._log(f"⚠️ Gagal memperbarui hasil '{query}': {e}")
+            elif self._current_search == (query, source):
+                self._show_search_error(str(e))
+            return
+        self.search_cache.put(query, source, results)
+        # Jangan timpa hasil pencarian lain yang dimulai sesudahnya
+        if self._current_search == (query, source):
+            self._display_results(results)
     
     def _display_results(self, results):
-        for widget in self.results_inner.winfo_children():
-            widget.destroy()
+        self._clear_results()
         
         if not results:
             no_results = tk.Label(
@@ -1022,23 +1671,14 @@ class EbookDownloaderGUI:
             self.results_count.config(text="0 hasil")
             return
         
-        self.results_count.config(text=f"{len(results)} link pencarian")
-        self.status_bar.config(text=f"✅ {len(results)} link pencarian tersedia")
+        direct = sum(1 for result in results if result.get('is_direct'))
+        self.results_count.config(text=f"{len(results)} hasil ({direct} PDF langsung)")
+        self.status_bar.config(text=f"✅ {len(results)} hasil, {direct} PDF bisa langsung didownload")
         
-        for result in results:
-            SearchResultItem(
-                self.results_inner,
-                title=result['title'],
-                url=result['url'],
-                source=result['source'],
-                description=result.get('description', ''),
-                is_direct_download=result.get('is_direct', False),
-                on_download=self._download_from_search
-            )
+        self.result_list.set_results(results)
     
     def _show_search_error(self, error):
-        for widget in self.results_inner.winfo_children():
-            widget.destroy()
+        self._clear_results()
         
         error_label = tk.Label(
             self.results_inner,
@@ -1051,12 +1691,30 @@ class EbookDownloaderGUI:
         self.results_count.config(text="Error")
     
     def _download_from_search(self, url):
-        self.notebook.select(1)
+        self._select_tab(1)
         self.url_entry.delete(0, tk.END)
         self.url_entry.insert(0, url)
         self.url_entry.config(fg=ModernStyle.TEXT_PRIMARY)
         self._start_download()
     
+    def _log_pdf_metadata(self, filepath):
+        """Tulis judul, penulis, jumlah halaman dan status enkripsi PDF ke log."""
+        if not is_pdf(filepath):
+            return
+        try:
+            meta = read_pdf_metadata(filepath)
+        except (OSError, ValueError) as e:
+            self._log(f"📖 Metadata PDF tidak terbaca: {e}")
+            return
+        self._log(f"📖 {describe_pdf(meta)}")
+    
+    def _log_pool_stats(self, url):
+        """Tulis statistik pemakaian ulang koneksi untuk host URL ke log."""
+        host = urlparse(url.split()[0]).hostname
+        stats = self.pool.stats()
+        if host in stats:
+            self._log(f"🔌 {format_pool_stats({host: stats[host]})[0]}")
+    
     # Download functions
     def _start_download(self):
         url = self.url_entry.get().strip()
@@ -1065,9 +1723,11 @@ class EbookDownloaderGUI:
             messagebox.showwarning("Peringatan", "Masukkan URL terlebih dahulu!")
             return
         
-        if not url.startswith(('http://', 'https://')):
+        urls = url.split()
+        if not all(u.startswith(('http://', 'https://')) for u in urls):
             messagebox.showwarning("Peringatan", "URL harus dimulai dengan http:// atau https://")
             return
+        url = ' '.join(urls)
         
         # Check if it's a search URL
         if 'google.com/search' in url or 'scholar.google.com' in url:
@@ -1078,157 +1738,144 @@ class EbookDownloaderGUI:
                 webbrowser.open(url)
             return
         
-        thread = threading.Thread(target=self._download_file, args=(url,))
-        thread.daemon = True
-        thread.start()
+        self._start_services()
+        self._update_status("Menghubungi server...", ModernStyle.ACCENT_WARNING)
+        self._log(f"\n📥 Mengunduh: {urls[0]}")
+        if len(urls) > 1:
+            self._log(f"🏁 {len(urls)} mirror: mirror berikutnya ikut dicoba jika yang pertama lambat")
+        else:
+            preflight = self.downloader.preflight_for(url)
+            if preflight is not None:
+                self._log(f"⚡ Koneksi sudah disiapkan ({preflight.elapsed * 1000:.0f} ms lebih awal)")
+        self._update_progress(0)
+        
+        job_id = self.jobs.add(url, self.download_folder.resolve(), origin='gui')
+        self.jobs.start(job_id)
+        
+        def on_progress(downloaded, total_size):
+            self.jobs.progress(job_id, downloaded, total_size)
+            self._on_download_progress(downloaded, total_size)
+        
+        future = self.engine.submit_fetch(
+            url,
+            on_start=self._on_download_start,
+            on_progress=on_progress,
+            reject_html=True
+        )
+        future.add_done_callback(lambda f: self._record_job(job_id, f))
+        future.add_done_callback(lambda f: self.events.post(self._finish_download, url, f))
     
-    def _sanitize_filename(self, filename):
-        invalid_chars = '<>:"/\\|?*'
-        for char in invalid_chars:
-            filename = filename.replace(char, '_')
-        return filename[:200]
+    def _on_download_start(self, path, total_size, offset, content_type):
+        self._log(f"📋 Content-Type: {content_type}")
+        self._update_status("Mengunduh...", ModernStyle.ACCENT_PRIMARY)
+        self._log(f"📄 Nama file: {path.name}")
+        if total_size > 0:
+            self._log(f"📊 Ukuran: {total_size / 1024 / 1024:.2f} MB")
+        if offset > 0:
+            self._log(f"⏯️ Melanjutkan dari {offset / 1024 / 1024:.2f} MB")
     
-    def _is_valid_pdf(self, filepath):
-        """Check if file is a valid PDF."""
-        try:
-            with open(filepath, 'rb') as f:
-                header = f.read(8)
-                return header.startswith(b'%PDF')
-        except:
-            return False
+    def _on_download_progress(self, downloaded, total_size):
+        if total_size > 0:
+            self._update_progress((downloaded / total_size) * 100)
     
-    def _download_file(self, url):
+    def _finish_download(self, url, future):
+        """Tangani hasil download dari engine (dipanggil di thread Tk)."""
         try:
-            self._update_status("Menghubungi server...", ModernStyle.ACCENT_WARNING)
-            self._log(f"\n📥 Mengunduh: {url}")
-            self._update_progress(0)
-            
-            response = requests.get(url, headers=self.headers, stream=True, timeout=60, allow_redirects=True)
-            response.raise_for_status()
-            
-            # Check content type
-            content_type = response.headers.get('Content-Type', '').lower()
-            self._log(f"📋 Content-Type: {content_type}")
-            
-            # Warning if it's HTML
-            if 'text/html' in content_type:
-                self._update_status("⚠️ Bukan file PDF!", ModernStyle.ACCENT_WARNING)
-                self._log("⚠️ PERINGATAN: Server mengembalikan halaman HTML, bukan file PDF!")
-                self._log("   Kemungkinan penyebab:")
-                self._log("   - URL adalah halaman web, bukan link download langsung")
-                self._log("   - File memerlukan login atau akses khusus")
-                self._log("   - Server redirect ke halaman lain")
-                self._log("💡 Coba buka URL di browser dan cari link download langsung")
-                
-                self.root.after(0, lambda: messagebox.showwarning(
-                    "Bukan File PDF",
-                    "URL ini mengembalikan halaman HTML, bukan file PDF.\n\n"
-                    "Kemungkinan penyebab:\n"
-                    "• URL adalah halaman web, bukan link download\n"
-                    "• File memerlukan login\n\n"
-                    "Solusi:\n"
-                    "1. Buka URL di browser\n"
-                    "2. Cari tombol 'Download PDF'\n"
-                    "3. Klik kanan pada tombol download\n"
-                    "4. Pilih 'Copy link address'\n"
-                    "5. Paste link tersebut di sini"
-                ))
-                self._update_progress(0)
-                return
-            
-            # Determine filename
-            content_disp = response.headers.get('Content-Disposition')
-            filename = None
-            
-            if content_disp and 'filename=' in content_disp:
-                matches = re.findall('filename="?([^"]+)"?', content_disp)
-                filename = matches[0] if matches else None
-            
-            if not filename:
-                parsed_url = urlparse(url)
-                filename = unquote(os.path.basename(parsed_url.path))
-            
-            if not filename or filename == '' or '.' not in filename:
-                if 'pdf' in content_type:
-                    filename = 'ebook_downloaded.pdf'
-                elif 'epub' in content_type:
-                    filename = 'ebook_downloaded.epub'
-                else:
-                    filename = 'ebook_downloaded.pdf'
-            
-            filename = self._sanitize_filename(filename)
-            filepath = self.download_folder / filename
-            
-            total_size = int(response.headers.get('content-length', 0))
-            downloaded = 0
-            
-            self._update_status("Mengunduh...", ModernStyle.ACCENT_PRIMARY)
-            self._log(f"📄 Nama file: {filename}")
-            if total_size > 0:
-                self._log(f"📊 Ukuran: {total_size / 1024 / 1024:.2f} MB")
-            
-            with open(filepath, 'wb') as f:
-                for chunk in response.iter_content(chunk_size=8192):
-                    if chunk:
-                        f.write(chunk)
-                        downloaded += len(chunk)
-                        if total_size > 0:
-                            progress = (downloaded / total_size) * 100
-                            self._update_progress(progress)
+            filepath, _ = future.result()
+            filename = filepath.name
             
             self._update_progress(100)
+            self._log_pool_stats(url)
             
-            # Validate downloaded file
-            is_pdf = self._is_valid_pdf(filepath)
+            # Jenis file (HTML) dan keutuhan PDF (%%EOF) sudah diperiksa saat streaming
+            self._update_status("Selesai! ✅", ModernStyle.ACCENT_SUCCESS)
+            self._log(f"✅ Berhasil! Disimpan di: {filepath}")
+            self._log_pdf_metadata(filepath)
+            self._index_library(filepath)
+            self.status_bar.config(text=f"✅ Download selesai: {filename}")
             
-            if not is_pdf and filename.endswith('.pdf'):
-                self._update_status("⚠️ File bukan PDF valid!", ModernStyle.ACCENT_WARNING)
-                self._log("⚠️ File yang didownload BUKAN PDF valid!")
-                self._log("   File mungkin berisi halaman HTML atau error")
-                
-                # Rename to .html for inspection
-                new_path = filepath.with_suffix('.html')
-                filepath.rename(new_path)
-                self._log(f"   File di-rename ke: {new_path.name}")
-                
-                self.root.after(0, lambda: messagebox.showwarning(
-                    "File Bukan PDF",
-                    f"File yang didownload bukan PDF valid.\n\n"
-                    f"File telah disimpan sebagai:\n{new_path.name}\n\n"
-                    f"Buka file tersebut di browser untuk melihat isinya "
-                    f"dan cari link download yang benar."
-                ))
-            else:
-                self._update_status("Selesai! ✅", ModernStyle.ACCENT_SUCCESS)
-                self._log(f"✅ Berhasil! Disimpan di: {filepath}")
-                self.status_bar.config(text=f"✅ Download selesai: {filename}")
-                
-                self.root.after(0, lambda: messagebox.showinfo(
-                    "Sukses", 
-                    f"Ebook berhasil didownload!\n\n📁 Lokasi:\n{filepath}"
-                ))
+            messagebox.showinfo(
+                "Sukses", 
+                f"Ebook berhasil didownload!\n\n📁 Lokasi:\n{filepath}"
+            )
+        
+        except ContentTypeError as e:
+            self._log(f"📋 Content-Type: {e.content_type}")
+            self._update_status("⚠️ Bukan file PDF!", ModernStyle.ACCENT_WARNING)
+            self._log("⚠️ PERINGATAN: Server mengembalikan halaman HTML, bukan file PDF!")
+            self._log("   Kemungkinan penyebab:")
+            self._log("   - URL adalah halaman web, bukan link download langsung")
+            self._log("   - File memerlukan login atau akses khusus")
+            self._log("   - Server redirect ke halaman lain")
+            self._log("💡 Coba buka URL di browser dan cari link download langsung")
             
+            messagebox.showwarning(
+                "Bukan File PDF",
+                "URL ini mengembalikan halaman HTML, bukan file PDF.\n\n"
+                "Kemungkinan penyebab:\n"
+                "• URL adalah halaman web, bukan link download\n"
+                "• File memerlukan login\n\n"
+                "Solusi:\n"
+                "1. Buka URL di browser\n"
+                "2. Cari tombol 'Download PDF'\n"
+                "3. Klik kanan pada tombol download\n"
+                "4. Pilih 'Copy link address'\n"
+                "5. Paste link tersebut di sini"
+            )
+            self._update_progress(0)
+        
+        except CorruptFileError as e:
+            self._update_status("⚠️ File tidak lengkap!", ModernStyle.ACCENT_WARNING)
+            self._log(f"⚠️ {e}")
+            self._log("💡 Coba download ulang; file yang rusak tidak disimpan")
+            messagebox.showwarning("File Tidak Lengkap", str(e))
+        
+        except CircuitOpenError as e:
+            self._update_status("Server tidak bisa dihubungi 🔌", ModernStyle.ACCENT_ERROR)
+            self._log(f"❌ {e}")
+            self._log("💡 Server gagal berulang kali; download ke server ini ditahan sementara")
+            messagebox.showerror("Error", str(e))
+        
         except requests.exceptions.Timeout:
             self._update_status("Timeout! ⏱️", ModernStyle.ACCENT_ERROR)
             self._log("❌ Error: Koneksi timeout")
-            self.root.after(0, lambda: messagebox.showerror("Error", "Koneksi timeout!"))
-            
+            messagebox.showerror("Error", "Koneksi timeout!")
+        
         except requests.exceptions.HTTPError as e:
             self._update_status("Error! ❌", ModernStyle.ACCENT_ERROR)
             self._log(f"❌ HTTP Error: {e}")
-            self.root.after(0, lambda: messagebox.showerror("Error", f"HTTP Error: {e}"))
-            
+            messagebox.showerror("Error", f"HTTP Error: {e}")
+        
         except Exception as e:
             self._update_status("Error! ❌", ModernStyle.ACCENT_ERROR)
             self._log(f"❌ Error: {e}")
-            self.root.after(0, lambda: messagebox.showerror("Error", f"Error: {e}"))
+            messagebox.showerror("Error", f"Error: {e}")
     
     def run(self):
-        self.root.mainloop()
+        try:
+            self.root.mainloop()
+        finally:
+            # Download yang masih berjalan dibatalkan lalu dikembalikan ke
+            # antrian (jobs.close), bukan dicatat gagal
+            self._closing = True
+            if self.engine is not None:
+                self.engine.stop()
+            if self.prober is not None:
+                self.prober.stop()
+            if self.search_cache is not None:
+                self.search_cache.close()
+            if self.jobs is not None:
+                self.jobs.close()
+            self.log_sink.close()
 
 
-def main():
-    app = EbookDownloaderGUI()
+def main(argv=None):
+    import argparse
+    parser = argparse.ArgumentParser(description="Ebook Downloader GUI")
+    parser.add_argument("--startup-report", action="store_true",
+                        help="Cetak waktu startup per fase setelah window tampil")
+    args = parser.parse_args(argv)
+    app = EbookDownloaderGUI(print_startup=args.startup_report)
     app.run()
 
 
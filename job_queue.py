@@ -0,0 +1,340 @@
+"""
+Job Queue untuk Ebook Downloader
+================================
+Antrian download yang tahan crash, disimpan di SQLite.
+
+Setiap job mencatat URL, status, jumlah byte yang sudah diterima, path
+tujuan dan error terakhir. Job 'running' dimiliki satu proses (owner
+host:pid) dengan lease yang diperpanjang heartbeat selama proses hidup.
+Job milik proses yang mati (crash, kill) dikembalikan ke 'queued' oleh
+recover() saat program dijalankan lagi; job milik proses lain yang masih
+hidup tidak disentuh, jadi GUI dan CLI bisa berjalan bersamaan tanpa dua
+penulis di file .part yang sama. close() mengembalikan job 'running' milik
+proses itu sendiri ke 'queued' (window ditutup, Ctrl+C). File .part yang
+tersisa di folder download membuat download tersebut dilanjutkan, bukan
+diulang.
+
+Status job: queued -> running -> done | failed
+"""
+
+import os
+import socket
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional
+
+DEFAULT_JOBS_DB = Path.home() / ".ebook_downloader" / "jobs.sqlite3"
+
+QUEUED = 'queued'
+RUNNING = 'running'
+DONE = 'done'
+FAILED = 'failed'
+
+
+@dataclass
+class Job:
+    """Satu baris antrian download."""
+    id: int
+    url: str
+    batch: Optional[str]
+    folder: str
+    filename: Optional[str]
+    state: str
+    bytes_done: int
+    total: int
+    path: Optional[str]
+    error: Optional[str]
+
+
+class JobQueue:
+    """Antrian job download di SQLite (aman dipakai dari banyak thread)."""
+    
+    # Progress ditulis ke disk paling sering sekali per interval ini per job
+    PROGRESS_INTERVAL = 1.0
+    # Lama job 'running' dianggap milik proses pemiliknya tanpa heartbeat (detik)
+    LEASE_SECONDS = 60.0
+    
+    def __init__(self, path=DEFAULT_JOBS_DB):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.owner = f"{socket.gethostname()}:{os.getpid()}"
+        self._lock = threading.Lock()
+        self._closed = False
+        self._stop = threading.Event()
+        self._heartbeat = None
+        self._last_progress = {}
+        self._db = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        with self._db:
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS jobs ("
+                " id INTEGER PRIMARY KEY, url TEXT NOT NULL, batch TEXT, folder TEXT NOT NULL,"
+                " filename TEXT, state TEXT NOT NULL, bytes_done INTEGER NOT NULL DEFAULT 0,"
+                " total INTEGER NOT NULL DEFAULT 0, path TEXT, error TEXT,"
+                " created_at REAL NOT NULL, updated_at REAL NOT NULL)"
+            )
+            # Satu URL hanya sekali per batch; batch NULL (GUI, get) boleh berulang
+            columns = {row[1] for row in self._db.execute("PRAGMA table_info(jobs)")}
+            for column, kind in (('owner', 'TEXT'), ('lease_until', 'REAL'), ('origin', 'TEXT')):
+                if column not in columns:
+                    self._db.execute(f"ALTER TABLE jobs ADD COLUMN {column} {kind}")
+            self._db.execute("CREATE UNIQUE INDEX IF NOT EXISTS jobs_batch_url ON jobs (batch, url)")
+            self._db.execute("CREATE INDEX IF NOT EXISTS jobs_state ON jobs (state)")
+    
+    def add(self, url, folder, filename=None, batch=None, origin=None):
+        """
+        Tambah satu job.
+        
+        Returns:
+            ID job (job lama dengan batch dan URL yang sama dipakai ulang)
+        """
+        return self.add_many([url], folder, batch, filename, origin)[0]
+    
+    def add_many(self, urls, folder, batch=None, filename=None, origin=None):
+        """
+        Tambah banyak job dalam satu transaksi.
+        
+        URL yang sudah ada di batch yang sama tidak ditambahkan lagi, jadi
+        batch yang dijalankan ulang hanya mengerjakan yang belum selesai.
+        
+        Args:
+            origin: Pembuat job (mis. 'gui'); lihat unfinished()
+        
+        Returns:
+            List ID job sesuai urutan urls
+        """
+        now = time.time()
+        ids = []
+        with self._lock, self._db:
+            for url in urls:
+                row = None
+                if batch is not None:
+                    row = self._db.execute(
+                        "SELECT id FROM jobs WHERE batch = ? AND url = ?", (batch, url)).fetchone()
+                if row is None:
+                    cursor = self._db.execute(
+                        "INSERT INTO jobs (url, batch, folder, filename, state, origin, created_at, updated_at)"
+                        " VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                        (url, batch, str(folder), filename, QUEUED, origin, now, now),
+                    )
+                    ids.append(cursor.lastrowid)
+                else:
+                    ids.append(row[0])
+        return ids
+    
+    def _update(self, job_id, **fields):
+        fields['updated_at'] = time.time()
+        columns = ", ".join(f"{name} = ?" for name in fields)
+        with self._lock:
+            if self._closed:
+                # Callback download yang selesai setelah close(): job sudah dikembalikan ke antrian
+                return
+            with self._db:
+                self._db.execute(f"UPDATE jobs SET {columns} WHERE id = ?", (*fields.values(), job_id))
+    
+    def start(self, job_id):
+        """
+        Klaim job untuk proses ini dan tandai berjalan.
+        
+        Returns:
+            False jika job sedang dikerjakan proses lain yang masih hidup
+            (lease belum habis); job itu jangan dijalankan
+        """
+        now = time.time()
+        with self._lock:
+            if self._closed:
+                return False
+            with self._db:
+                cursor = self._db.execute(
+                    "UPDATE jobs SET state = ?, owner = ?, lease_until = ?, error = NULL, updated_at = ?"
+                    " WHERE id = ? AND NOT (state = ? AND owner IS NOT ? AND lease_until > ?)",
+                    (RUNNING, self.owner, now + self.LEASE_SECONDS, now, job_id, RUNNING, self.owner, now),
+                )
+        claimed = cursor.rowcount == 1
+        if claimed:
+            self._start_heartbeat()
+        return claimed
+    
+    def _start_heartbeat(self):
+        with self._lock:
+            if self._heartbeat is not None:
+                return
+            self._heartbeat = threading.Thread(target=self._renew_leases, name="job-lease", daemon=True)
+        self._heartbeat.start()
+    
+    def _renew_leases(self):
+        """Perpanjang lease semua job 'running' milik proses ini selama proses hidup."""
+        while not self._stop.wait(self.LEASE_SECONDS / 4):
+            with self._lock:
+                if self._closed:
+                    return
+                with self._db:
+                    self._db.execute(
+                        "UPDATE jobs SET lease_until = ? WHERE state = ? AND owner = ?",
+                        (time.time() + self.LEASE_SECONDS, RUNNING, self.owner),
+                    )
+    
+    def progress(self, job_id, bytes_done, total=0):
+        """
+        Catat progress dan tandai job berjalan.
+        
+        Ditulis ke disk paling sering sekali per PROGRESS_INTERVAL, jadi aman
+        dipanggil untuk setiap chunk.
+        """
+        now = time.monotonic()
+        if now - self._last_progress.get(job_id, float('-inf')) < self.PROGRESS_INTERVAL:
+            return
+        self._last_progress[job_id] = now
+        self._update(job_id, state=RUNNING, bytes_done=bytes_done, total=total, owner=self.owner,
+                     lease_until=time.time() + self.LEASE_SECONDS)
+        self._start_heartbeat()
+    
+    def finish(self, job_id, path, size):
+        self._last_progress.pop(job_id, None)
+        self._update(job_id, state=DONE, path=str(Path(path).resolve()), bytes_done=size, total=size, error=None,
+                     owner=None, lease_until=None)
+    
+    def fail(self, job_id, error):
+        self._last_progress.pop(job_id, None)
+        self._update(job_id, state=FAILED, error=str(error), owner=None, lease_until=None)
+    
+    def requeue_missing(self, batch=None):
+        """
+        Kembalikan job 'done' yang file hasilnya sudah tidak ada ke 'queued'.
+        
+        Returns:
+            Jumlah job yang diantrikan ulang
+        """
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT id, path FROM jobs WHERE state = ? AND batch IS ?", (DONE, batch)).fetchall()
+        missing = [job_id for job_id, path in rows if not path or not Path(path).exists()]
+        with self._lock, self._db:
+            self._db.executemany(
+                "UPDATE jobs SET state = ?, bytes_done = 0, updated_at = ? WHERE id = ?",
+                [(QUEUED, time.time(), job_id) for job_id in missing],
+            )
+        return len(missing)
+    
+    def get(self, job_id):
+        with self._lock:
+            row = self._db.execute(
+                "SELECT id, url, batch, folder, filename, state, bytes_done, total, path, error"
+                " FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return Job(*row) if row else None
+    
+    def recover(self):
+        """
+        Kembalikan job 'running' milik proses yang sudah mati ke 'queued'.
+        
+        Job dianggap yatim jika lease-nya habis, atau pemiliknya ada di host
+        ini dan PID-nya sudah tidak berjalan. Job milik proses lain yang
+        masih hidup tidak diubah.
+        
+        Returns:
+            Jumlah job yang dipulihkan
+        """
+        now = time.time()
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT id, owner, lease_until FROM jobs WHERE state = ?", (RUNNING,)).fetchall()
+        orphans = [(job_id,) for job_id, owner, lease_until in rows
+                   if owner != self.owner and (owner is None or lease_until is None or lease_until <= now
+                                               or _owner_alive(owner) is False)]
+        with self._lock, self._db:
+            # Syarat state/owner diulang: pemilik bisa saja menyelesaikan job di antara SELECT dan UPDATE
+            cursor = self._db.executemany(
+                "UPDATE jobs SET state = ?, owner = NULL, lease_until = NULL, updated_at = ?"
+                " WHERE id = ? AND state = ?",
+                [(QUEUED, now, job_id, RUNNING) for job_id, in orphans],
+            )
+        return cursor.rowcount
+    
+    def release(self):
+        """
+        Kembalikan job 'running' milik proses ini ke 'queued' (saat keluar
+        sebelum download selesai), supaya dilanjutkan sesi berikutnya.
+        
+        Returns:
+            Jumlah job yang dikembalikan
+        """
+        with self._lock:
+            if self._closed:
+                return 0
+            with self._db:
+                cursor = self._db.execute(
+                    "UPDATE jobs SET state = ?, owner = NULL, lease_until = NULL, updated_at = ?"
+                    " WHERE state = ? AND owner = ?",
+                    (QUEUED, time.time(), RUNNING, self.owner),
+                )
+        return cursor.rowcount
+    
+    def unfinished(self, batch=None, include_failed=False, any_batch=False, origin=None):
+        """
+        Job yang belum selesai.
+        
+        Args:
+            batch: Batch yang dicari (None = job GUI/get tanpa batch)
+            include_failed: Ikutkan job yang gagal (untuk dicoba lagi)
+            any_batch: Abaikan batch, ambil dari semua batch
+            origin: Hanya job dengan origin ini (mis. 'gui')
+        
+        Returns:
+            List Job urut ID
+        """
+        states = (QUEUED, FAILED) if include_failed else (QUEUED,)
+        query = ("SELECT id, url, batch, folder, filename, state, bytes_done, total, path, error"
+                 f" FROM jobs WHERE state IN ({', '.join('?' * len(states))})")
+        params = list(states)
+        if not any_batch:
+            query += " AND batch IS ?"
+            params.append(batch)
+        if origin is not None:
+            query += " AND origin = ?"
+            params.append(origin)
+        with self._lock:
+            rows = self._db.execute(query + " ORDER BY id", params).fetchall()
+        return [Job(*row) for row in rows]
+    
+    def counts(self, batch=None, any_batch=False):
+        """Jumlah job per status, mis. {'done': 10, 'queued': 2}."""
+        query = "SELECT state, COUNT(*) FROM jobs"
+        params = []
+        if not any_batch:
+            query += " WHERE batch IS ?"
+            params.append(batch)
+        with self._lock:
+            return dict(self._db.execute(query + " GROUP BY state", params).fetchall())
+    
+    def close(self):
+        """Kembalikan job 'running' milik proses ini ke antrian lalu tutup database."""
+        self.release()
+        self._stop.set()
+        with self._lock:
+            self._closed = True
+            self._db.close()
+
+
+def _owner_alive(owner):
+    """
+    Apakah proses pemilik job (host:pid) masih berjalan.
+    
+    Returns:
+        True/False untuk proses di host ini, None jika tidak bisa diperiksa
+        (host lain, atau Windows: os.kill(pid, 0) di sana menghentikan proses)
+    """
+    host, _, pid = owner.rpartition(':')
+    if host != socket.gethostname() or os.name == 'nt' or not pid.isdigit():
+        return None
+    try:
+        os.kill(int(pid), 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    except OSError:
+        return None
+    return True
@@ -0,0 +1,358 @@
+"""
+Library Index untuk Ebook Downloader
+====================================
+Indeks full-text (SQLite FTS5) atas PDF dan EPUB di folder download,
+sehingga file yang sudah diunduh bisa dicari dari GUI (sumber "Library")
+dan CLI (subcommand "library").
+
+Pembaruan bersifat inkremental:
+
+- file yang mtime dan ukurannya sama dengan catatan terakhir dilewati
+  tanpa dibaca,
+- file yang berubah di-hash dulu (SHA-256); jika isinya sama, hanya
+  catatannya yang diperbarui,
+- file yang dipindah atau diganti namanya (hash sama, path lama sudah
+  tidak ada) cukup diganti path-nya, dan salinan file yang sudah
+  terindeks menyalin teksnya tanpa ekstraksi ulang,
+- file yang dihapus dibuang dari indeks.
+
+Setiap dokumen juga menyimpan SHA-256 dan signature MinHash teksnya,
+dipakai modul duplicates untuk mencari file duplikat.
+
+Query memakai ranking BM25 (judul dan penulis diberi bobot lebih) dan
+hanya menyentuh indeks, sehingga tetap cepat untuk puluhan ribu dokumen.
+"""
+
+import os
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from pathlib import Path
+
+from download_cache import hash_file
+from duplicates import minhash_signature
+from text_extract import SUPPORTED_SUFFIXES, extract_document
+
+DEFAULT_LIBRARY_DB = Path.home() / ".ebook_downloader" / "library.sqlite3"
+
+# Bobot BM25 untuk kolom title, author, body
+RANK_WEIGHTS = (10.0, 5.0, 1.0)
+
+
+def iter_documents(folder):
+    """File PDF/EPUB di folder (rekursif), tanpa file .part dan folder tersembunyi."""
+    for root, dirs, files in os.walk(folder):
+        # Folder sementara (.mirror-*, cache) tidak ikut diindeks
+        dirs[:] = [name for name in dirs if not name.startswith('.')]
+        for name in files:
+            if name.lower().endswith(SUPPORTED_SUFFIXES) and not name.startswith('.'):
+                yield Path(root, name)
+
+
+def fts_query(text):
+    """
+    Ubah input pengguna menjadi query FTS5 yang aman.
+    
+    Setiap kata menjadi term (semua harus ada); teks dalam tanda kutip
+    menjadi frasa; kata terakhir juga cocok sebagai awalan.
+    """
+    text = unicodedata.normalize('NFKC', text)
+    parts = []
+    for phrase, word in re.findall(r'"([^"]*)"|(\S+)', text):
+        words = re.findall(r'\w+', phrase or word)
+        if not words:
+            continue
+        parts.append('"' + ' '.join(words) + '"' if phrase else ' '.join(f'"{w}"' for w in words))
+    if not parts:
+        return None
+    if not text.rstrip().endswith('"'):
+        parts[-1] += '*'
+    return ' '.join(parts)
+
+
+class LibraryIndex:
+    """Indeks full-text dokumen lokal di SQLite (aman dipakai dari banyak thread)."""
+    
+    def __init__(self, path=DEFAULT_LIBRARY_DB):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        # Satu pemindaian folder pada satu waktu (GUI: startup, ganti folder)
+        self._update_lock = threading.Lock()
+        self._db = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        with self._db:
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS documents ("
+                " id INTEGER PRIMARY KEY, path TEXT NOT NULL UNIQUE, mtime_ns INTEGER NOT NULL,"
+                " size INTEGER NOT NULL, sha256 TEXT NOT NULL, title TEXT, author TEXT, pages INTEGER,"
+                " error TEXT, indexed_at REAL NOT NULL)"
+            )
+            columns = {row[1] for row in self._db.execute("PRAGMA table_info(documents)")}
+            if 'minhash' not in columns:
+                # Indeks lama: signature diisi saat file diperbarui berikutnya
+                self._db.execute("ALTER TABLE documents ADD COLUMN minhash BLOB")
+            self._db.execute("CREATE INDEX IF NOT EXISTS documents_sha256 ON documents (sha256)")
+            self._db.execute(
+                "CREATE VIRTUAL TABLE IF NOT EXISTS documents_fts USING fts5("
+                " title, author, body, tokenize='unicode61 remove_diacritics 2')"
+            )
+    
+    # Pembaruan
+    def update(self, folders, on_progress=None):
+        """
+        Perbarui indeks untuk semua PDF/EPUB di folders secara inkremental.
+        
+        Pemindaian yang dipanggil bersamaan dijalankan bergantian; yang
+        kedua hanya membaca file yang berubah sejak yang pertama.
+        
+        Args:
+            folders: Folder (atau list folder) yang diindeks
+            on_progress: Callback (path, status) per file yang diproses
+        
+        Returns:
+            Dict jumlah file per status: 'added', 'updated', 'moved',
+            'copied', 'unchanged', 'removed', 'failed'
+        """
+        if isinstance(folders, (str, Path)):
+            folders = [folders]
+        counts = dict.fromkeys(('added', 'updated', 'moved', 'copied', 'unchanged', 'removed', 'failed'), 0)
+        seen = set()
+        with self._update_lock:
+            for folder in folders:
+                folder = Path(folder).resolve()
+                for path in iter_documents(folder):
+                    seen.add(str(path))
+                    status = self.add_file(path)
+                    counts[status] += 1
+                    if on_progress and status != 'unchanged':
+                        on_progress(path, status)
+                counts['removed'] += self._remove_missing(folder, seen)
+        return counts
+    
+    def add_file(self, path):
+        """
+        Indeks satu file (mis. tepat setelah download selesai).
+        
+        Returns:
+            Status: 'added', 'updated', 'moved', 'copied', 'unchanged' atau 'failed'
+        """
+        path = Path(path).resolve()
+        try:
+            stat = path.stat()
+        except OSError:
+            return 'failed'
+        with self._lock:
+            row = self._db.execute(
+                "SELECT id, mtime_ns, size, sha256, minhash IS NULL AND error IS NULL FROM documents WHERE path = ?",
+                (str(path),)).fetchone()
+        stale = row is not None and row[4]
+        if row and row[1] == stat.st_mtime_ns and row[2] == stat.st_size and not stale:
+            return 'unchanged'
+        
+        try:
+            sha256 = hash_file(path)
+        except OSError:
+            return 'failed'
+        if row and row[3] == sha256 and not stale:
+            self._touch(row[0], stat)
+            return 'unchanged'
+        
+        with self._lock:
+            twins = self._db.execute(
+                "SELECT id, path FROM documents WHERE sha256 = ? AND minhash IS NOT NULL", (sha256,)).fetchall()
+        for twin_id, twin_path in twins:
+            if not Path(twin_path).exists() and row is None:
+                # File yang sama dipindah/diganti namanya: cukup ganti path
+                with self._lock, self._db:
+                    if self._db.execute("SELECT 1 FROM documents WHERE path = ?", (str(path),)).fetchone():
+                        # Thread lain baru saja mengindeks path ini
+                        return 'unchanged'
+                    self._db.execute("UPDATE documents SET path = ?, mtime_ns = ?, size = ?, indexed_at = ?"
+                                     " WHERE id = ?", (str(path), stat.st_mtime_ns, stat.st_size,
+                                                       time.time(), twin_id))
+                return 'moved'
+        if twins:
+            # Salinan dokumen yang sudah terindeks: teksnya disalin dari indeks
+            self._store(path, stat, sha256, copy_from=twins[0][0])
+            return 'copied'
+        
+        try:
+            document = extract_document(path)
+            minhash = minhash_signature(document.text)
+        except Exception as e:
+            # Apa pun penyebabnya (PDF rusak, bug parser, pypdf), file ini dicatat
+            # gagal dan pemindaian lanjut ke file berikutnya; file yang sama tidak
+            # dicoba lagi sampai isinya berubah
+            self._store(path, stat, sha256, error=f"{type(e).__name__}: {e}")
+            return 'failed'
+        self._store(path, stat, sha256, document=document, minhash=minhash)
+        return 'updated' if row else 'added'
+    
+    def _touch(self, doc_id, stat):
+        with self._lock, self._db:
+            self._db.execute("UPDATE documents SET mtime_ns = ?, size = ? WHERE id = ?",
+                             (stat.st_mtime_ns, stat.st_size, doc_id))
+    
+    def _store(self, path, stat, sha256, document=None, minhash=None, copy_from=None, error=None):
+        # Baris lama dicari ulang di dalam lock yang sama dengan INSERT: pemindaian
+        # folder dan add_file() setelah download bisa mengindeks path yang sama bersamaan
+        with self._lock, self._db:
+            row = self._db.execute("SELECT id FROM documents WHERE path = ?", (str(path),)).fetchone()
+            doc_id = row[0] if row else None
+            if doc_id is not None:
+                self._db.execute("DELETE FROM documents_fts WHERE rowid = ?", (doc_id,))
+                self._db.execute("DELETE FROM documents WHERE id = ?", (doc_id,))
+            twin = None
+            if copy_from is not None:
+                twin = self._db.execute(
+                    "SELECT title, author, pages, minhash FROM documents WHERE id = ?", (copy_from,)).fetchone()
+            if twin is not None:
+                title, author, pages, minhash = twin
+            else:
+                # Salinan yang sumbernya baru saja dihapus: dicatat tanpa teks dan
+                # diekstrak ulang saat pemindaian berikutnya (minhash NULL)
+                copy_from = None
+                title = document.title if document else None
+                author = document.author if document else None
+                pages = document.pages if document else None
+            cursor = self._db.execute(
+                "INSERT INTO documents (id, path, mtime_ns, size, sha256, title, author, pages, error, minhash,"
+                " indexed_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (doc_id, str(path), stat.st_mtime_ns, stat.st_size, sha256, title, author, pages, error,
+                 minhash, time.time()),
+            )
+            new_id = cursor.lastrowid
+            if copy_from is not None:
+                self._db.execute(
+                    "INSERT INTO documents_fts (rowid, title, author, body)"
+                    " SELECT ?, title, author, body FROM documents_fts WHERE rowid = ?", (new_id, copy_from))
+            elif document is not None:
+                # Nama file ikut diindeks sebagai judul jika metadata tidak punya judul
+                self._db.execute(
+                    "INSERT INTO documents_fts (rowid, title, author, body) VALUES (?, ?, ?, ?)",
+                    (new_id, title or path.stem, author or '', document.text),
+                )
+    
+    @staticmethod
+    def _prefix(folder):
+        return str(Path(folder).resolve()).rstrip(os.sep) + os.sep
+    
+    def _remove_missing(self, folder, seen):
+        prefix = self._prefix(folder)
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT id, path FROM documents WHERE substr(path, 1, ?) = ?", (len(prefix), prefix)).fetchall()
+        # File yang muncul setelah folder ditelusuri (mis. download yang baru
+        # selesai dan diindeks add_file()) tidak ikut dihapus
+        gone = [(doc_id,) for doc_id, path in rows if path not in seen and not os.path.exists(path)]
+        with self._lock, self._db:
+            self._db.executemany("DELETE FROM documents_fts WHERE rowid = ?", gone)
+            self._db.executemany("DELETE FROM documents WHERE id = ?", gone)
+        return len(gone)
+    
+    # Query
+    def search(self, query, limit=50):
+        """
+        Cari dokumen.
+        
+        Returns:
+            List dict hasil dengan format yang sama seperti sumber pencarian
+            lain ({'title', 'url', 'source', 'description', 'is_direct'})
+            ditambah 'path'; url berupa URI file:// lokal
+        """
+        match = fts_query(query)
+        if match is None:
+            return []
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT d.path, d.title, d.author, d.pages,"
+                " snippet(documents_fts, 2, '', '', '…', 16)"
+                " FROM documents_fts JOIN documents d ON d.id = documents_fts.rowid"
+                " WHERE documents_fts MATCH ? ORDER BY bm25(documents_fts, ?, ?, ?) LIMIT ?",
+                (match, *RANK_WEIGHTS, limit),
+            ).fetchall()
+        results = []
+        for path, title, author, pages, snippet in rows:
+            snippet = ' '.join(snippet.split())
+            details = [part for part in (author, f"{pages} halaman" if pages else None, snippet) if part]
+            results.append({
+                'title': title or Path(path).name,
+                'url': Path(path).as_uri(),
+                'source': 'Library',
+                'description': ' · '.join(details),
+                'is_direct': False,
+                'path': path,
+            })
+        return results
+    
+    # Duplikat (lihat modul duplicates)
+    def duplicate_rows(self, folder=None):
+        """
+        Baris (sha256, size, path) untuk file yang SHA-256-nya muncul lebih
+        dari sekali, urut per sha256 lalu per urutan diindeks.
+        
+        Args:
+            folder: Batasi ke file di folder ini (default: seluruh indeks)
+        """
+        prefix = self._prefix(folder) if folder else ''
+        with self._lock:
+            return self._db.execute(
+                "SELECT sha256, size, path FROM documents WHERE substr(path, 1, ?) = ? AND sha256 IN ("
+                " SELECT sha256 FROM documents WHERE substr(path, 1, ?) = ? GROUP BY sha256 HAVING COUNT(*) > 1)"
+                " ORDER BY sha256, id",
+                (len(prefix), prefix, len(prefix), prefix),
+            ).fetchall()
+    
+    def signatures(self, folder=None):
+        """Baris (id, path, sha256, minhash) untuk dokumen yang teksnya tidak kosong."""
+        prefix = self._prefix(folder) if folder else ''
+        with self._lock:
+            return self._db.execute(
+                "SELECT id, path, sha256, minhash FROM documents"
+                " WHERE substr(path, 1, ?) = ? AND length(minhash) > 0",
+                (len(prefix), prefix),
+            ).fetchall()
+    
+    def is_current(self, path):
+        """True jika mtime dan ukuran file masih sama dengan catatan di indeks."""
+        path = Path(path).resolve()
+        try:
+            stat = path.stat()
+        except OSError:
+            return False
+        with self._lock:
+            row = self._db.execute(
+                "SELECT mtime_ns, size FROM documents WHERE path = ?", (str(path),)).fetchone()
+        return row is not None and (row[0], row[1]) == (stat.st_mtime_ns, stat.st_size)
+    
+    def stats(self):
+        """Jumlah dokumen terindeks dan yang gagal dibaca."""
+        with self._lock:
+            total, failed = self._db.execute(
+                "SELECT COUNT(*), COUNT(error) FROM documents").fetchone()
+        return {'documents': total, 'failed': failed}
+    
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+
+_default_index = None
+_default_index_lock = threading.Lock()
+
+
+def get_library_index():
+    """Ambil LibraryIndex bersama untuk proses ini (dibuka saat pertama dipanggil)."""
+    global _default_index
+    with _default_index_lock:
+        if _default_index is None:
+            _default_index = LibraryIndex()
+        return _default_index
+
+
+def search_library(query):
+    """Sumber pencarian "library" (lihat repository_search.search_sources)."""
+    return get_library_index().search(query)
@@ -0,0 +1,693 @@
+"""
+PDF Metadata untuk Ebook Downloader
+===================================
+Membaca judul, penulis, jumlah halaman dan status enkripsi PDF tanpa
+mem-parse seluruh file.
+
+File dibuka dengan mmap lalu hanya bagian yang dibutuhkan yang dibaca:
+startxref di ekor file, tabel xref (klasik atau xref stream, termasuk
+rantai /Prev dari incremental update), trailer, dictionary /Info, stream
+XMP /Metadata dan /Pages /Count. Berapa pun ukuran file, yang disentuh
+hanya beberapa KB sehingga PDF ratusan MB selesai dalam hitungan
+milidetik.
+
+Struktur yang rusak atau tidak sesuai tipe (mis. trailer yang bukan
+dictionary, /W yang bukan array angka, nesting yang terlalu dalam, stream
+yang hasil dekodenya melebihi PdfReader.MAX_STREAM_SIZE) selalu
+dilaporkan sebagai PdfMetadataError, tidak pernah sebagai exception lain.
+"""
+
+import functools
+import html
+import mmap
+import re
+import zlib
+from contextlib import contextmanager
+from dataclasses import dataclass, asdict
+from pathlib import Path
+from typing import Optional
+
+# Jarak dari akhir file tempat startxref dicari
+TAIL_SIZE = 4096
+
+WHITESPACE = b' \t\r\n\f\x00'
+DELIMITERS = b'()<>[]{}/%'
+
+OBJ_HEADER = re.compile(rb'\s*(\d+)\s+(\d+)\s+obj\b')
+REF_TAIL = re.compile(rb'\s+(\d+)\s+R(?![A-Za-z])')
+NUMBER = re.compile(rb'[+-]?(?:\d+\.?\d*|\.\d+)')
+XREF_SUBSECTION = re.compile(rb'\s*(\d+)\s+(\d+)\s*[\r\n]+')
+XREF_ENTRY = re.compile(rb'(\d{10})\s(\d{5})\s([nf])')
+
+# Kedalaman array/dictionary bersarang maksimum
+MAX_NESTING = 64
+
+# Exception dari data yang strukturnya tidak sesuai harapan parser
+_STRUCTURE_ERRORS = (AttributeError, KeyError, TypeError, IndexError, ValueError, OverflowError,
+                     RecursionError)
+
+
+class PdfMetadataError(ValueError):
+    """File bukan PDF atau strukturnya tidak bisa dibaca."""
+
+
+def _structural(method):
+    """Ubah exception akibat struktur PDF yang tidak terduga menjadi PdfMetadataError."""
+    @functools.wraps(method)
+    def wrapper(*args, **kwargs):
+        try:
+            return method(*args, **kwargs)
+        except PdfMetadataError:
+            raise
+        except _STRUCTURE_ERRORS as e:
+            raise PdfMetadataError(f"Struktur PDF rusak ({type(e).__name__}: {e})") from e
+    return wrapper
+
+
+def _is_int(value):
+    # bool adalah subclass int, tetapi bukan angka yang valid di PDF
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+@dataclass
+class PdfMetadata:
+    """Metadata satu file PDF (None jika tidak ada di file)."""
+    title: Optional[str] = None
+    author: Optional[str] = None
+    pages: Optional[int] = None
+    encrypted: bool = False
+    version: Optional[str] = None
+    
+    def to_dict(self):
+        return asdict(self)
+
+
+@dataclass(frozen=True)
+class Ref:
+    """Referensi objek tidak langsung ("12 0 R")."""
+    num: int
+    gen: int = 0
+
+
+class Name(str):
+    """Nilai bertipe name (/FlateDecode) untuk membedakannya dari string."""
+
+
+@_structural
+def parse_string(token):
+    """Isi string literal PDF ("(...)" dengan escape) sebagai bytes."""
+    return _Parser(token).literal_string()
+
+
+class _Parser:
+    """Parser objek PDF minimal yang membaca langsung dari buffer (mmap)."""
+    
+    def __init__(self, data, pos=0):
+        self.data = data
+        self.pos = pos
+    
+    def skip(self):
+        data = self.data
+        while self.pos < len(data):
+            c = data[self.pos]
+            if c in WHITESPACE:
+                self.pos += 1
+            elif c == 0x25:  # % komentar sampai akhir baris
+                while self.pos < len(data) and data[self.pos] not in b'\r\n':
+                    self.pos += 1
+            else:
+                return
+    
+    def keyword(self):
+        start = self.pos
+        while (self.pos < len(self.data) and self.data[self.pos] not in WHITESPACE
+               and self.data[self.pos] not in DELIMITERS):
+            self.pos += 1
+        return bytes(self.data[start:self.pos])
+    
+    def value(self, depth=0):
+        if depth > MAX_NESTING:
+            raise PdfMetadataError("Objek bersarang terlalu dalam")
+        self.skip()
+        data = self.data
+        if self.pos >= len(data):
+            raise PdfMetadataError("Objek terpotong")
+        c = data[self.pos]
+        if data[self.pos:self.pos + 2] == b'<<':
+            self.pos += 2
+            result = {}
+            while True:
+                self.skip()
+                if data[self.pos:self.pos + 2] == b'>>':
+                    self.pos += 2
+                    return result
+                key = self.value(depth + 1)
+                if not isinstance(key, Name):
+                    raise PdfMetadataError("Key dictionary bukan name")
+                result[str(key)] = self.value(depth + 1)
+        if c == 0x5B:  # [
+            self.pos += 1
+            items = []
+            while True:
+                self.skip()
+                if self.pos >= len(data):
+                    raise PdfMetadataError("Array terpotong")
+                if data[self.pos] == 0x5D:  # ]
+                    self.pos += 1
+                    return items
+                items.append(self.value(depth + 1))
+        if c == 0x28:  # (
+            return self.literal_string()
+        if c == 0x3C:  # <
+            end = data.find(b'>', self.pos)
+            if end < 0:
+                raise PdfMetadataError("String hex terpotong")
+            digits = re.sub(rb'\s', b'', bytes(data[self.pos + 1:end]))
+            self.pos = end + 1
+            return bytes.fromhex((digits + b'0' * (len(digits) % 2)).decode('ascii'))
+        if c == 0x2F:  # /
+            self.pos += 1
+            raw = self.keyword()
+            return Name(re.sub(rb'#([0-9A-Fa-f]{2})', lambda m: bytes.fromhex(m.group(1).decode()), raw)
+                        .decode('latin-1'))
+        number = NUMBER.match(data, self.pos)
+        if number:
+            self.pos = number.end()
+            text = number.group()
+            if b'.' in text:
+                return float(text)
+            ref = REF_TAIL.match(data, self.pos)
+            if ref:
+                self.pos = ref.end()
+                return Ref(int(text), int(ref.group(1)))
+            return int(text)
+        word = self.keyword()
+        if word in (b'true', b'false'):
+            return word == b'true'
+        if word == b'null':
+            return None
+        raise PdfMetadataError(f"Token tidak dikenal: {word[:20]!r}")
+    
+    def literal_string(self):
+        data = self.data
+        self.pos += 1
+        depth = 1
+        out = bytearray()
+        escapes = {ord('n'): b'\n', ord('r'): b'\r', ord('t'): b'\t', ord('b'): b'\b', ord('f'): b'\f'}
+        while self.pos < len(data):
+            c = data[self.pos]
+            self.pos += 1
+            if c == 0x5C:  # backslash
+                if self.pos >= len(data):
+                    break
+                c = data[self.pos]
+                self.pos += 1
+                if c in escapes:
+                    out += escapes[c]
+                elif 0x30 <= c <= 0x37:
+                    digits = bytes([c])
+                    while len(digits) < 3 and self.pos < len(data) and 0x30 <= data[self.pos] <= 0x37:
+                        digits += bytes([data[self.pos]])
+                        self.pos += 1
+                    out.append(int(digits, 8) & 0xFF)
+                elif c == 0x0D:  # baris lanjutan
+                    if self.pos < len(data) and data[self.pos] == 0x0A:
+                        self.pos += 1
+                elif c != 0x0A:
+                    out.append(c)
+            elif c == 0x28:
+                depth += 1
+                out.append(c)
+            elif c == 0x29:
+                depth -= 1
+                if depth == 0:
+                    return bytes(out)
+                out.append(c)
+            else:
+                out.append(c)
+        raise PdfMetadataError("String terpotong")
+
+
+def decode_text(value):
+    """Ubah string PDF (UTF-16 dengan BOM, UTF-8 dengan BOM, atau PDFDocEncoding) ke str."""
+    if not isinstance(value, bytes):
+        return None
+    if value.startswith(b'\xfe\xff'):
+        text = value[2:].decode('utf-16-be', errors='replace')
+    elif value.startswith(b'\xef\xbb\xbf'):
+        text = value[3:].decode('utf-8', errors='replace')
+    else:
+        # PDFDocEncoding sama dengan Latin-1 untuk karakter yang umum dipakai
+        text = value.decode('latin-1')
+    text = ' '.join(text.replace('\x00', '').split())
+    return text or None
+
+
+def _unpredict(data, columns, predictor):
+    """Balik PNG predictor (dipakai hampir semua xref stream)."""
+    if predictor < 10:
+        return data
+    if not _is_int(columns) or columns < 1:
+        raise PdfMetadataError(f"/Columns tidak valid: {columns!r}")
+    row_size = columns + 1
+    out = bytearray()
+    previous = bytearray(columns)
+    for start in range(0, len(data) - row_size + 1, row_size):
+        kind = data[start]
+        row = bytearray(data[start + 1:start + row_size])
+        for i in range(columns):
+            left = row[i - 1] if i else 0
+            up = previous[i]
+            if kind == 1:
+                row[i] = (row[i] + left) & 0xFF
+            elif kind == 2:
+                row[i] = (row[i] + up) & 0xFF
+            elif kind == 3:
+                row[i] = (row[i] + (left + up) // 2) & 0xFF
+            elif kind == 4:
+                upper_left = previous[i - 1] if i else 0
+                p = left + up - upper_left
+                pa, pb, pc = abs(p - left), abs(p - up), abs(p - upper_left)
+                row[i] = (row[i] + (left if pa <= pb and pa <= pc else up if pb <= pc else upper_left)) & 0xFF
+        out += row
+        previous = row
+    return bytes(out)
+
+
+class PdfReader:
+    """Pembaca struktur PDF (xref, trailer, objek) di atas buffer mmap."""
+    
+    # Rantai /Prev maksimum (melindungi dari xref yang saling menunjuk)
+    MAX_XREF_SECTIONS = 64
+    
+    # Kedalaman pohon /Pages maksimum
+    MAX_PAGE_DEPTH = 32
+    
+    # Ukuran maksimum stream setelah didekode (melindungi dari deflate bomb)
+    MAX_STREAM_SIZE = 32 * 1024 * 1024
+    
+    # Jarak dari offset xref tempat header objek dicari jika offset meleset
+    OBJECT_SEARCH_WINDOW = 1024 * 1024
+    
+    @_structural
+    def __init__(self, data, version=None):
+        self.data = data
+        self.version = version
+        # Urutan dari xref terbaru: tiap elemen dict nomor objek -> entri, atau
+        # list subsection klasik (first, count, offset) yang dibaca saat dibutuhkan
+        self._sections = []
+        self.trailers = []
+        self._objects = {}
+        self._object_streams = {}
+        self._read_xref_chain()
+    
+    @property
+    def encrypted(self):
+        return 'Encrypt' in self.trailer
+    
+    @property
+    def root(self):
+        root = self.resolve(self.trailer.get('Root'))
+        return root if isinstance(root, dict) else {}
+    
+    def pages(self):
+        """
+        Dictionary halaman sesuai urutan baca.
+        
+        Yields:
+            Tuple (dictionary halaman, /Resources yang berlaku); /Resources
+            diwarisi dari node /Pages induk jika halaman tidak punya sendiri
+        """
+        stack = [(self.root.get('Pages'), {}, 0)]
+        seen = set()
+        while stack:
+            ref, inherited, depth = stack.pop()
+            if isinstance(ref, Ref):
+                if ref.num in seen:
+                    continue
+                seen.add(ref.num)
+            node = self.resolve(ref)
+            if not isinstance(node, dict) or depth > self.MAX_PAGE_DEPTH:
+                continue
+            resources = self.resolve(node.get('Resources'))
+            resources = resources if isinstance(resources, dict) else inherited
+            kids = self.resolve(node.get('Kids'))
+            if isinstance(kids, list):
+                stack.extend((kid, resources, depth + 1) for kid in reversed(kids))
+            elif node.get('Type') != 'Pages':
+                yield node, resources
+    
+    @property
+    def trailer(self):
+        """Gabungan trailer; nilai dari xref terbaru diutamakan."""
+        merged = {}
+        for trailer in reversed(self.trailers):
+            merged.update(trailer)
+        return merged
+    
+    def _read_xref_chain(self):
+        tail_start = max(len(self.data) - TAIL_SIZE, 0)
+        index = self.data.rfind(b'startxref', tail_start)
+        if index < 0:
+            raise PdfMetadataError("startxref tidak ditemukan")
+        parser = _Parser(self.data, index + len(b'startxref'))
+        offset = parser.value()
+        if _is_int(offset) and not self._looks_like_xref(offset):
+            # startxref meleset: pakai tabel xref klasik terakhir sebelum startxref
+            keyword = self.data.rfind(b'\nxref', 0, index)
+            if keyword >= 0:
+                offset = keyword + 1
+        seen = set()
+        while _is_int(offset) and offset not in seen and len(seen) < self.MAX_XREF_SECTIONS:
+            seen.add(offset)
+            trailer = self._read_xref(offset)
+            if not isinstance(trailer, dict):
+                raise PdfMetadataError("Trailer bukan dictionary")
+            self.trailers.append(trailer)
+            if _is_int(trailer.get('XRefStm')):
+                # File hybrid: xref stream melengkapi tabel klasik
+                self._read_xref(trailer['XRefStm'])
+            offset = trailer.get('Prev')
+        if not self.trailers:
+            raise PdfMetadataError("Tabel xref tidak bisa dibaca")
+    
+    def _looks_like_xref(self, offset):
+        if not 0 <= offset < len(self.data):
+            return False
+        parser = _Parser(self.data, offset)
+        parser.skip()
+        return self.data[parser.pos:parser.pos + 4] == b'xref' or bool(OBJ_HEADER.match(self.data, offset))
+    
+    def _read_xref(self, offset):
+        data = self.data
+        if not 0 <= offset < len(data):
+            raise PdfMetadataError(f"Offset xref di luar file: {offset}")
+        parser = _Parser(data, offset)
+        parser.skip()
+        if data[parser.pos:parser.pos + 4] == b'xref':
+            parser.pos += 4
+            subsections = []
+            while True:
+                match = XREF_SUBSECTION.match(data, parser.pos)
+                if not match:
+                    break
+                first, count = int(match.group(1)), int(match.group(2))
+                # Menurut spesifikasi setiap entri tepat 20 byte (sebagian
+                # generator memakai 19); dibaca saat dibutuhkan saja
+                entry_size = 19 if data[match.end() + 18:match.end() + 19] in (b'\r', b'\n') \
+                    and data[match.end() + 19:match.end() + 20].isdigit() else 20
+                subsections.append((first, count, match.end(), entry_size))
+                parser.pos = match.end() + entry_size * count
+            self._sections.append(subsections)
+            parser.skip()
+            if data[parser.pos:parser.pos + 7] != b'trailer':
+                raise PdfMetadataError("Trailer tidak ditemukan")
+            parser.pos += 7
+            return parser.value()
+        
+        # PDF 1.5+: xref stream ("N 0 obj << /Type /XRef ... >> stream")
+        header = OBJ_HEADER.match(data, offset)
+        if not header:
+            raise PdfMetadataError(f"Xref tidak ditemukan di offset {offset}")
+        stream_dict, raw = self._parse_object_at(header.end())
+        if not isinstance(stream_dict, dict) or stream_dict.get('Type') != 'XRef':
+            raise PdfMetadataError("Objek di startxref bukan xref stream")
+        body = self._decode_stream(stream_dict, raw or b'')
+        widths = stream_dict.get('W')
+        size = stream_dict.get('Size', 0)
+        index = stream_dict.get('Index', [0, size])
+        if (not isinstance(widths, list) or len(widths) != 3
+                or not all(_is_int(width) and 0 <= width <= 8 for width in widths)):
+            raise PdfMetadataError(f"/W xref stream tidak valid: {widths!r}")
+        if (not isinstance(index, list) or len(index) % 2
+                or not all(_is_int(value) and value >= 0 for value in index)):
+            raise PdfMetadataError(f"/Index xref stream tidak valid: {index!r}")
+        entry_size = sum(widths)
+        if entry_size == 0:
+            raise PdfMetadataError("/W xref stream kosong")
+        entries = {}
+        pos = 0
+        for first, count in zip(index[::2], index[1::2]):
+            for num in range(first, first + count):
+                fields = []
+                for width in widths:
+                    fields.append(int.from_bytes(body[pos:pos + width], 'big') if width else None)
+                    pos += width
+                kind = 1 if fields[0] is None else fields[0]
+                if kind == 1 and fields[1] is not None:
+                    entries[num] = ('n', fields[1])
+                elif kind == 2 and fields[1] is not None:
+                    entries[num] = ('c', fields[1], fields[2] or 0)
+                else:
+                    entries[num] = ('f',)
+                if pos + entry_size > len(body):
+                    break
+        self._sections.append(entries)
+        return stream_dict
+    
+    def _entry(self, num):
+        # Entri 'f' dilewati: pada file hybrid objek terkompresi ditandai
+        # bebas di tabel klasik dan baru ada di xref stream
+        for section in self._sections:
+            if isinstance(section, dict):
+                if num in section and section[num][0] != 'f':
+                    return section[num]
+                continue
+            for first, count, offset, entry_size in section:
+                if first <= num < first + count:
+                    match = XREF_ENTRY.match(self.data, offset + entry_size * (num - first))
+                    if match and match.group(3) == b'n':
+                        return ('n', int(match.group(1)))
+        return None
+    
+    def _parse_object_at(self, pos):
+        """Parse objek yang dimulai di pos; hasil (nilai, data stream mentah atau None)."""
+        parser = _Parser(self.data, pos)
+        value = parser.value()
+        parser.skip()
+        if not isinstance(value, dict) or self.data[parser.pos:parser.pos + 6] != b'stream':
+            return value, None
+        start = parser.pos + 6
+        if self.data[start:start + 2] == b'\r\n':
+            start += 2
+        elif self.data[start:start + 1] in (b'\n', b'\r'):
+            start += 1
+        length = value.get('Length')
+        if isinstance(length, Ref):
+            length = self.resolve(length)
+        if not isinstance(length, int):
+            end = self.data.find(b'endstream', start)
+            length = max(end - start, 0)
+        return value, self.data[start:start + length]
+    
+    def _decode_stream(self, stream_dict, raw):
+        """
+        Dekode data stream (FlateDecode dan PNG predictor).
+        
+        Raises:
+            PdfMetadataError: Jika filter tidak didukung, data rusak, atau
+                hasilnya lebih besar dari MAX_STREAM_SIZE
+        """
+        filters = stream_dict.get('Filter') or []
+        params = stream_dict.get('DecodeParms') or {}
+        if not isinstance(filters, list):
+            filters = [filters]
+        if isinstance(params, list):
+            params = params[0] if params else {}
+        data = bytes(raw)
+        if not isinstance(params, dict):
+            params = {}
+        for name in filters:
+            if name != 'FlateDecode':
+                raise PdfMetadataError(f"Filter {name} tidak didukung")
+            try:
+                data = zlib.decompressobj().decompress(data, self.MAX_STREAM_SIZE + 1)
+            except zlib.error as e:
+                raise PdfMetadataError(f"Stream rusak: {e}") from e
+            if len(data) > self.MAX_STREAM_SIZE:
+                raise PdfMetadataError(f"Stream lebih besar dari {self.MAX_STREAM_SIZE} byte setelah didekode")
+        predictor = params.get('Predictor', 1)
+        if not _is_int(predictor):
+            raise PdfMetadataError(f"/Predictor tidak valid: {predictor!r}")
+        if predictor > 1:
+            data = _unpredict(data, params.get('Columns', 1), predictor)
+        return data
+    
+    def _object_at_offset(self, num, offset):
+        header = OBJ_HEADER.match(self.data, offset) if 0 <= offset < len(self.data) else None
+        if not header or int(header.group(1)) != num:
+            # Offset xref meleset (umum pada PDF hasil generator sembarangan):
+            # cari header objek di sekitar offset saja, bukan di seluruh file.
+            # Definisi terakhir dipakai karena incremental update menambahkan
+            # versi baru objek di belakang
+            center = min(max(offset, 0), len(self.data))
+            start = max(center - self.OBJECT_SEARCH_WINDOW, 0)
+            end = min(center + self.OBJECT_SEARCH_WINDOW, len(self.data))
+            found = None
+            for found in re.compile(rb'(?<!\d)%d\s+\d+\s+obj\b' % num).finditer(self.data, start, end):
+                pass
+            if found is None:
+                return None, None
+            header = OBJ_HEADER.match(self.data, found.start())
+        return self._parse_object_at(header.end())
+    
+    def _compressed_object(self, stream_num, index):
+        if stream_num not in self._object_streams:
+            stream_dict, raw = self.resolve_stream(Ref(stream_num))
+            if not isinstance(stream_dict, dict) or raw is None:
+                raise PdfMetadataError(f"Object stream {stream_num} tidak ditemukan")
+            count, first = stream_dict.get('N', 0), stream_dict.get('First', 0)
+            if not _is_int(count) or not _is_int(first) or count < 0 or first < 0:
+                raise PdfMetadataError(f"/N atau /First object stream {stream_num} tidak valid")
+            body = self._decode_stream(stream_dict, raw)
+            parser = _Parser(body)
+            pairs = [(parser.value(), parser.value()) for _ in range(count)]
+            if not all(_is_int(num) and _is_int(offset) for num, offset in pairs):
+                raise PdfMetadataError(f"Header object stream {stream_num} tidak valid")
+            self._object_streams[stream_num] = (body, first, pairs)
+        body, first, pairs = self._object_streams[stream_num]
+        if index >= len(pairs):
+            return None
+        return _Parser(body, first + pairs[index][1]).value()
+    
+    @_structural
+    def resolve_stream(self, ref):
+        """Objek stream untuk ref; hasil (dictionary, data mentah)."""
+        entry = self._entry(ref.num)
+        if not entry or entry[0] != 'n':
+            return None, None
+        return self._object_at_offset(ref.num, entry[1])
+    
+    @_structural
+    def stream_data(self, ref):
+        """Isi stream ref setelah didekode (None jika objek tidak ada)."""
+        stream_dict, raw = self.resolve_stream(ref)
+        if not isinstance(stream_dict, dict) or raw is None:
+            return None
+        return self._decode_stream(stream_dict, raw)
+    
+    @_structural
+    def resolve(self, value):
+        """Ikuti referensi tidak langsung sampai ke nilai sebenarnya."""
+        depth = 0
+        while isinstance(value, Ref) and depth < 16:
+            depth += 1
+            if value.num not in self._objects:
+                entry = self._entry(value.num)
+                if entry is None:
+                    obj = None
+                elif entry[0] == 'c':
+                    obj = self._compressed_object(entry[1], entry[2])
+                    if isinstance(obj, Ref) and obj.num == value.num:
+                        obj = None
+                else:
+                    obj = self._object_at_offset(value.num, entry[1])[0]
+                self._objects[value.num] = obj
+            value = self._objects[value.num]
+        return value
+
+
+def _xmp_field(xmp, tag):
+    match = re.search(rf'<{tag}\b[^>]*>(.*?)</{tag}>'.encode(), xmp, re.DOTALL)
+    if not match:
+        return None
+    items = re.findall(rb'<rdf:li\b[^>]*>(.*?)</rdf:li>', match.group(1), re.DOTALL) or [match.group(1)]
+    values = [html.unescape(item.decode('utf-8', errors='replace')).strip() for item in items]
+    return ', '.join(value for value in values if value) or None
+
+
+def read_pdf_metadata(path):
+    """
+    Baca metadata PDF lewat mmap (hanya trailer, xref, /Info, XMP dan /Pages).
+    
+    Judul dan penulis diambil dari /Info, dengan XMP (dc:title, dc:creator)
+    sebagai cadangan. Pada PDF terenkripsi string /Info ikut terenkripsi,
+    jadi hanya XMP yang tidak dienkripsi yang dipakai.
+    
+    Returns:
+        PdfMetadata
+    
+    Raises:
+        PdfMetadataError: Jika file bukan PDF atau struktur xref rusak
+        OSError: Jika file tidak bisa dibuka
+    """
+    with open_pdf(path) as reader:
+        return pdf_metadata(reader)
+
+
+@contextmanager
+def open_pdf(path):
+    """
+    Buka PDF dengan mmap dan berikan PdfReader di atasnya.
+    
+    Raises:
+        PdfMetadataError: Jika file bukan PDF atau struktur xref rusak
+        OSError: Jika file tidak bisa dibuka
+    """
+    with open(path, 'rb') as f:
+        try:
+            data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError as e:  # file kosong
+            raise PdfMetadataError("File kosong") from e
+    with data:
+        version = re.match(rb'%PDF-(\d\.\d)', data[:1024].lstrip())
+        if not version:
+            raise PdfMetadataError("Bukan file PDF")
+        yield PdfReader(data, version.group(1).decode())
+
+
+def pdf_metadata(reader):
+    """Metadata dari PdfReader yang sudah dibuka (lihat read_pdf_metadata)."""
+    trailer = reader.trailer
+    meta = PdfMetadata(version=reader.version, encrypted=reader.encrypted)
+    
+    root = reader.root
+    pages = reader.resolve(root.get('Pages'))
+    if isinstance(pages, dict):
+        count = reader.resolve(pages.get('Count'))
+        meta.pages = count if isinstance(count, int) else None
+    
+    info = reader.resolve(trailer.get('Info'))
+    if isinstance(info, dict) and not meta.encrypted:
+        meta.title = decode_text(reader.resolve(info.get('Title')))
+        meta.author = decode_text(reader.resolve(info.get('Author')))
+    
+    if (meta.title is None or meta.author is None) and isinstance(root.get('Metadata'), Ref):
+        try:
+            xmp = reader.stream_data(root['Metadata']) or b''
+        except PdfMetadataError:
+            xmp = b''
+        meta.title = meta.title or _xmp_field(xmp, 'dc:title')
+        meta.author = meta.author or _xmp_field(xmp, 'dc:creator')
+    return meta
+
+
+def metadata_filename(meta, suffix='.pdf', max_length=150):
+    """
+    Nama file dari metadata: "Penulis - Judul.pdf", atau None jika tidak ada judul.
+    
+    Karakter yang tidak valid untuk nama file tetap harus dibersihkan
+    pemanggil (lihat EbookDownloader.sanitize_filename).
+    """
+    if not meta.title:
+        return None
+    name = f"{meta.author} - {meta.title}" if meta.author else meta.title
+    name = ' '.join(name.split())[:max_length].rstrip(' .')
+    return f"{name}{suffix}" if name else None
+
+
+def describe(meta):
+    """Ringkasan satu baris untuk log, mis. "Judul · Penulis · 120 halaman · 🔒"."""
+    parts = [meta.title or "(tanpa judul)"]
+    if meta.author:
+        parts.append(meta.author)
+    if meta.pages:
+        parts.append(f"{meta.pages} halaman")
+    if meta.encrypted:
+        parts.append("🔒 terenkripsi")
+    return " · ".join(parts)
+
+
+def is_pdf(path):
+    """True jika nama file berakhiran .pdf (pengecekan isi dilakukan read_pdf_metadata)."""
+    return Path(path).suffix.lower() == '.pdf'
@@ -0,0 +1,277 @@
+"""
+Rate Limit untuk Ebook Downloader
+=================================
+Pembatas kecepatan berbasis token bucket untuk semua download di satu
+proses:
+
+- batas global dalam byte per detik (semua download bersama),
+- batas per host dalam byte per detik,
+- batas per host dalam jumlah request per detik.
+
+Nilai 0 berarti tidak dibatasi. Batas bisa diubah saat download berjalan
+lewat set_limits(), atau lewat file pengaturan yang dipantau watch()
+(ditulis oleh GUI dan subcommand "limit" di CLI) sehingga proses lain yang
+sedang berjalan ikut menyesuaikan.
+"""
+
+import json
+import os
+import re
+import threading
+import time
+from pathlib import Path
+from urllib.parse import urlparse
+
+DEFAULT_LIMITS_FILE = Path.home() / ".ebook_downloader" / "limits.json"
+
+UNITS = {'': 1, 'K': 1024, 'M': 1024 ** 2, 'G': 1024 ** 3}
+
+
+def parse_rate(text):
+    """
+    Ubah teks kecepatan ("500K", "2M", "1.5M/s", "0") menjadi byte per detik.
+    
+    Raises:
+        ValueError: Jika format tidak dikenali
+    """
+    match = re.fullmatch(r'\s*(\d+(?:\.\d+)?)\s*([KMG]?)i?B?(?:/s)?\s*', str(text), re.IGNORECASE)
+    if not match:
+        raise ValueError(f"Format kecepatan tidak valid: {text!r} (contoh: 500K, 2M)")
+    return int(float(match.group(1)) * UNITS[match.group(2).upper()])
+
+
+def format_rate(rate, suffix="B/s"):
+    """Format byte per detik untuk ditampilkan ("tanpa batas" untuk 0)."""
+    if not rate:
+        return "tanpa batas"
+    for unit in ('G', 'M', 'K'):
+        if rate >= UNITS[unit]:
+            return f"{rate / UNITS[unit]:g}{unit}{suffix}"
+    return f"{rate:g}{suffix}"
+
+
+class TokenBucket:
+    """
+    Token bucket dengan reservasi.
+    
+    reserve(n) langsung mengambil n token (saldo boleh minus) dan
+    mengembalikan berapa lama pemanggil harus menunggu sebelum memakai
+    token tersebut. Dengan begitu chunk besar tidak perlu dipecah dan
+    pemanggil sinkron (time.sleep) maupun asyncio (asyncio.sleep) memakai
+    bucket yang sama.
+    """
+    
+    def __init__(self, rate=0, burst=1.0):
+        """
+        Args:
+            rate: Token per detik (0 = tanpa batas)
+            burst: Kapasitas bucket dalam detik pada rate penuh
+        """
+        self.burst = burst
+        self._lock = threading.Lock()
+        self._rate = 0
+        self._capacity = 0
+        self._tokens = 0.0
+        self._updated = time.monotonic()
+        self.set_rate(rate)
+        self._tokens = float(self._capacity) if self._rate else 0.0
+    
+    @property
+    def rate(self):
+        return self._rate
+    
+    def set_rate(self, rate):
+        """Ubah rate; utang token dari rate lama dihapus, saldo dibatasi kapasitas baru."""
+        with self._lock:
+            self._refill()
+            self._rate = max(rate or 0, 0)
+            self._capacity = max(self._rate * self.burst, 1)
+            self._tokens = min(max(self._tokens, 0.0), self._capacity) if self._rate else 0.0
+    
+    def _refill(self):
+        now = time.monotonic()
+        if self._rate:
+            self._tokens = min(self._capacity, self._tokens + (now - self._updated) * self._rate)
+        self._updated = now
+    
+    def reserve(self, n=1):
+        """
+        Ambil n token.
+        
+        Returns:
+            Detik yang harus ditunggu sebelum n token boleh dipakai (0 jika
+            bucket tanpa batas atau token cukup)
+        """
+        with self._lock:
+            if not self._rate:
+                return 0.0
+            self._refill()
+            self._tokens -= n
+            return -self._tokens / self._rate if self._tokens < 0 else 0.0
+
+
+class RateLimiter:
+    """Batas kecepatan global dan per host untuk download."""
+    
+    # Seberapa sering file pengaturan diperiksa (detik)
+    RELOAD_INTERVAL = 1.0
+    # Waktu tunggu dipecah per potongan ini supaya perubahan batas langsung terasa
+    SLEEP_SLICE = 0.25
+    
+    def __init__(self, global_bps=0, host_bps=0, host_rps=0):
+        """
+        Args:
+            global_bps: Batas total byte per detik untuk semua host
+            host_bps: Batas byte per detik per host
+            host_rps: Batas request per detik per host
+        """
+        self.global_bps = global_bps
+        self.host_bps = host_bps
+        self.host_rps = host_rps
+        self._global = TokenBucket(global_bps)
+        self._host_bytes = {}
+        self._host_requests = {}
+        self._lock = threading.Lock()
+        self._settings_path = None
+        self._settings_mtime = None
+        self._checked_at = 0.0
+        # Naik setiap kali batas berubah; waktu tunggu yang sedang berjalan dihentikan
+        self.generation = 0
+    
+    def set_limits(self, global_bps=None, host_bps=None, host_rps=None):
+        """Ubah batas saat berjalan; argumen None tidak diubah."""
+        with self._lock:
+            if global_bps is not None:
+                self.global_bps = global_bps
+                self._global.set_rate(global_bps)
+            if host_bps is not None:
+                self.host_bps = host_bps
+                for bucket in self._host_bytes.values():
+                    bucket.set_rate(host_bps)
+            if host_rps is not None:
+                self.host_rps = host_rps
+                for bucket in self._host_requests.values():
+                    bucket.set_rate(host_rps)
+            self.generation += 1
+    
+    def limits(self):
+        """Dict batas yang sedang berlaku."""
+        return {'global_bps': self.global_bps, 'host_bps': self.host_bps, 'host_rps': self.host_rps}
+    
+    @property
+    def active(self):
+        return bool(self.global_bps or self.host_bps or self.host_rps)
+    
+    def chunk_limit(self, url):
+        """
+        Ukuran baca maksimum untuk host URL, supaya satu chunk tidak
+        menghabiskan lebih dari SLEEP_SLICE detik kuota (None = tanpa batas).
+        """
+        rates = [rate for rate in (self.global_bps, self.host_bps) if rate]
+        if not rates:
+            return None
+        return max(int(min(rates) * self.SLEEP_SLICE), 16 * 1024)
+    
+    def _bucket(self, buckets, url, rate):
+        host = urlparse(url).netloc.lower()
+        with self._lock:
+            if host not in buckets:
+                buckets[host] = TokenBucket(rate)
+            return buckets[host]
+    
+    # Pengaturan bersama antar proses
+    def watch(self, path=DEFAULT_LIMITS_FILE):
+        """Pakai batas dari file pengaturan dan muat ulang saat file berubah."""
+        self._settings_path = Path(path)
+        self._settings_mtime = None
+        self._reload(force=True)
+        return self
+    
+    def save(self, path=None):
+        """Simpan batas saat ini ke file pengaturan."""
+        path = Path(path or self._settings_path or DEFAULT_LIMITS_FILE)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix('.tmp')
+        tmp.write_text(json.dumps(self.limits()), encoding='utf-8')
+        os.replace(tmp, path)
+        if path == self._settings_path:
+            self._settings_mtime = path.stat().st_mtime_ns
+    
+    def _reload(self, force=False):
+        if self._settings_path is None:
+            return
+        now = time.monotonic()
+        if not force and now - self._checked_at < self.RELOAD_INTERVAL:
+            return
+        self._checked_at = now
+        try:
+            mtime = self._settings_path.stat().st_mtime_ns
+            if mtime == self._settings_mtime:
+                return
+            settings = json.loads(self._settings_path.read_text(encoding='utf-8'))
+        except (OSError, ValueError):
+            return
+        self._settings_mtime = mtime
+        self.set_limits(**{key: float(settings[key]) for key in self.limits() if key in settings})
+    
+    # Reservasi (untuk asyncio) dan versi blocking
+    def reserve_request(self, url):
+        """Detik yang harus ditunggu sebelum request ke host URL boleh dikirim."""
+        self._reload()
+        if not self.host_rps:
+            return 0.0
+        return self._bucket(self._host_requests, url, self.host_rps).reserve(1)
+    
+    def reserve_bytes(self, url, n):
+        """Detik yang harus ditunggu setelah menerima n byte dari host URL."""
+        self._reload()
+        delay = self._global.reserve(n)
+        if self.host_bps:
+            delay = max(delay, self._bucket(self._host_bytes, url, self.host_bps).reserve(n))
+        return delay
+    
+    def sleep_slices(self, delay):
+        """
+        Potongan waktu tunggu untuk delay hasil reservasi.
+        
+        Berhenti lebih awal jika batas diubah selama menunggu, sehingga
+        download tidak tertahan oleh utang token dari batas lama.
+        """
+        end = time.monotonic() + delay
+        generation = self.generation
+        while True:
+            remaining = end - time.monotonic()
+            if remaining <= 0:
+                return
+            yield min(remaining, self.SLEEP_SLICE)
+            self._reload()
+            if self.generation != generation:
+                return
+    
+    def throttle_request(self, url):
+        """Tunggu sampai request ke host URL boleh dikirim."""
+        for pause in self.sleep_slices(self.reserve_request(url)):
+            time.sleep(pause)
+    
+    def throttle_bytes(self, url, n):
+        """Tunggu sesuai batas kecepatan setelah menerima n byte dari host URL."""
+        for pause in self.sleep_slices(self.reserve_bytes(url, n)):
+            time.sleep(pause)
+
+
+_default_limiter = None
+_default_limiter_lock = threading.Lock()
+
+
+def get_rate_limiter():
+    """
+    Ambil pembatas kecepatan bersama untuk proses ini.
+    
+    Dibuat saat pertama dipanggil dengan batas dari file pengaturan
+    (DEFAULT_LIMITS_FILE) dan terus memantau file tersebut.
+    """
+    global _default_limiter
+    with _default_limiter_lock:
+        if _default_limiter is None:
+            _default_limiter = RateLimiter().watch()
+        return _default_limiter
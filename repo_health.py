@@ -0,0 +1,264 @@
+"""
+Repository Health untuk Ebook Downloader
+========================================
+Pengukur latensi repository yang berjalan paralel di latar belakang.
+
+Setiap probe mengukur fase koneksi ke satu host secara terpisah: DNS,
+TCP connect, TLS handshake dan time to first byte (request HEAD). Hasil
+disimpan sebagai jendela bergulir per host di disk, sehingga statistik
+ketersediaan dan latensi tetap ada antar sesi. Sumber pencarian, mirror
+download dan kartu repository di GUI diurutkan dengan rank(): host yang
+sehat dan cepat lebih dulu, host yang belum pernah diukur di tengah, host
+yang sedang mati paling akhir.
+"""
+
+import json
+import os
+import socket
+import ssl
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from urllib.parse import urlparse
+
+DEFAULT_HEALTH_FILE = Path.home() / ".ebook_downloader" / "repo_health.json"
+
+USER_AGENT = "Mozilla/5.0 (compatible; EbookDownloader health probe)"
+
+
+def host_of(url):
+    return urlparse(url).netloc.lower()
+
+
+def probe(url, timeout=5.0):
+    """
+    Ukur DNS, connect, TLS dan time to first byte ke host URL.
+    
+    Alamat hasil DNS dicoba berurutan seperti socket.create_connection
+    (mis. IPv6 yang tidak terjangkau lalu IPv4); connect_ms mencakup semua
+    percobaan sampai ada alamat yang menjawab.
+    
+    Returns:
+        Dict {'host', 'address', 'ok', 'status', 'dns_ms', 'connect_ms',
+        'tls_ms', 'ttfb_ms', 'total_ms', 'error'}; address adalah IP yang
+        menjawab, fase yang tidak tercapai bernilai None. ok True jika server
+        membalas dengan status < 500 (atau 501/505).
+    """
+    parts = urlparse(url)
+    https = parts.scheme == 'https'
+    port = parts.port or (443 if https else 80)
+    result = {'host': host_of(url), 'address': None, 'ok': False, 'status': None, 'dns_ms': None,
+              'connect_ms': None, 'tls_ms': None, 'ttfb_ms': None, 'total_ms': None, 'error': None}
+    sock = None
+    start = time.perf_counter()
+    mark = start
+    
+    def phase(name):
+        nonlocal mark
+        now = time.perf_counter()
+        result[name] = round((now - mark) * 1000, 1)
+        mark = now
+    
+    try:
+        addresses = socket.getaddrinfo(parts.hostname, port, type=socket.SOCK_STREAM)
+        phase('dns_ms')
+        error = None
+        for family, kind, proto, _, address in addresses:
+            sock = socket.socket(family, kind, proto)
+            sock.settimeout(timeout)
+            try:
+                sock.connect(address)
+            except OSError as e:
+                sock.close()
+                sock, error = None, e
+                continue
+            result['address'] = address[0]
+            break
+        else:
+            raise error or OSError(f"Tidak ada alamat untuk {parts.hostname}")
+        phase('connect_ms')
+        if https:
+            sock = ssl.create_default_context().wrap_socket(sock, server_hostname=parts.hostname)
+            phase('tls_ms')
+        request = (f"HEAD {parts.path or '/'} HTTP/1.1\r\nHost: {parts.netloc}\r\n"
+                   f"User-Agent: {USER_AGENT}\r\nConnection: close\r\n\r\n")
+        sock.sendall(request.encode('ascii'))
+        status_line = sock.recv(64)
+        phase('ttfb_ms')
+        if not status_line:
+            raise ConnectionError("Koneksi ditutup sebelum ada balasan")
+        result['status'] = int(status_line.split()[1])
+        # 501/505: server hidup tetapi tidak mendukung HEAD/HTTP 1.1
+        result['ok'] = result['status'] < 500 or result['status'] in (501, 505)
+        if not result['ok']:
+            result['error'] = f"HTTP {result['status']}"
+    except (OSError, ValueError, IndexError) as e:
+        result['error'] = str(e) or type(e).__name__
+    finally:
+        if sock is not None:
+            sock.close()
+    result['total_ms'] = round((time.perf_counter() - start) * 1000, 1)
+    return result
+
+
+class HealthStore:
+    """Statistik kesehatan per host (jendela bergulir) yang disimpan di file JSON."""
+    
+    def __init__(self, path=DEFAULT_HEALTH_FILE, window=20):
+        """
+        Args:
+            path: File JSON statistik
+            window: Jumlah hasil probe terakhir yang disimpan per host
+        """
+        self.path = Path(path)
+        self.window = window
+        self._lock = threading.Lock()
+        try:
+            self._hosts = json.loads(self.path.read_text(encoding='utf-8'))
+        except (OSError, ValueError):
+            self._hosts = {}
+    
+    def record(self, result):
+        """Tambah satu hasil probe()."""
+        with self._lock:
+            entry = self._hosts.setdefault(result['host'], {'samples': []})
+            entry['samples'].append([time.time(), result['ok'], result['total_ms']])
+            del entry['samples'][:-self.window]
+            entry['last'] = {key: result.get(key) for key in
+                             ('status', 'address', 'dns_ms', 'connect_ms', 'tls_ms', 'ttfb_ms', 'error')}
+    
+    def save(self):
+        with self._lock:
+            data = json.dumps(self._hosts)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix('.tmp')
+        tmp.write_text(data, encoding='utf-8')
+        os.replace(tmp, self.path)
+    
+    def stats(self, host):
+        """
+        Statistik satu host.
+        
+        Returns:
+            Dict {'samples', 'availability' (0-1), 'median_ms', 'p90_ms',
+            'last_ok', 'last'} atau None jika host belum pernah diukur
+        """
+        with self._lock:
+            entry = self._hosts.get(host.lower())
+            if not entry or not entry['samples']:
+                return None
+            samples = list(entry['samples'])
+            last = dict(entry.get('last', {}))
+        latencies = sorted(ms for _, ok, ms in samples if ok)
+        return {
+            'samples': len(samples),
+            'availability': sum(1 for _, ok, _ in samples if ok) / len(samples),
+            'median_ms': statistics.median(latencies) if latencies else None,
+            'p90_ms': latencies[min(int(len(latencies) * 0.9), len(latencies) - 1)] if latencies else None,
+            'last_ok': samples[-1][1],
+            'last': last,
+        }
+    
+    def healthy(self, host):
+        """True/False jika sudah diukur, None jika belum."""
+        stats = self.stats(host)
+        if stats is None:
+            return None
+        return stats['last_ok'] and stats['availability'] >= 0.5
+    
+    def rank_key(self, host):
+        """Kunci urutan: sehat (menurut latensi median), belum diukur, lalu tidak sehat."""
+        stats = self.stats(host)
+        if stats is None:
+            return (1, 0.0)
+        if not self.healthy(host):
+            return (2, 1 - stats['availability'])
+        return (0, stats['median_ms'] or 0.0)
+    
+    def rank(self, items, key=None):
+        """
+        Urutkan items dari host paling sehat (urutan asal dipertahankan untuk nilai sama).
+        
+        Args:
+            items: List URL, atau objek lain jika key diberikan
+            key: Fungsi item -> URL (default: item itu sendiri)
+        """
+        return sorted(items, key=lambda item: self.rank_key(host_of(key(item) if key else item)))
+    
+    def describe(self, host):
+        """Ringkasan satu baris untuk ditampilkan (mis. "🟢 240 ms · 100%")."""
+        stats = self.stats(host)
+        if stats is None:
+            return "⚪ belum diukur"
+        availability = f"{stats['availability'] * 100:.0f}%"
+        if not self.healthy(host):
+            return f"🔴 bermasalah · {availability}"
+        icon = "🟢" if stats['median_ms'] < 1000 else "🟡"
+        return f"{icon} {stats['median_ms']:.0f} ms · {availability}"
+
+
+class RepositoryProber:
+    """Probe banyak repository secara paralel, sekali atau berkala di latar belakang."""
+    
+    def __init__(self, urls, store=None, workers=8, timeout=5.0):
+        """
+        Args:
+            urls: URL repository yang diukur (satu probe per host)
+            store: HealthStore (default: store bersama proses ini)
+            workers: Jumlah probe bersamaan
+            timeout: Timeout tiap fase koneksi (detik)
+        """
+        self.urls = list({host_of(url): url for url in urls}.values())
+        self.store = store or get_health_store()
+        self.workers = workers
+        self.timeout = timeout
+        self._stop = threading.Event()
+        self._thread = None
+    
+    def probe_all(self):
+        """Probe semua host paralel, catat dan simpan hasilnya; mengembalikan list hasil."""
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="probe") as executor:
+            results = list(executor.map(lambda url: probe(url, self.timeout), self.urls))
+        for result in results:
+            self.store.record(result)
+        try:
+            self.store.save()
+        except OSError:
+            pass
+        return results
+    
+    def start(self, interval=600.0, on_update=None):
+        """
+        Jalankan probe_all() sekarang lalu setiap interval detik di thread latar belakang.
+        
+        Args:
+            on_update: Callback (results) setelah setiap putaran
+        """
+        def run():
+            while not self._stop.is_set():
+                results = self.probe_all()
+                if on_update:
+                    on_update(results)
+                self._stop.wait(interval)
+        
+        self._thread = threading.Thread(target=run, name="repo-prober", daemon=True)
+        self._thread.start()
+        return self
+    
+    def stop(self):
+        self._stop.set()
+
+
+_default_store = None
+_default_store_lock = threading.Lock()
+
+
+def get_health_store():
+    """Ambil HealthStore bersama untuk proses ini (dibaca dari disk saat pertama dipanggil)."""
+    global _default_store
+    with _default_store_lock:
+        if _default_store is None:
+            _default_store = HealthStore()
+        return _default_store
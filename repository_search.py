@@ -0,0 +1,276 @@
+"""
+Repository Search untuk Ebook Downloader
+========================================
+Adapter pencarian yang memanggil endpoint pencarian asli repository
+universitas (EPrints) dan mengurai hasilnya dengan BeautifulSoup.
+
+Setiap adapter adalah callable(query) -> list hasil dengan format yang
+sama seperti hasil pencarian GUI:
+
+    {'title', 'url', 'source', 'description', 'is_direct'}
+
+Link PDF yang ditemukan dikembalikan dengan is_direct=True. Record yang
+file-nya tidak bisa ditemukan tetap dikembalikan sebagai link halaman
+(is_direct=False). Setiap adapter punya batas waktu (deadline) sendiri;
+hasil yang sudah terkumpul saat deadline habis tetap dikembalikan.
+"""
+
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from urllib.parse import quote_plus, urljoin, urlparse
+
+import requests
+from bs4 import BeautifulSoup
+
+from ebook_downloader import get_connection_pool
+from repo_health import get_health_store
+from retry_policy import get_circuit_breaker
+
+
+RECORD_PATH = re.compile(r'^/(?:id/eprint/)?\d+/?$')
+
+
+class SearchDeadlineError(requests.exceptions.Timeout):
+    """Deadline adapter habis sebelum halaman hasil pencarian diterima."""
+
+
+class RepositoryAdapter:
+    """
+    Dasar adapter pencarian satu repository.
+    
+    Subclass mengisi search_url() dan parse_results(); pencarian,
+    deadline dan pencarian link PDF dari halaman record diurus di sini.
+    """
+    
+    def __init__(self, name, short_name, base_url, description="", deadline=8.0,
+                 max_results=10, pool=None):
+        """
+        Args:
+            name: Nama repository (mis. "Repository UPI")
+            short_name: Label sumber di hasil pencarian (mis. "UPI")
+            base_url: URL dasar repository
+            description: Keterangan repository
+            deadline: Batas waktu total pencarian adapter ini (detik)
+            max_results: Jumlah record maksimum yang dikembalikan
+            pool: ConnectionPool (default: pool bersama proses ini)
+        """
+        self.name = name
+        self.short_name = short_name
+        self.base_url = base_url.rstrip('/')
+        self.description = description
+        self.deadline = deadline
+        self.max_results = max_results
+        self._pool = pool
+    
+    @property
+    def pool(self):
+        return self._pool or get_connection_pool()
+    
+    @property
+    def host(self):
+        return urlparse(self.base_url).netloc
+    
+    def __repr__(self):
+        return f"{type(self).__name__}({self.short_name!r}, {self.base_url!r})"
+    
+    def __call__(self, query):
+        return self.search(query)
+    
+    def search_url(self, query):
+        raise NotImplementedError
+    
+    def parse_results(self, html, page_url):
+        """
+        Urai halaman hasil pencarian.
+        
+        Returns:
+            List dict {'title', 'record_url', 'pdf_url', 'description'};
+            pdf_url boleh None jika tidak tercantum di halaman hasil
+        """
+        raise NotImplementedError
+    
+    def pdf_from_record(self, html, page_url):
+        """Cari link PDF di halaman record (meta tag Google Scholar/EPrints)."""
+        soup = BeautifulSoup(html, 'html.parser')
+        for name in ('citation_pdf_url', 'eprints.document_url'):
+            for meta in soup.find_all('meta', attrs={'name': name}):
+                content = meta.get('content', '')
+                if content.lower().endswith('.pdf'):
+                    return urljoin(page_url, content)
+        return None
+    
+    def _get(self, url, deadline_at):
+        remaining = deadline_at - time.monotonic()
+        if remaining <= 0:
+            raise SearchDeadlineError(f"{self.name}: deadline habis")
+        # Repository yang sedang mati langsung dilewati (circuit breaker bersama download)
+        breaker = get_circuit_breaker()
+        breaker.check(url)
+        try:
+            response = self.pool.get(url, timeout=min(remaining, 30))
+        except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
+            breaker.record_failure(url)
+            raise
+        if response.status_code >= 500:
+            breaker.record_failure(url)
+        else:
+            breaker.record_success(url)
+        response.raise_for_status()
+        return response
+    
+    def search(self, query):
+        """
+        Cari query di repository ini.
+        
+        Returns:
+            List hasil (PDF langsung lebih dulu)
+        
+        Raises:
+            requests.exceptions.RequestException: Jika halaman hasil gagal diambil
+        """
+        deadline_at = time.monotonic() + self.deadline
+        url = self.search_url(query)
+        response = self._get(url, deadline_at)
+        records = self.parse_results(response.text, response.url)[:self.max_results]
+        
+        # Record tanpa link PDF di halaman hasil: cek halaman record secara
+        # paralel, selama deadline masih ada
+        missing = [r for r in records if not r['pdf_url']]
+        if missing:
+            executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix=f"search-{self.short_name}")
+            futures = {executor.submit(self._get, r['record_url'], deadline_at): r for r in missing}
+            done, pending = wait(futures, timeout=max(deadline_at - time.monotonic(), 0))
+            for future in pending:
+                future.cancel()
+            executor.shutdown(wait=False)
+            for future in done:
+                if future.exception() is None:
+                    page = future.result()
+                    futures[future]['pdf_url'] = self.pdf_from_record(page.text, page.url)
+        
+        results = [self._to_result(r) for r in records]
+        results.sort(key=lambda r: not r['is_direct'])
+        return results
+    
+    def _to_result(self, record):
+        is_direct = bool(record['pdf_url'])
+        return {
+            'title': record['title'],
+            'url': record['pdf_url'] if is_direct else record['record_url'],
+            'source': self.short_name,
+            'description': record['description'] or self.description,
+            'is_direct': is_direct,
+        }
+
+
+class EPrintsAdapter(RepositoryAdapter):
+    """Adapter untuk repository EPrints 3 (/cgi/search/simple)."""
+    
+    def search_url(self, query):
+        return f"{self.base_url}/cgi/search/simple?q={quote_plus(query)}&_action_search=Search"
+    
+    def parse_results(self, html, page_url):
+        soup = BeautifulSoup(html, 'html.parser')
+        records = []
+        for row in soup.select('tr.ep_search_result, div.ep_search_result'):
+            record_link = None
+            for a in row.find_all('a', href=True):
+                href = urljoin(page_url, a['href'])
+                # Link record EPrints: https://host/<id>/ atau /id/eprint/<id>/
+                if 'ep_document_link' not in (a.get('class') or []) and \
+                        RECORD_PATH.match(urlparse(href).path):
+                    record_link = a
+                    break
+            if record_link is None:
+                continue
+            
+            pdf_url = None
+            for a in row.select('a.ep_document_link[href]'):
+                href = urljoin(page_url, a['href'])
+                if urlparse(href).path.lower().endswith('.pdf'):
+                    pdf_url = href
+                    break
+            
+            title = ' '.join(record_link.get_text(' ', strip=True).split()).rstrip('.')
+            # Teks sitasi tanpa nomor urut hasil ("1. ")
+            citation = re.sub(r'^\d+\.\s*', '', ' '.join(row.get_text(' ', strip=True).split()))
+            records.append({
+                'title': title or urljoin(page_url, record_link['href']),
+                'record_url': urljoin(page_url, record_link['href']),
+                'pdf_url': pdf_url,
+                'description': citation[:200],
+            })
+        return records
+
+
+def google_scholar_links(query):
+    """Link pencarian Google Scholar dan Google (filetype:pdf) untuk query."""
+    encoded = quote_plus(query)
+    return [
+        {
+            'title': f"📚 Cari '{query}' di Google Scholar",
+            'url': f"https://scholar.google.com/scholar?q={encoded}",
+            'source': 'Scholar',
+            'description': 'Cari paper dan jurnal akademik',
+            'is_direct': False
+        },
+        {
+            'title': f"📄 Cari '{query}' PDF di Google",
+            'url': f"https://www.google.com/search?q={encoded}+filetype:pdf",
+            'source': 'Google',
+            'description': 'Cari file PDF langsung',
+            'is_direct': False
+        },
+    ]
+
+
+def indonesian_university_links(query):
+    """Link pencarian Google untuk universitas Indonesia lain (.ac.id)."""
+    encoded = quote_plus(query)
+    return [{
+        'title': f"🇮🇩 Cari '{query}' di semua universitas Indonesia",
+        'url': f"https://www.google.com/search?q={encoded}+site:ac.id+filetype:pdf",
+        'source': 'Repo ID',
+        'description': 'Cari PDF di semua universitas Indonesia (.ac.id)',
+        'is_direct': False
+    }]
+
+
+def search_sources(source):
+    """
+    Sumber pencarian untuk pilihan search_source.
+    
+    Args:
+        source: "all", "repo_id", "scholar" atau "library" (dokumen yang
+            sudah diunduh, lihat library_index)
+    
+    Returns:
+        List callable(query) -> list hasil; repository diurutkan dari yang
+        paling sehat menurut repo_health, sehingga hasilnya tampil lebih dulu
+    """
+    if source == "library":
+        from library_index import search_library
+        return [search_library]
+    sources = []
+    if source in ("all", "repo_id"):
+        sources.extend(get_health_store().rank(REPOSITORIES, key=lambda repo: repo.base_url))
+        sources.append(indonesian_university_links)
+    if source in ("all", "scholar"):
+        sources.append(google_scholar_links)
+    return sources
+
+
+# Repository universitas Indonesia yang dicari secara paralel
+REPOSITORIES = [
+    EPrintsAdapter("Repository UPI", "UPI", "https://repository.upi.edu",
+                   "Universitas Pendidikan Indonesia"),
+    EPrintsAdapter("Repository UMJ", "UMJ", "https://repository.umj.ac.id",
+                   "Universitas Muhammadiyah Jakarta"),
+    EPrintsAdapter("Repository UNY", "UNY", "https://eprints.uny.ac.id",
+                   "Universitas Negeri Yogyakarta"),
+    EPrintsAdapter("Repository UGM", "UGM", "https://repository.ugm.ac.id",
+                   "Universitas Gadjah Mada"),
+    EPrintsAdapter("Repository USD", "USD", "https://repository.usd.ac.id",
+                   "Universitas Sanata Dharma"),
+]
@@ -0,0 +1,179 @@
+"""
+Retry Policy untuk Ebook Downloader
+===================================
+Percobaan ulang dengan exponential backoff + jitter, dan circuit breaker
+per host.
+
+- RetryPolicy menentukan status HTTP mana yang diulang (429, 5xx) dan
+  berapa lama menunggu: "full jitter" (acak antara 0 dan base * 2^n,
+  dibatasi cap), atau nilai header Retry-After jika server mengirimnya.
+- CircuitBreaker menghitung kegagalan berturut-turut per host (error
+  koneksi, timeout, 5xx). Setelah ambang terlampaui, request ke host itu
+  langsung gagal (CircuitOpenError) selama reset_timeout detik, lalu satu
+  request percobaan dibiarkan lewat. Worker tidak lagi tertahan timeout
+  panjang saat sebuah repository sedang mati.
+"""
+
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlparse
+
+import requests
+
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+
+def parse_retry_after(value):
+    """
+    Baca header Retry-After (detik atau tanggal HTTP).
+    
+    Returns:
+        Detik tunggu (>= 0), atau None jika header kosong/tidak valid
+    """
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(when.timestamp() - time.time(), 0.0)
+
+
+class RetryPolicy:
+    """Aturan percobaan ulang dengan exponential backoff + jitter."""
+    
+    def __init__(self, retries=3, base=0.5, cap=30.0, max_retry_after=120.0, statuses=RETRY_STATUSES):
+        """
+        Args:
+            retries: Jumlah percobaan ulang maksimum
+            base: Backoff dasar (detik) untuk percobaan ulang pertama
+            cap: Backoff maksimum (detik)
+            max_retry_after: Retry-After lebih lama dari ini tidak ditunggu
+                (request langsung dianggap gagal)
+            statuses: Status HTTP yang boleh diulang
+        """
+        self.retries = retries
+        self.base = base
+        self.cap = cap
+        self.max_retry_after = max_retry_after
+        self.statuses = frozenset(statuses)
+    
+    def should_retry(self, status):
+        return status in self.statuses
+    
+    def backoff(self, attempt):
+        """Backoff full jitter untuk percobaan ke-attempt (mulai 0)."""
+        return random.uniform(0, min(self.cap, self.base * 2 ** attempt))
+    
+    def delay(self, attempt, retry_after=None):
+        """
+        Lama tunggu sebelum percobaan berikutnya.
+        
+        Args:
+            attempt: Nomor percobaan yang baru gagal (mulai 0)
+            retry_after: Nilai header Retry-After (opsional)
+        
+        Returns:
+            Detik tunggu, atau None jika Retry-After melebihi max_retry_after
+        """
+        wait = parse_retry_after(retry_after)
+        if wait is None:
+            return self.backoff(attempt)
+        if wait > self.max_retry_after:
+            return None
+        return wait
+
+
+class CircuitOpenError(requests.exceptions.ConnectionError):
+    """Host sedang dianggap mati; request tidak dikirim."""
+    
+    def __init__(self, host, retry_in):
+        self.host = host
+        self.retry_in = retry_in
+        super().__init__(f"{host} sedang tidak bisa dihubungi (circuit breaker terbuka, "
+                         f"dicoba lagi dalam {retry_in:.0f} detik)")
+
+
+class CircuitBreaker:
+    """Circuit breaker per host: closed -> open -> half-open -> closed."""
+    
+    def __init__(self, failure_threshold=5, reset_timeout=30.0):
+        """
+        Args:
+            failure_threshold: Jumlah kegagalan berturut-turut sebelum circuit terbuka
+            reset_timeout: Lama circuit terbuka sebelum satu request percobaan diizinkan
+        """
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._lock = threading.Lock()
+        # host -> [kegagalan berturut-turut, waktu circuit dibuka atau None]
+        self._hosts = {}
+    
+    @staticmethod
+    def _host(url):
+        return urlparse(url).netloc.lower()
+    
+    def check(self, url):
+        """
+        Pastikan request ke host URL boleh dikirim.
+        
+        Saat reset_timeout sudah lewat, satu request percobaan diizinkan
+        (half-open); request lain tetap ditolak sampai hasilnya dicatat.
+        
+        Raises:
+            CircuitOpenError: Jika circuit host sedang terbuka
+        """
+        host = self._host(url)
+        with self._lock:
+            state = self._hosts.get(host)
+            if state is None or state[1] is None:
+                return
+            retry_in = state[1] + self.reset_timeout - time.monotonic()
+            if retry_in > 0:
+                raise CircuitOpenError(host, retry_in)
+            # Half-open: request ini percobaannya, yang lain menunggu satu periode lagi
+            state[1] = time.monotonic()
+    
+    def is_open(self, url):
+        """True jika request ke host URL saat ini akan ditolak check()."""
+        with self._lock:
+            state = self._hosts.get(self._host(url))
+            return bool(state and state[1] is not None
+                        and state[1] + self.reset_timeout > time.monotonic())
+    
+    def record_success(self, url):
+        with self._lock:
+            self._hosts.pop(self._host(url), None)
+    
+    def record_failure(self, url):
+        host = self._host(url)
+        with self._lock:
+            state = self._hosts.setdefault(host, [0, None])
+            state[0] += 1
+            if state[0] >= self.failure_threshold:
+                state[1] = time.monotonic()
+    
+    def open_hosts(self):
+        """Host yang circuit-nya sedang terbuka."""
+        now = time.monotonic()
+        with self._lock:
+            return sorted(host for host, (_, opened) in self._hosts.items()
+                          if opened is not None and opened + self.reset_timeout > now)
+
+
+_default_breaker = None
+_default_breaker_lock = threading.Lock()
+
+
+def get_circuit_breaker():
+    """Ambil circuit breaker bersama untuk proses ini (dibuat saat pertama dipanggil)."""
+    global _default_breaker
+    with _default_breaker_lock:
+        if _default_breaker is None:
+            _default_breaker = CircuitBreaker()
+        return _default_breaker
@@ -0,0 +1,162 @@
+"""
+Search Cache untuk Ebook Downloader
+===================================
+Cache hasil pencarian di disk (SQLite) dengan kunci query yang sudah
+dinormalisasi dan pilihan sumber pencarian (search_source).
+
+- Setiap sumber punya TTL sendiri. Entri yang melewati TTL masih
+  dikembalikan (ditandai basi) selama masa tenggang, supaya hasil bisa
+  langsung ditampilkan sambil pencarian baru berjalan di latar belakang.
+- Ukuran cache dibatasi (total byte hasil); entri yang paling lama tidak
+  dipakai dibuang lebih dulu (LRU).
+- Penghitung hit/miss tersedia lewat stats().
+- Sumber lokal (library) tidak di-cache: indeksnya sendiri sudah cepat
+  dan isinya berubah setiap ada download baru.
+"""
+
+import json
+import sqlite3
+import threading
+import time
+import unicodedata
+from pathlib import Path
+
+DEFAULT_SEARCH_CACHE = Path.home() / ".ebook_downloader" / "search_cache.sqlite3"
+
+# TTL per search_source (detik)
+SOURCE_TTL = {
+    'all': 6 * 3600,
+    'repo_id': 6 * 3600,
+    'scholar': 7 * 24 * 3600,
+}
+DEFAULT_TTL = 6 * 3600
+
+# search_source yang tidak pernah di-cache
+UNCACHED_SOURCES = frozenset({'library'})
+
+
+def normalize_query(query):
+    """Normalisasi query: NFKC, huruf kecil, spasi dirapatkan."""
+    return ' '.join(unicodedata.normalize('NFKC', query).casefold().split())
+
+
+class SearchCache:
+    """Cache TTL + LRU untuk hasil pencarian."""
+    
+    def __init__(self, path=DEFAULT_SEARCH_CACHE, max_bytes=8 * 1024 * 1024,
+                 source_ttl=None, stale_grace=7 * 24 * 3600):
+        """
+        Args:
+            path: File SQLite cache
+            max_bytes: Total ukuran hasil (JSON) maksimum sebelum entri LRU dibuang
+            source_ttl: Dict {search_source: TTL detik} (default SOURCE_TTL)
+            stale_grace: Berapa lama entri basi masih boleh ditampilkan (detik)
+        """
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.source_ttl = dict(SOURCE_TTL, **(source_ttl or {}))
+        self.stale_grace = stale_grace
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(str(self.path), check_same_thread=False)
+        with self._db:
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS searches ("
+                " source TEXT NOT NULL, query TEXT NOT NULL, results TEXT NOT NULL,"
+                " size INTEGER NOT NULL, stored_at REAL NOT NULL, accessed_at REAL NOT NULL,"
+                " PRIMARY KEY (source, query))"
+            )
+            self._db.execute("CREATE INDEX IF NOT EXISTS searches_lru ON searches (accessed_at)")
+    
+    def ttl(self, source):
+        return self.source_ttl.get(source, DEFAULT_TTL)
+    
+    def get(self, query, source):
+        """
+        Ambil hasil pencarian dari cache.
+        
+        Returns:
+            Tuple (results, fresh) atau None jika tidak ada. fresh False
+            berarti entri sudah melewati TTL dan sebaiknya diperbarui.
+        """
+        if source in UNCACHED_SOURCES:
+            return None
+        key = normalize_query(query)
+        now = time.time()
+        with self._lock:
+            row = self._db.execute(
+                "SELECT results, stored_at FROM searches WHERE source = ? AND query = ?",
+                (source, key),
+            ).fetchone()
+            age = now - row[1] if row else None
+            if row is None or age > self.ttl(source) + self.stale_grace:
+                self.misses += 1
+                return None
+            
+            with self._db:
+                self._db.execute(
+                    "UPDATE searches SET accessed_at = ? WHERE source = ? AND query = ?",
+                    (now, source, key),
+                )
+            fresh = age <= self.ttl(source)
+            if fresh:
+                self.hits += 1
+            else:
+                self.stale_hits += 1
+        return json.loads(row[0]), fresh
+    
+    def put(self, query, source, results):
+        """Simpan hasil pencarian lalu buang entri LRU jika cache melebihi max_bytes."""
+        if source in UNCACHED_SOURCES:
+            return
+        data = json.dumps(results, ensure_ascii=False)
+        now = time.time()
+        with self._lock, self._db:
+            self._db.execute(
+                "INSERT OR REPLACE INTO searches (source, query, results, size, stored_at, accessed_at)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                (source, normalize_query(query), data, len(data), now, now),
+            )
+            self._evict()
+    
+    def _evict(self):
+        total = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM searches").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        for source, query, size in self._db.execute(
+                "SELECT source, query, size FROM searches ORDER BY accessed_at").fetchall():
+            self._db.execute("DELETE FROM searches WHERE source = ? AND query = ?", (source, query))
+            total -= size
+            if total <= self.max_bytes:
+                break
+    
+    def stats(self):
+        """
+        Statistik cache untuk sesi ini.
+        
+        Returns:
+            Dict hits, stale_hits, misses, hit_rate (0-1), entries, bytes
+        """
+        with self._lock:
+            entries, size = self._db.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM searches").fetchone()
+            lookups = self.hits + self.stale_hits + self.misses
+            return {
+                'hits': self.hits,
+                'stale_hits': self.stale_hits,
+                'misses': self.misses,
+                'hit_rate': (self.hits + self.stale_hits) / lookups if lookups else 0.0,
+                'entries': entries,
+                'bytes': size,
+            }
+    
+    def clear(self):
+        with self._lock, self._db:
+            self._db.execute("DELETE FROM searches")
+    
+    def close(self):
+        with self._lock:
+            self._db.close()
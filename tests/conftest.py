@@ -0,0 +1,43 @@
+"""Fixture bersama untuk test Ebook Downloader."""
+
+import random
+import sys
+import zipfile
+from pathlib import Path
+
+import pytest
+
+# Modul proyek berada di root repo (bukan paket)
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from library_index import LibraryIndex  # noqa: E402
+
+
+def words(count, seed):
+    """Teks acak yang deterministik (count kata)."""
+    rng = random.Random(seed)
+    return ' '.join(''.join(rng.choice('abcdefghijklmnopqrstuvwxyz') for _ in range(rng.randint(3, 9)))
+                    for _ in range(count))
+
+
+def write_epub(path, text, title="Judul", author="Penulis"):
+    """Tulis EPUB minimal berisi satu bab dengan teks text."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with zipfile.ZipFile(path, 'w') as epub:
+        epub.writestr('mimetype', 'application/epub+zip')
+        epub.writestr('OEBPS/content.opf',
+                      f'<package><metadata><dc:title>{title}</dc:title>'
+                      f'<dc:creator>{author}</dc:creator></metadata></package>')
+        epub.writestr('OEBPS/bab1.xhtml', f'<html><body><p>{text}</p></body></html>')
+    return path
+
+
+@pytest.fixture
+def library(tmp_path):
+    """Folder download kosong dan LibraryIndex di database sementara."""
+    folder = tmp_path / "downloads"
+    folder.mkdir()
+    index = LibraryIndex(tmp_path / "library.sqlite3")
+    yield folder, index
+    index.close()
@@ -0,0 +1,123 @@
+"""Test deteksi jenis file dari isi stream (magic bytes dan penanda akhir)."""
+
+import http.server
+import threading
+
+import pytest
+
+from ebook_downloader import (
+    ConnectionPool, ContentSniffer, ContentTypeError, CorruptFileError, EbookDownloader, sniff_type,
+)
+from rate_limit import RateLimiter
+from retry_policy import CircuitBreaker, RetryPolicy
+
+PDF = b'%PDF-1.7\n' + b'x' * 5000 + b'\n%%EOF\n'
+HTML = b'<!DOCTYPE html><html><head><title>Login</title></head><body>' + b'y' * 3000 + b'</body></html>'
+
+
+@pytest.mark.parametrize('head, final, kind', [
+    (PDF[:1024], False, 'pdf'),
+    (b'PK\x03\x04' + b'\0' * 26 + b'mimetypeapplication/epub+zip' + b'\0' * 10, False, 'epub'),
+    (b'PK\x03\x04' + b'\0' * 26 + b'word/document.xml' + b'\0' * 20, False, 'zip'),
+    (b'PK\x03\x04\0\0', False, None),           # belum cukup untuk membedakan EPUB/ZIP
+    (b'AT&TFORM\0\0', False, 'djvu'),
+    (b'\xef\xbb\xbf\n  <html lang="id">', False, 'html'),
+    (b'<!-- komentar -->', False, 'html'),
+    (b'junk\n' * 10 + b'%PDF-1.4\n' + b'z' * 1000, False, 'pdf'),
+    (b'tidak dikenal', False, None),
+    (b'tidak dikenal', True, 'unknown'),
+])
+def test_sniff_type(head, final, kind):
+    assert sniff_type(head, final) == kind
+
+
+def test_html_is_rejected_on_first_chunk():
+    sniffer = ContentSniffer()
+    with pytest.raises(ContentTypeError):
+        sniffer.feed(HTML[:512])
+
+
+def test_type_is_decided_across_small_chunks():
+    sniffer = ContentSniffer()
+    for i in range(0, len(PDF), 3):
+        sniffer.feed(PDF[i:i + 3])
+    assert sniffer.kind == 'pdf'
+    sniffer.finish()
+
+
+def test_eof_marker_split_between_chunks():
+    sniffer = ContentSniffer()
+    cut = len(PDF) - 4
+    sniffer.feed(PDF[:cut])
+    sniffer.feed(PDF[cut:])
+    sniffer.finish()
+
+
+def test_truncated_pdf_is_corrupt():
+    sniffer = ContentSniffer()
+    sniffer.feed(PDF[:-10])
+    with pytest.raises(CorruptFileError):
+        sniffer.finish()
+
+
+def test_short_stream_is_decided_on_finish():
+    sniffer = ContentSniffer()
+    sniffer.feed(b'PK\x03\x04\0\0')
+    assert sniffer.kind is None
+    sniffer.finish()
+    assert sniffer.kind == 'zip'
+
+
+def test_from_part_restores_head_and_tail(tmp_path):
+    part = tmp_path / 'buku.pdf.part'
+    part.write_bytes(PDF)
+    
+    sniffer = ContentSniffer.from_part(part, len(PDF) - 4)
+    sniffer.feed(PDF[-4:])
+    
+    assert sniffer.kind == 'pdf'
+    sniffer.finish()
+
+
+def test_from_part_rejects_resumed_html(tmp_path):
+    part = tmp_path / 'buku.pdf.part'
+    part.write_bytes(HTML[:2000])
+    
+    with pytest.raises(ContentTypeError):
+        ContentSniffer.from_part(part, 2000)
+
+
+class MislabelledServer(http.server.ThreadingHTTPServer):
+    """Server yang mengirim halaman HTML dengan Content-Type application/octet-stream."""
+    
+    def __init__(self):
+        super().__init__(('127.0.0.1', 0), MislabelledHandler)
+        self.url = f"http://127.0.0.1:{self.server_port}/buku.pdf"
+
+
+class MislabelledHandler(http.server.BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    
+    def log_message(self, *args):
+        pass
+    
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/octet-stream')
+        self.send_header('Content-Length', str(len(HTML)))
+        self.end_headers()
+        self.wfile.write(HTML)
+
+
+def test_fetch_discards_mislabelled_html(tmp_path):
+    server = MislabelledServer()
+    threading.Thread(target=server.serve_forever, args=(0.05,), daemon=True).start()
+    downloader = EbookDownloader(download_folder=tmp_path, pool=ConnectionPool(), limiter=RateLimiter(),
+                                 retry=RetryPolicy(retries=0), breaker=CircuitBreaker())
+    try:
+        with pytest.raises(ContentTypeError):
+            downloader.fetch(server.url)
+    finally:
+        server.shutdown()
+        server.server_close()
+    assert not list(tmp_path.iterdir())
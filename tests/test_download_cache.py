@@ -0,0 +1,149 @@
+"""Test cache download berbasis isi dan revalidasi kondisional."""
+
+import http.server
+import os
+import sqlite3
+import threading
+
+import pytest
+
+from download_cache import DownloadCache, hash_file, link_or_copy
+from ebook_downloader import ConnectionPool, EbookDownloader
+from rate_limit import RateLimiter
+from retry_policy import CircuitBreaker, RetryPolicy
+
+DATA = b'%PDF-1.4\n' + os.urandom(50_000) + b'\n%%EOF\n'
+
+
+class CacheServer(http.server.ThreadingHTTPServer):
+    """Server satu file yang membalas 304 untuk If-None-Match yang cocok."""
+    
+    def __init__(self):
+        super().__init__(('127.0.0.1', 0), CacheHandler)
+        self.etag = '"v1"'
+        self.requests = []
+        self.url = f"http://127.0.0.1:{self.server_port}/buku.pdf"
+
+
+class CacheHandler(http.server.BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    
+    def log_message(self, *args):
+        pass
+    
+    def do_GET(self):
+        self.server.requests.append(self.headers.get('If-None-Match'))
+        if self.headers.get('If-None-Match') == self.server.etag:
+            self.send_response(304)
+            self.send_header('ETag', self.server.etag)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/pdf')
+        self.send_header('ETag', self.server.etag)
+        self.send_header('Content-Length', str(len(DATA)))
+        self.end_headers()
+        self.wfile.write(DATA)
+
+
+@pytest.fixture
+def server():
+    server = CacheServer()
+    thread = threading.Thread(target=server.serve_forever, args=(0.05,), daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = DownloadCache(tmp_path / "cache", timeout=0.1)
+    yield cache
+    cache.close()
+
+
+def make_downloader(folder, cache):
+    return EbookDownloader(download_folder=folder, pool=ConnectionPool(), cache=cache, limiter=RateLimiter(),
+                           retry=RetryPolicy(retries=0), breaker=CircuitBreaker())
+
+
+def test_store_and_lookup_share_one_object(cache, tmp_path):
+    a = tmp_path / 'a.pdf'
+    a.write_bytes(DATA)
+    b = tmp_path / 'b.pdf'
+    b.write_bytes(DATA)
+    
+    sha256 = cache.store('http://satu/a.pdf', a, etag='"v1"')
+    assert cache.store('http://dua/b.pdf', b, last_modified='Wed, 01 Jan 2025 00:00:00 GMT') == sha256
+    
+    assert sha256 == hash_file(a)
+    assert list(cache.objects.rglob('*')) == [cache.object_path(sha256).parent, cache.object_path(sha256)]
+    entry = cache.lookup('http://satu/a.pdf')
+    assert entry == {'sha256': sha256, 'etag': '"v1"', 'last_modified': None, 'size': len(DATA),
+                     'filename': 'a.pdf'}
+    assert cache.conditional_headers(entry) == {'If-None-Match': '"v1"'}
+    assert cache.conditional_headers(cache.lookup('http://dua/b.pdf')) == {
+        'If-Modified-Since': 'Wed, 01 Jan 2025 00:00:00 GMT'}
+    assert cache.lookup('http://lain/c.pdf') is None
+
+
+def test_lookup_forgets_changed_object(cache, tmp_path):
+    path = tmp_path / 'a.pdf'
+    path.write_bytes(DATA)
+    sha256 = cache.store('http://satu/a.pdf', path)
+    
+    with open(cache.object_path(sha256), 'ab') as f:
+        f.write(b'diubah')
+    
+    assert cache.lookup('http://satu/a.pdf') is None
+    assert not cache.object_path(sha256).exists()
+
+
+def test_link_or_copy_replaces_destination(tmp_path):
+    src = tmp_path / 'src.pdf'
+    src.write_bytes(DATA)
+    dst = tmp_path / 'dst.pdf'
+    dst.write_bytes(b'lama')
+    
+    assert link_or_copy(src, dst) in ('reflink', 'hardlink', 'copy')
+    assert dst.read_bytes() == DATA
+    assert not list(tmp_path.glob('.*.tmp'))
+
+
+def test_not_modified_response_restores_from_cache(server, cache, tmp_path):
+    first = make_downloader(tmp_path / 'satu', cache)
+    filepath, _ = first.fetch(server.url)
+    second = make_downloader(tmp_path / 'dua', cache)
+    
+    restored, size = second.fetch(server.url)
+    
+    assert server.requests == [None, '"v1"']
+    assert (restored, size) == (tmp_path / 'dua' / 'buku.pdf', len(DATA))
+    assert restored.read_bytes() == DATA
+
+
+def test_changed_file_is_downloaded_again(server, cache, tmp_path):
+    make_downloader(tmp_path / 'satu', cache).fetch(server.url)
+    server.etag = '"v2"'
+    
+    filepath, _ = make_downloader(tmp_path / 'dua', cache).fetch(server.url)
+    
+    assert server.requests == [None, '"v1"']
+    assert filepath.read_bytes() == DATA
+    assert cache.lookup(server.url)['etag'] == '"v2"'
+
+
+def test_locked_cache_does_not_fail_download(server, cache, tmp_path):
+    # Proses lain sedang menulis index.sqlite3
+    other = sqlite3.connect(str(cache.root / "index.sqlite3"))
+    other.execute("BEGIN EXCLUSIVE")
+    try:
+        filepath, size = make_downloader(tmp_path / 'satu', cache).fetch(server.url)
+    finally:
+        other.rollback()
+        other.close()
+    
+    assert filepath.read_bytes() == DATA
+    assert size == len(DATA)
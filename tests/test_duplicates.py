@@ -0,0 +1,151 @@
+"""Test deteksi duplikat persis/hampir duplikat dan penggantian dengan hardlink."""
+
+import os
+import shutil
+
+from conftest import words, write_epub
+from duplicates import (
+    NUM_BINS, find_duplicates, find_near_duplicates, link_duplicates, minhash_signature, similarity,
+)
+
+
+def make_copies(folder, index, names, text):
+    """Satu EPUB dan salinan persisnya, diindeks berurutan sesuai names."""
+    first = write_epub(folder / names[0], text)
+    paths = [first]
+    for name in names[1:]:
+        path = folder / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        shutil.copyfile(first, path)
+        paths.append(path)
+    for path in paths:
+        index.add_file(path)
+    return paths
+
+
+def test_find_duplicates_groups_identical_files(library):
+    folder, index = library
+    a, b, c = make_copies(folder, index, ['a.epub', 'b.epub', 'sub/c.epub'], words(300, 1))
+    write_epub(folder / 'lain.epub', words(300, 2))
+    index.update(folder)
+    
+    groups = find_duplicates(index, folder)
+    
+    assert len(groups) == 1
+    group = groups[0]
+    assert group.paths == [a.resolve(), b.resolve(), c.resolve()]
+    assert group.size == a.stat().st_size
+    assert group.wasted == 2 * group.size
+
+
+def test_find_duplicates_limited_to_folder(library, tmp_path):
+    folder, index = library
+    other = tmp_path / "lain"
+    text = words(300, 3)
+    a = write_epub(folder / 'a.epub', text)
+    other.mkdir()
+    shutil.copyfile(a, other / 'a.epub')
+    index.update([folder, other])
+    
+    assert len(find_duplicates(index)) == 1
+    assert find_duplicates(index, folder) == []
+
+
+def test_link_replaces_copies_with_hardlinks_and_reindexes(library):
+    folder, index = library
+    a, b, c = make_copies(folder, index, ['a.epub', 'b.epub', 'c.epub'], words(300, 4))
+    # Sisa nama sementara dari percobaan yang terputus ditimpa
+    (folder / '.b.epub.tmp').write_bytes(b'sisa')
+    groups = find_duplicates(index, folder)
+    
+    linked, saved, skipped = link_duplicates(index, groups)
+    
+    assert (linked, saved, skipped) == (2, 2 * groups[0].size, [])
+    assert os.path.samefile(a, b) and os.path.samefile(a, c)
+    assert not list(folder.glob('.*.tmp'))
+    # Setelah di-link setiap salinan dicatat ulang dan tidak lagi boros ruang
+    assert index.is_current(b) and index.is_current(c)
+    assert find_duplicates(index, folder)[0].wasted == 0
+    assert index.update(folder)['unchanged'] == 3
+    assert link_duplicates(index, find_duplicates(index, folder)) == (0, 0, [])
+
+
+def test_link_dry_run_changes_nothing(library):
+    folder, index = library
+    a, b = make_copies(folder, index, ['a.epub', 'b.epub'], words(300, 5))
+    groups = find_duplicates(index, folder)
+    
+    assert link_duplicates(index, groups, dry_run=True) == (1, groups[0].size, [])
+    assert not os.path.samefile(a, b)
+
+
+def test_link_skips_files_changed_since_indexing(library):
+    folder, index = library
+    a, b = make_copies(folder, index, ['a.epub', 'b.epub'], words(300, 6))
+    groups = find_duplicates(index, folder)
+    # b diganti isinya setelah diindeks: tidak boleh ditimpa dengan isi a
+    write_epub(b, words(300, 7))
+    changed = b.read_bytes()
+    
+    linked, saved, skipped = link_duplicates(index, groups)
+    
+    assert (linked, saved) == (0, 0)
+    assert [path for path, _ in skipped] == [b.resolve()]
+    assert not os.path.samefile(a, b)
+    assert b.read_bytes() == changed
+
+
+def test_link_skips_when_kept_file_changed(library):
+    folder, index = library
+    a, b = make_copies(folder, index, ['a.epub', 'b.epub'], words(300, 8))
+    groups = find_duplicates(index, folder)
+    write_epub(a, words(300, 9))
+    
+    linked, _, skipped = link_duplicates(index, groups)
+    
+    assert linked == 0
+    assert len(skipped) == 1
+    assert not os.path.samefile(a, b)
+
+
+def test_minhash_similarity_tracks_text_overlap():
+    text = words(2000, 10)
+    assert similarity(minhash_signature(text), minhash_signature(text)) == 1.0
+    assert len(minhash_signature(text)) == NUM_BINS * 8
+    assert minhash_signature('') == b''
+    assert similarity(b'', minhash_signature(text)) == 0.0
+    assert similarity(minhash_signature(text), minhash_signature(words(2000, 11))) < 0.1
+
+
+def test_find_near_duplicates_reports_similar_documents(library):
+    folder, index = library
+    text = words(2000, 12).split()
+    # Versi lain: beberapa kata di akhir dokumen diganti (mis. halaman sampul berbeda)
+    edited = text[:-20] + words(20, 13).split()
+    base = write_epub(folder / 'skripsi.epub', ' '.join(text))
+    variant = write_epub(folder / 'skripsi-revisi.epub', ' '.join(edited), title="Judul lain")
+    write_epub(folder / 'lain.epub', words(2000, 14))
+    shutil.copyfile(base, folder / 'salinan.epub')
+    index.update(folder)
+    
+    pairs = find_near_duplicates(index, threshold=0.8, folder=folder)
+    
+    # Salinan persis tidak dilaporkan sebagai hampir duplikat (lihat find_duplicates)
+    found = {frozenset((a.name, b.name)) for _, a, b in pairs}
+    assert found == {frozenset(('skripsi.epub', 'skripsi-revisi.epub')),
+                     frozenset(('salinan.epub', 'skripsi-revisi.epub'))}
+    assert all(score >= 0.8 for score, _, _ in pairs)
+    assert variant.resolve() in {path for _, a, b in pairs for path in (a, b)}
+
+
+def test_find_near_duplicates_respects_threshold(library):
+    folder, index = library
+    text = words(1000, 15).split()
+    # 80% teks sama (Jaccard shingle ~0.66): pasti jadi kandidat LSH, tetapi di bawah ambang 0.8
+    write_epub(folder / 'a.epub', ' '.join(text))
+    write_epub(folder / 'b.epub', ' '.join(text[:800] + words(200, 16).split()))
+    index.update(folder)
+    
+    assert find_near_duplicates(index, threshold=0.8, folder=folder) == []
+    [(score, _, _)] = find_near_duplicates(index, threshold=0.5, folder=folder)
+    assert 0.5 <= score < 0.8
@@ -0,0 +1,139 @@
+"""Test antrian job: klaim lease, pemulihan job yatim, dan pelepasan saat keluar."""
+
+import os
+import socket
+import subprocess
+import sys
+from types import SimpleNamespace
+
+import pytest
+
+import job_queue
+from job_queue import DONE, QUEUED, RUNNING, JobQueue, _owner_alive
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Waktu palsu untuk job_queue (detik, bisa dimajukan)."""
+    now = SimpleNamespace(value=1_000_000.0)
+    monkeypatch.setattr(job_queue, 'time', SimpleNamespace(time=lambda: now.value, monotonic=lambda: now.value))
+    return now
+
+
+@pytest.fixture
+def queues(tmp_path, clock):
+    """Dua 'proses' yang berbagi satu database; pemilik kedua diatur per test."""
+    path = tmp_path / "jobs.sqlite3"
+    first, second = JobQueue(path), JobQueue(path)
+    yield first, second
+    first.close()
+    second.close()
+
+
+def dead_pid():
+    """PID proses yang sudah selesai."""
+    process = subprocess.Popen([sys.executable, '-c', 'pass'])
+    process.wait()
+    return process.pid
+
+
+def test_add_many_reuses_jobs_in_same_batch(queues, tmp_path):
+    queue, _ = queues
+    
+    first = queue.add_many(['http://a/1.pdf', 'http://a/2.pdf'], tmp_path, batch='daftar.txt')
+    again = queue.add_many(['http://a/2.pdf', 'http://a/3.pdf'], tmp_path, batch='daftar.txt')
+    
+    assert again[0] == first[1]
+    assert again[1] not in first
+    # Tanpa batch (GUI, get) URL yang sama boleh diantrikan lagi
+    assert queue.add('http://a/1.pdf', tmp_path) != queue.add('http://a/1.pdf', tmp_path)
+
+
+def test_running_job_of_live_owner_is_left_alone(queues, tmp_path):
+    owner, other = queues
+    owner.owner = f"{socket.gethostname()}:{os.getppid()}"
+    job_id = owner.add('http://a/1.pdf', tmp_path)
+    
+    assert owner.start(job_id)
+    
+    assert not other.start(job_id)
+    assert other.recover() == 0
+    assert other.get(job_id).state == RUNNING
+    assert other.unfinished() == []
+
+
+def test_job_of_dead_process_is_recovered(queues, tmp_path):
+    owner, other = queues
+    owner.owner = f"{socket.gethostname()}:{dead_pid()}"
+    if _owner_alive(owner.owner) is not False:
+        pytest.skip("status PID tidak bisa diperiksa di platform ini")
+    job_id = owner.add('http://a/1.pdf', tmp_path, origin='gui')
+    owner.start(job_id)
+    
+    assert other.recover() == 1
+    
+    assert other.get(job_id).state == QUEUED
+    assert [job.id for job in other.unfinished(origin='gui')] == [job_id]
+    assert other.unfinished(origin='cli') == []
+    assert other.start(job_id)
+
+
+def test_job_of_other_host_is_recovered_after_lease(queues, tmp_path, clock):
+    owner, other = queues
+    owner.owner = 'host-lain:1234'
+    job_id = owner.add('http://a/1.pdf', tmp_path)
+    owner.start(job_id)
+    
+    clock.value += JobQueue.LEASE_SECONDS - 1
+    assert other.recover() == 0
+    assert not other.start(job_id)
+    
+    clock.value += 1
+    assert other.start(job_id)
+    assert other.get(job_id).state == RUNNING
+
+
+def test_progress_renews_lease(queues, tmp_path, clock):
+    owner, other = queues
+    owner.owner = 'host-lain:1234'
+    job_id = owner.add('http://a/1.pdf', tmp_path)
+    owner.start(job_id)
+    
+    clock.value += JobQueue.LEASE_SECONDS - 1
+    owner.progress(job_id, 1000, 5000)
+    clock.value += 1
+    
+    assert other.recover() == 0
+    assert other.get(job_id).bytes_done == 1000
+
+
+def test_close_requeues_own_running_jobs(tmp_path, clock):
+    path = tmp_path / "jobs.sqlite3"
+    queue = JobQueue(path)
+    running = queue.add('http://a/1.pdf', tmp_path)
+    finished = queue.add('http://a/2.pdf', tmp_path)
+    queue.start(running)
+    queue.start(finished)
+    queue.finish(finished, tmp_path / '2.pdf', 10)
+    
+    queue.close()
+    # Callback download yang datang setelah close() diabaikan
+    queue.finish(running, tmp_path / '1.pdf', 10)
+    
+    reopened = JobQueue(path)
+    try:
+        assert reopened.get(running).state == QUEUED
+        assert reopened.get(finished).state == DONE
+        assert [job.id for job in reopened.unfinished()] == [running]
+    finally:
+        reopened.close()
+
+
+def test_owner_alive():
+    host = socket.gethostname()
+    assert _owner_alive('host-lain:1') is None
+    assert _owner_alive(f'{host}:bukan-pid') is None
+    if os.name == 'nt':
+        return
+    assert _owner_alive(f'{host}:{os.getpid()}') is True
+    assert _owner_alive(f'{host}:{dead_pid()}') is False
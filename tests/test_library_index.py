@@ -0,0 +1,154 @@
+"""Test pembaruan inkremental indeks perpustakaan lokal."""
+
+import shutil
+import threading
+
+import library_index
+from conftest import words, write_epub
+
+
+def test_update_adds_then_skips_unchanged_files(library):
+    folder, index = library
+    write_epub(folder / 'a.epub', words(200, 1), title="Sejarah Bandung")
+    write_epub(folder / 'sub' / 'b.epub', words(200, 2))
+    (folder / 'c.epub.part').write_bytes(b'belum selesai')
+    write_epub(folder / '.mirror-x' / 'd.epub', words(200, 3))
+    
+    assert index.update(folder)['added'] == 2
+    counts = index.update(folder)
+    assert counts['unchanged'] == 2
+    assert counts['added'] == counts['updated'] == 0
+    assert index.stats() == {'documents': 2, 'failed': 0}
+    assert [result['title'] for result in index.search('bandung')] == ["Sejarah Bandung"]
+
+
+def test_update_reindexes_changed_content(library):
+    folder, index = library
+    path = write_epub(folder / 'a.epub', "kata lama " + words(200, 4))
+    index.update(folder)
+    
+    write_epub(path, "kata baru " + words(200, 5))
+    
+    assert index.update(folder)['updated'] == 1
+    assert index.search('baru') and not index.search('lama')
+
+
+def test_touched_file_with_same_content_is_unchanged(library):
+    folder, index = library
+    path = write_epub(folder / 'a.epub', words(200, 6))
+    index.update(folder)
+    
+    path.write_bytes(path.read_bytes())
+    
+    assert index.add_file(path) == 'unchanged'
+    assert index.is_current(path)
+
+
+def test_renamed_file_is_moved_without_reextracting(library, monkeypatch):
+    folder, index = library
+    old = write_epub(folder / 'a.epub', "pindahan " + words(200, 7))
+    index.update(folder)
+    new = folder / 'arsip' / 'a-baru.epub'
+    new.parent.mkdir()
+    old.rename(new)
+    
+    def fail(path):
+        raise AssertionError("file yang dipindah tidak perlu diekstrak ulang")
+    monkeypatch.setattr(library_index, 'extract_document', fail)
+    counts = index.update(folder)
+    
+    assert counts['moved'] == 1
+    assert counts['removed'] == 0
+    assert [result['path'] for result in index.search('pindahan')] == [str(new.resolve())]
+
+
+def test_copy_reuses_text_of_indexed_twin(library, monkeypatch):
+    folder, index = library
+    original = write_epub(folder / 'a.epub', "salinan " + words(200, 8))
+    index.update(folder)
+    shutil.copyfile(original, folder / 'b.epub')
+    
+    def fail(path):
+        raise AssertionError("salinan tidak perlu diekstrak ulang")
+    monkeypatch.setattr(library_index, 'extract_document', fail)
+    
+    assert index.update(folder)['copied'] == 1
+    assert len(index.search('salinan')) == 2
+
+
+def test_deleted_files_are_removed(library):
+    folder, index = library
+    keep = write_epub(folder / 'a.epub', "tetap " + words(200, 9))
+    gone = write_epub(folder / 'b.epub', "hilang " + words(200, 10))
+    index.update(folder)
+    gone.unlink()
+    
+    counts = index.update(folder)
+    
+    assert counts['removed'] == 1
+    assert not index.search('hilang')
+    assert [result['path'] for result in index.search('tetap')] == [str(keep.resolve())]
+
+
+def test_remove_missing_keeps_files_added_during_scan(library):
+    folder, index = library
+    path = write_epub(folder / 'a.epub', words(200, 11))
+    index.add_file(path)
+    
+    # File yang belum terlihat oleh os.walk tetapi sudah ada di disk tidak dihapus
+    assert index._remove_missing(folder, set()) == 0
+    assert index.stats()['documents'] == 1
+
+
+def test_unreadable_file_is_recorded_as_failed(library):
+    folder, index = library
+    (folder / 'rusak.epub').write_bytes(b'bukan zip')
+    write_epub(folder / 'a.epub', words(200, 12))
+    
+    counts = index.update(folder)
+    
+    assert (counts['added'], counts['failed']) == (1, 1)
+    assert index.stats() == {'documents': 2, 'failed': 1}
+    # Gagal dicatat per file: tidak dicoba lagi sampai isinya berubah
+    assert index.update(folder)['unchanged'] == 2
+
+
+def test_unexpected_extractor_error_does_not_abort_update(library, monkeypatch):
+    folder, index = library
+    write_epub(folder / 'a.epub', words(200, 13))
+    write_epub(folder / 'b.epub', words(200, 14))
+    
+    def broken(path):
+        if path.name == 'a.epub':
+            raise AttributeError("'NoneType' object has no attribute 'get'")
+        return extract(path)
+    extract = library_index.extract_document
+    monkeypatch.setattr(library_index, 'extract_document', broken)
+    
+    counts = index.update(folder)
+    
+    assert (counts['added'], counts['failed']) == (1, 1)
+    assert index.stats() == {'documents': 2, 'failed': 1}
+
+
+def test_concurrent_scans_and_add_file(library):
+    folder, index = library
+    paths = [write_epub(folder / f'{i}.epub', words(200, 100 + i)) for i in range(20)]
+    errors = []
+    
+    def run(func, *args):
+        try:
+            func(*args)
+        except Exception as e:
+            errors.append(e)
+    
+    threads = [threading.Thread(target=run, args=(index.update, folder)) for _ in range(2)]
+    threads += [threading.Thread(target=run, args=(index.add_file, path)) for path in reversed(paths)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    
+    assert errors == []
+    assert index.stats() == {'documents': 20, 'failed': 0}
+    assert index.update(folder)['unchanged'] == 20
@@ -0,0 +1,183 @@
+"""Test balapan mirror (fetch_first): penggantian kandidat gagal, pembatalan, dan melanjutkan .part."""
+
+import http.server
+import os
+import re
+import threading
+import time
+
+import pytest
+
+import repo_health
+from ebook_downloader import ConnectionPool, DownloadCancelled, EbookDownloader, MirrorRacer, PartialDownload
+from rate_limit import RateLimiter
+from repo_health import HealthStore
+from retry_policy import CircuitBreaker, RetryPolicy
+
+DATA = b'%PDF-1.4\n' + os.urandom(200_000) + b'\n%%EOF\n'
+
+
+class MirrorServer(http.server.ThreadingHTTPServer):
+    """
+    Satu server untuk beberapa 'mirror' (path berbeda). Per path bisa diatur:
+    jeda sebelum header, status, jeda antar potongan body, dan putus setelah
+    sekian byte (sekali).
+    """
+    
+    def __init__(self):
+        super().__init__(('127.0.0.1', 0), MirrorHandler)
+        self.paths = {}
+        self.requests = []
+        self.base = f"http://127.0.0.1:{self.server_port}"
+    
+    def mirror(self, path, stall=0.0, status=200, pace=0.0, drop_after=None):
+        self.paths[path] = {'stall': stall, 'status': status, 'pace': pace, 'drop_after': drop_after}
+        return self.base + path
+
+
+class MirrorHandler(http.server.BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    
+    def log_message(self, *args):
+        pass
+    
+    def do_GET(self):
+        config = self.server.paths[self.path]
+        self.server.requests.append((self.path, self.headers.get('Range')))
+        time.sleep(config['stall'])
+        if config['status'] != 200:
+            self.send_response(config['status'])
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        start = 0
+        match = re.match(r'bytes=(\d+)-$', self.headers.get('Range') or '')
+        if match and self.headers.get('If-Range') == '"v1"':
+            start = int(match.group(1))
+            self.send_response(206)
+            self.send_header('Content-Range', f'bytes {start}-{len(DATA) - 1}/{len(DATA)}')
+        else:
+            self.send_response(200)
+        body = DATA[start:]
+        self.send_header('Content-Type', 'application/pdf')
+        self.send_header('Accept-Ranges', 'bytes')
+        self.send_header('ETag', '"v1"')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        if config['drop_after'] is not None:
+            body, config['drop_after'] = body[:config['drop_after']], None
+            self.close_connection = True
+        try:
+            if not config['pace']:
+                self.wfile.write(body)
+                return
+            for i in range(0, len(body), 8192):
+                self.wfile.write(body[i:i + 8192])
+                self.wfile.flush()
+                time.sleep(config['pace'])
+        except ConnectionError:
+            # Kandidat yang kalah menutup koneksinya
+            self.close_connection = True
+
+
+@pytest.fixture
+def server():
+    server = MirrorServer()
+    thread = threading.Thread(target=server.serve_forever, args=(0.05,), daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def downloader(tmp_path, monkeypatch):
+    # Statistik kesehatan host dari sesi lain jangan mengubah urutan kandidat
+    monkeypatch.setattr(repo_health, '_default_store', HealthStore(tmp_path / "health.json"))
+    pool = ConnectionPool()
+    yield EbookDownloader(download_folder=tmp_path / "unduhan", pool=pool, limiter=RateLimiter(),
+                          retry=RetryPolicy(retries=0), breaker=CircuitBreaker())
+    pool.close()
+
+
+def mirror_folders(downloader, timeout=3.0):
+    """Folder .mirror-* yang tersisa, setelah kandidat yang dibatalkan sempat berhenti."""
+    deadline = time.monotonic() + timeout
+    while True:
+        folders = sorted(downloader.download_folder.glob('.mirror-*'))
+        if not folders or time.monotonic() > deadline:
+            return folders
+        time.sleep(0.05)
+
+
+def test_failed_racer_is_replaced_immediately(server, downloader):
+    # Kandidat pertama lambat tetapi tidak tertinggal setelah byte pertama,
+    # kandidat kedua gagal: kandidat ketiga harus langsung dimulai
+    slow = server.mirror('/lambat.pdf', stall=0.5, pace=0.1)
+    failing = server.mirror('/gagal.pdf', stall=1.0, status=404)
+    fast = server.mirror('/cepat.pdf')
+    
+    filepath, size, winner = downloader.fetch_first([slow, failing, fast], hedge_ttfb=0.3, hedge_min_rate=1)
+    
+    assert winner == fast
+    assert (filepath, size) == (downloader.download_folder / 'cepat.pdf', len(DATA))
+    assert filepath.read_bytes() == DATA
+    # Kandidat lambat dihentikan lewat event pembatalan dan foldernya dihapus
+    assert mirror_folders(downloader) == []
+    assert not (downloader.download_folder / 'lambat.pdf').exists()
+
+
+def test_cancelled_fetch_sends_no_request(server, downloader):
+    cancel = threading.Event()
+    cancel.set()
+    
+    with pytest.raises(DownloadCancelled):
+        downloader.fetch(server.mirror('/buku.pdf'), cancel=cancel)
+    assert server.requests == []
+
+
+def test_cancel_during_body_keeps_part(server, downloader):
+    url = server.mirror('/buku.pdf', pace=0.01)
+    cancel = threading.Event()
+    
+    with pytest.raises(DownloadCancelled):
+        downloader.fetch(url, on_progress=lambda downloaded, total: cancel.set(), cancel=cancel)
+    
+    partial = PartialDownload.find(downloader.download_folder, url)
+    assert 0 < partial.offset < len(DATA)
+    assert not (downloader.download_folder / 'buku.pdf').exists()
+
+
+def test_failed_race_resumes_from_mirror_folder(server, downloader):
+    dropping = server.mirror('/putus.pdf', drop_after=50_000)
+    failing = server.mirror('/gagal.pdf', status=404)
+    
+    with pytest.raises(Exception):
+        downloader.fetch_first([dropping, failing])
+    folder = MirrorRacer.for_url(dropping, downloader.download_folder).folder
+    assert PartialDownload.find(folder, dropping).offset == 50_000
+    
+    filepath, size, winner = downloader.fetch_first([dropping, failing])
+    
+    assert winner == dropping
+    assert filepath.read_bytes() == DATA
+    assert server.requests.count(('/putus.pdf', 'bytes=50000-')) == 1
+    assert mirror_folders(downloader) == []
+
+
+def test_stale_mirror_folders_are_removed_on_startup(tmp_path):
+    stale = tmp_path / '.mirror-lama'
+    stale.mkdir()
+    (stale / 'buku.pdf.part').write_bytes(b'x')
+    fresh = tmp_path / '.mirror-baru'
+    fresh.mkdir()
+    (fresh / 'buku.pdf.part').write_bytes(b'x')
+    old = time.time() - EbookDownloader.MIRROR_MAX_AGE - 60
+    for path in (stale / 'buku.pdf.part', stale):
+        os.utime(path, (old, old))
+    
+    EbookDownloader(download_folder=tmp_path, pool=ConnectionPool(), limiter=RateLimiter(),
+                    breaker=CircuitBreaker())
+    
+    assert not stale.exists()
+    assert fresh.exists()
@@ -0,0 +1,219 @@
+"""Test pembaca struktur PDF: xref klasik/stream, object stream, offset meleset dan stream berbahaya."""
+
+import zlib
+
+import pytest
+
+import text_extract
+from pdf_metadata import PdfMetadataError, PdfReader, Ref, open_pdf, read_pdf_metadata
+from text_extract import extract_document
+
+
+def stream(data, compress=True, extra=b''):
+    """Objek stream dengan /Length yang benar (FlateDecode jika compress)."""
+    if compress:
+        data = zlib.compress(data)
+        extra = b' /Filter /FlateDecode' + extra
+    return b'<< /Length %d%s >>\nstream\n%s\nendstream' % (len(data), extra, data)
+
+
+def page_objects(title=b'Sejarah Bandung', content=b'BT /F1 12 Tf (Halo dunia) Tj ET'):
+    """Katalog satu halaman berisi teks, /Info dan font."""
+    return {
+        1: b'<< /Type /Catalog /Pages 2 0 R >>',
+        2: b'<< /Type /Pages /Kids [3 0 R] /Count 1 >>',
+        3: b'<< /Type /Page /Parent 2 0 R /Contents 5 0 R /Resources << /Font << /F1 6 0 R >> >> >>',
+        4: b'<< /Title (%s) /Author (Ahmad) >>' % title,
+        5: stream(content),
+        6: b'<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>',
+    }
+
+
+def write_objects(out, objects):
+    offsets = {}
+    for num, body in objects.items():
+        offsets[num] = len(out)
+        out += b'%d 0 obj\n%s\nendobj\n' % (num, body)
+    return offsets
+
+
+def xref_table(offsets, size):
+    table = b'xref\n0 %d\n0000000000 65535 f \n' % size
+    for num in range(1, size):
+        table += b'%010d 00000 n \n' % offsets[num] if num in offsets else b'0000000000 65535 f \n'
+    return table
+
+
+def classic_pdf(objects, offsets=None, trailer=b'/Root 1 0 R /Info 4 0 R'):
+    """PDF dengan tabel xref klasik; offsets menimpa offset xref yang benar."""
+    out = bytearray(b'%PDF-1.4\n')
+    real = write_objects(out, objects)
+    real.update(offsets or {})
+    size = max(objects) + 1
+    start = len(out)
+    out += xref_table(real, size)
+    out += b'trailer\n<< %s /Size %d >>\nstartxref\n%d\n%%%%EOF\n' % (trailer, size, start)
+    return bytes(out)
+
+
+def incremental_update(pdf, objects, prev_trailer=b'/Root 1 0 R /Info 4 0 R'):
+    """Tambahkan objects di belakang pdf dengan bagian xref baru (/Prev)."""
+    prev = int(pdf.rsplit(b'startxref', 1)[1].split()[0])
+    out = bytearray(pdf)
+    offsets = write_objects(out, objects)
+    start = len(out)
+    out += b'xref\n'
+    for num, offset in offsets.items():
+        out += b'%d 1\n%010d 00000 n \n' % (num, offset)
+    size = max(objects) + 1
+    out += b'trailer\n<< %s /Size %d /Prev %d >>\nstartxref\n%d\n%%%%EOF\n' % (prev_trailer, size, prev, start)
+    return bytes(out)
+
+
+def png_up(rows, columns):
+    """Encode baris dengan PNG predictor Up (seperti xref stream dari kebanyakan generator)."""
+    out = bytearray()
+    previous = bytes(columns)
+    for row in rows:
+        out += b'\x02' + bytes((a - b) & 0xFF for a, b in zip(row, previous))
+        previous = row
+    return bytes(out)
+
+
+def xref_stream_pdf(objects, compressed):
+    """
+    PDF 1.5: objek compressed disimpan di object stream (objek 20) dan
+    xref berupa stream terkompresi dengan PNG predictor.
+    """
+    out = bytearray(b'%PDF-1.5\n')
+    numbers = sorted(compressed)
+    header = b''
+    body = b''
+    for num in numbers:
+        header += b'%d %d ' % (num, len(body))
+        body += compressed[num] + b'\n'
+    objects = dict(objects)
+    objects[20] = stream(header + body, extra=b' /Type /ObjStm /N %d /First %d' % (len(numbers), len(header)))
+    offsets = write_objects(out, objects)
+    size = 22
+    offsets[21] = len(out)
+    rows = []
+    for num in range(size):
+        if num in offsets:
+            rows.append(b'\x01' + offsets[num].to_bytes(4, 'big') + b'\x00\x00')
+        elif num in compressed:
+            rows.append(b'\x02' + (20).to_bytes(4, 'big') + numbers.index(num).to_bytes(2, 'big'))
+        else:
+            rows.append(b'\x00' * 7)
+    xref = stream(png_up(rows, 7), extra=b' /Type /XRef /W [1 4 2] /Size %d /Root 1 0 R /Info 4 0 R'
+                                         b' /DecodeParms << /Predictor 12 /Columns 7 >>' % size)
+    out += b'21 0 obj\n%s\nendobj\nstartxref\n%d\n%%%%EOF\n' % (xref, offsets[21])
+    return bytes(out)
+
+
+@pytest.fixture
+def write(tmp_path):
+    def write(data, name='buku.pdf'):
+        path = tmp_path / name
+        path.write_bytes(data)
+        return path
+    return write
+
+
+def test_classic_xref(write):
+    meta = read_pdf_metadata(write(classic_pdf(page_objects())))
+    
+    assert (meta.title, meta.author, meta.pages, meta.version) == ('Sejarah Bandung', 'Ahmad', 1, '1.4')
+    assert not meta.encrypted
+
+
+def test_incremental_update_overrides_objects(write):
+    pdf = incremental_update(classic_pdf(page_objects()), {4: b'<< /Title (Edisi Revisi) >>'})
+    
+    meta = read_pdf_metadata(write(pdf))
+    
+    assert (meta.title, meta.author, meta.pages) == ('Edisi Revisi', None, 1)
+
+
+def test_xref_stream_with_object_stream(write):
+    objects = page_objects()
+    compressed = {num: objects.pop(num) for num in (1, 2, 4)}
+    
+    meta = read_pdf_metadata(write(xref_stream_pdf(objects, compressed)))
+    
+    assert (meta.title, meta.author, meta.pages, meta.version) == ('Sejarah Bandung', 'Ahmad', 1, '1.5')
+
+
+def test_text_from_object_stream_pdf(write, monkeypatch):
+    monkeypatch.setattr(text_extract, 'pypdf', None)
+    objects = page_objects()
+    compressed = {num: objects.pop(num) for num in (1, 2, 3, 6)}
+    
+    document = extract_document(write(xref_stream_pdf(objects, compressed)))
+    
+    assert document.text.strip() == 'Halo dunia'
+
+
+def test_wrong_xref_offset_finds_object_nearby(write):
+    pdf = classic_pdf(page_objects(), offsets={4: 9})
+    
+    assert read_pdf_metadata(write(pdf)).title == 'Sejarah Bandung'
+
+
+def test_wrong_xref_offset_prefers_last_definition(write):
+    # Generator yang menambahkan versi baru objek tanpa memperbarui xref
+    objects = page_objects(title=b'Lama')
+    objects[7] = b'null'
+    pdf = classic_pdf(objects, offsets={4: 9})
+    pdf = pdf.replace(b'7 0 obj\nnull', b'4 0 obj\n<< /Title (Baru) >>')
+    
+    assert read_pdf_metadata(write(pdf)).title == 'Baru'
+
+
+def test_object_search_is_limited_to_window(write, monkeypatch):
+    objects = page_objects()
+    objects[5] = stream(b'%' + b'x' * 5000, compress=False)
+    # Offset objek 6 menunjuk ke awal file, objek aslinya jauh di belakang
+    objects[6], objects[4] = objects[4], objects[6]
+    pdf = classic_pdf(objects, offsets={6: 9}, trailer=b'/Root 1 0 R /Info 6 0 R')
+    monkeypatch.setattr(PdfReader, 'OBJECT_SEARCH_WINDOW', 1024)
+    
+    meta = read_pdf_metadata(write(pdf))
+    
+    assert meta.title is None
+    assert meta.pages == 1
+
+
+@pytest.mark.parametrize('data', [
+    b'bukan pdf',
+    b'%PDF-1.4\n1 0 obj\n<< >>\nendobj\n',                                          # tanpa startxref
+    b'%PDF-1.4\nxref\n0 1\n0000000000 65535 f \ntrailer\n[1 2]\nstartxref\n9\n%%EOF\n',  # trailer bukan dict
+    b'%PDF-1.5\n1 0 obj\n' + stream(b'', compress=False, extra=b' /Type /XRef /W [1 x 2] /Size 1')
+    + b'\nendobj\nstartxref\n9\n%%EOF\n',                                             # /W tidak valid
+])
+def test_malformed_structure_raises_pdf_metadata_error(write, data):
+    with pytest.raises(PdfMetadataError):
+        read_pdf_metadata(write(data))
+
+
+def test_deflate_bomb_is_rejected(write, monkeypatch):
+    monkeypatch.setattr(PdfReader, 'MAX_STREAM_SIZE', 10_000)
+    objects = page_objects(content=b'0' * 10_001)
+    objects[7] = stream(b'0' * 10_000)
+    
+    with open_pdf(write(classic_pdf(objects))) as reader:
+        with pytest.raises(PdfMetadataError, match='10000'):
+            reader.stream_data(Ref(5))
+        # Stream tepat sebesar batas masih boleh
+        assert len(reader.stream_data(Ref(7))) == 10_000
+
+
+def test_deflate_bomb_in_content_stream_skips_page(write, monkeypatch):
+    monkeypatch.setattr(text_extract, 'pypdf', None)
+    monkeypatch.setattr(PdfReader, 'MAX_STREAM_SIZE', 10_000)
+    objects = page_objects(content=b'BT /F1 12 Tf (Halo) Tj ET' + b' ' * 20_000)
+    
+    document = extract_document(write(classic_pdf(objects)))
+    
+    assert document.text == ''
+    assert (document.title, document.pages) == ('Sejarah Bandung', 1)
@@ -0,0 +1,149 @@
+"""Test token bucket dan pembatas kecepatan global/per host."""
+
+from types import SimpleNamespace
+
+import pytest
+
+import rate_limit
+from rate_limit import RateLimiter, TokenBucket, format_rate, parse_rate
+
+A = 'http://a.contoh/buku.pdf'
+B = 'http://b.contoh/buku.pdf'
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Waktu palsu untuk rate_limit; sleep() memajukan waktu dan dicatat."""
+    now = SimpleNamespace(value=1000.0, slept=[])
+    
+    def sleep(seconds):
+        now.slept.append(seconds)
+        now.value += seconds
+    
+    monkeypatch.setattr(rate_limit, 'time', SimpleNamespace(monotonic=lambda: now.value, sleep=sleep))
+    return now
+
+
+@pytest.mark.parametrize('text, rate', [
+    ('0', 0), ('500', 500), ('500K', 500 * 1024), ('2m', 2 * 1024 ** 2), ('1.5M/s', int(1.5 * 1024 ** 2)),
+    ('1GiB', 1024 ** 3), (' 64 KB/s ', 64 * 1024),
+])
+def test_parse_rate(text, rate):
+    assert parse_rate(text) == rate
+
+
+@pytest.mark.parametrize('text', ['', 'cepat', '-1K', '5T'])
+def test_parse_rate_rejects_invalid(text):
+    with pytest.raises(ValueError):
+        parse_rate(text)
+
+
+def test_format_rate():
+    assert format_rate(0) == "tanpa batas"
+    assert format_rate(512) == "512B/s"
+    assert format_rate(1536) == "1.5KB/s"
+    assert format_rate(2 * 1024 ** 2, suffix="/s") == "2M/s"
+
+
+# TokenBucket
+def test_unlimited_bucket_never_waits(clock):
+    bucket = TokenBucket(0)
+    assert bucket.reserve(10 ** 9) == 0.0
+
+
+def test_bucket_starts_full_then_reservations_go_into_debt(clock):
+    bucket = TokenBucket(1000)
+    
+    assert bucket.reserve(1000) == 0.0
+    assert bucket.reserve(500) == 0.5
+    assert bucket.reserve(500) == 1.0
+    clock.value += 1.0
+    assert bucket.reserve(0) == 0.0
+
+
+def test_refill_is_capped_by_burst(clock):
+    bucket = TokenBucket(1000, burst=2.0)
+    bucket.reserve(2000)
+    
+    clock.value += 60
+    
+    assert bucket.reserve(2000) == 0.0
+    assert bucket.reserve(100) == pytest.approx(0.1)
+
+
+def test_set_rate_forgives_debt_of_old_rate(clock):
+    bucket = TokenBucket(1000)
+    assert bucket.reserve(3000) == 2.0
+    
+    bucket.set_rate(2000)
+    
+    assert bucket.rate == 2000
+    assert bucket.reserve(1000) == 0.5
+    bucket.set_rate(0)
+    assert bucket.reserve(10 ** 9) == 0.0
+
+
+# RateLimiter
+def test_request_rate_is_per_host(clock):
+    limiter = RateLimiter(host_rps=2)
+    
+    assert [limiter.reserve_request(A) for _ in range(3)] == [0.0, 0.0, 0.5]
+    assert limiter.reserve_request(B) == 0.0
+    assert RateLimiter().reserve_request(A) == 0.0
+
+
+def test_global_bytes_are_shared_and_host_limit_applies(clock):
+    limiter = RateLimiter(global_bps=1000, host_bps=500)
+    
+    # Kuota host A (500) habis lebih dulu dari kuota global
+    assert limiter.reserve_bytes(A, 500) == 0.0
+    assert limiter.reserve_bytes(A, 250) == 0.5
+    # Host B punya bucket sendiri, tetapi memakai sisa kuota global (250)
+    assert limiter.reserve_bytes(B, 500) == 0.25
+
+
+def test_chunk_limit_follows_tightest_rate():
+    assert RateLimiter().chunk_limit(A) is None
+    assert RateLimiter(global_bps=1024 ** 2, host_bps=512 * 1024).chunk_limit(A) == 128 * 1024
+    # Tidak lebih kecil dari 16 KiB walaupun batasnya sangat rendah
+    assert RateLimiter(host_bps=1000).chunk_limit(A) == 16 * 1024
+
+
+def test_throttle_sleeps_in_slices(clock):
+    limiter = RateLimiter(global_bps=1000)
+    limiter.throttle_bytes(A, 1000)
+    assert clock.slept == []
+    
+    limiter.throttle_bytes(A, 600)
+    
+    assert clock.slept == [0.25, 0.25, pytest.approx(0.1)]
+
+
+def test_changing_limits_ends_pending_wait(clock):
+    limiter = RateLimiter(global_bps=1000)
+    limiter.reserve_bytes(A, 1000)
+    
+    slices = []
+    for pause in limiter.sleep_slices(limiter.reserve_bytes(A, 5000)):
+        slices.append(pause)
+        clock.value += pause
+        limiter.set_limits(global_bps=0)
+    
+    assert slices == [0.25]
+    assert limiter.reserve_bytes(A, 10 ** 9) == 0.0
+
+
+def test_limits_are_shared_through_settings_file(tmp_path, clock):
+    path = tmp_path / "limits.json"
+    gui = RateLimiter().watch(path)
+    worker = RateLimiter().watch(path)
+    
+    gui.set_limits(host_rps=1)
+    gui.save()
+    assert worker.limits()['host_rps'] == 0
+    
+    clock.value += RateLimiter.RELOAD_INTERVAL
+    assert worker.reserve_request(A) == 0.0
+    
+    assert worker.limits() == {'global_bps': 0, 'host_bps': 0, 'host_rps': 1}
+    assert worker.reserve_request(A) == 1.0
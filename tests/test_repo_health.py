@@ -0,0 +1,90 @@
+"""Test probe kesehatan repository dan urutan host menurut statistiknya."""
+
+import http.server
+import socket
+import threading
+
+import pytest
+
+import repo_health
+from repo_health import HealthStore, probe
+
+
+class HeadHandler(http.server.BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    
+    def log_message(self, *args):
+        pass
+    
+    def do_HEAD(self):
+        self.send_response(200)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+
+@pytest.fixture
+def server():
+    server = http.server.ThreadingHTTPServer(('127.0.0.1', 0), HeadHandler)
+    thread = threading.Thread(target=server.serve_forever, args=(0.05,), daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def closed_port():
+    """Port lokal yang tidak didengarkan siapa pun (connect ditolak)."""
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def resolve_to(monkeypatch, *addresses):
+    """Buat getaddrinfo mengembalikan alamat IPv4 ini, berurutan."""
+    entries = [(socket.AF_INET, socket.SOCK_STREAM, socket.IPPROTO_TCP, '', address) for address in addresses]
+    monkeypatch.setattr(repo_health.socket, 'getaddrinfo', lambda *args, **kwargs: entries)
+
+
+def test_probe_measures_phases(server):
+    result = probe(f"http://127.0.0.1:{server.server_port}/", timeout=2)
+    
+    assert result['ok'] and result['status'] == 200
+    assert result['address'] == '127.0.0.1'
+    assert result['tls_ms'] is None
+    assert all(result[key] is not None for key in ('dns_ms', 'connect_ms', 'ttfb_ms', 'total_ms'))
+
+
+def test_probe_falls_back_to_next_address(server, monkeypatch):
+    port = server.server_port
+    resolve_to(monkeypatch, ('127.0.0.1', closed_port()), ('127.0.0.1', port))
+    
+    result = probe(f"http://mirror.contoh:{port}/", timeout=2)
+    
+    assert result['ok'], result['error']
+    assert result['host'] == f"mirror.contoh:{port}"
+    assert result['address'] == '127.0.0.1'
+
+
+def test_probe_reports_last_error_when_no_address_answers(monkeypatch):
+    resolve_to(monkeypatch, ('127.0.0.1', closed_port()), ('127.0.0.1', closed_port()))
+    
+    result = probe("http://mirror.contoh/", timeout=2)
+    
+    assert not result['ok']
+    assert result['address'] is None and result['connect_ms'] is None
+    assert result['error']
+
+
+def test_rank_orders_healthy_unknown_then_failing(tmp_path):
+    store = HealthStore(tmp_path / "health.json")
+    for host, ok, ms in [('cepat', True, 100), ('lambat', True, 900), ('mati', False, None)]:
+        for _ in range(3):
+            store.record({'host': host, 'ok': ok, 'total_ms': ms, 'status': 200 if ok else None,
+                          'error': None if ok else 'timeout', 'address': None,
+                          'dns_ms': None, 'connect_ms': None, 'tls_ms': None, 'ttfb_ms': None})
+    
+    urls = ['http://mati/a', 'http://baru/a', 'http://lambat/a', 'http://cepat/a']
+    
+    assert store.rank(urls) == ['http://cepat/a', 'http://lambat/a', 'http://baru/a', 'http://mati/a']
+    store.save()
+    assert HealthStore(tmp_path / "health.json").rank(urls) == store.rank(urls)
@@ -0,0 +1,240 @@
+"""Test melanjutkan download yang terputus (.part + sidecar .part.json)."""
+
+import http.server
+import os
+import re
+import threading
+
+import pytest
+
+from ebook_downloader import ConnectionPool, CorruptFileError, EbookDownloader, PartialDownload
+from rate_limit import RateLimiter
+from retry_policy import CircuitBreaker, RetryPolicy
+
+DATA = b'%PDF-1.4\n' + os.urandom(200_000) + b'\n%%EOF\n'
+
+
+class FileServer(http.server.ThreadingHTTPServer):
+    """Server satu file dengan dukungan Range/If-Range; bisa memutus koneksi di tengah body."""
+    
+    def __init__(self):
+        super().__init__(('127.0.0.1', 0), FileHandler)
+        self.etag = '"v1"'
+        self.drop_after = None  # putus setelah sekian byte (sekali)
+        self.requests = []
+        self.url = f"http://127.0.0.1:{self.server_port}/buku.pdf"
+
+
+class FileHandler(http.server.BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    
+    def log_message(self, *args):
+        pass
+    
+    def do_GET(self):
+        server = self.server
+        server.requests.append({'range': self.headers.get('Range'), 'if_range': self.headers.get('If-Range')})
+        start = 0
+        match = re.match(r'bytes=(\d+)-$', self.headers.get('Range') or '')
+        if match and self.headers.get('If-Range') == server.etag and int(match.group(1)) >= len(DATA):
+            self.send_response(416)
+            self.send_header('Content-Range', f'bytes */{len(DATA)}')
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        if match and self.headers.get('If-Range') == server.etag:
+            start = int(match.group(1))
+            self.send_response(206)
+            self.send_header('Content-Range', f'bytes {start}-{len(DATA) - 1}/{len(DATA)}')
+        else:
+            self.send_response(200)
+        body = DATA[start:]
+        self.send_header('Content-Type', 'application/pdf')
+        self.send_header('Accept-Ranges', 'bytes')
+        self.send_header('ETag', server.etag)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        if server.drop_after is not None:
+            body, server.drop_after = body[:server.drop_after], None
+            self.wfile.write(body)
+            self.wfile.flush()
+            self.close_connection = True
+            return
+        self.wfile.write(body)
+
+
+@pytest.fixture
+def server():
+    server = FileServer()
+    thread = threading.Thread(target=server.serve_forever, args=(0.05,), daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture(params=[2, 0], ids=['retries', 'tanpa-retry'])
+def downloader(tmp_path, request):
+    pool = ConnectionPool()
+    yield EbookDownloader(download_folder=tmp_path, pool=pool, limiter=RateLimiter(),
+                          retry=RetryPolicy(retries=request.param, base=0.01), breaker=CircuitBreaker())
+    pool.close()
+
+
+def interrupted(folder, url, written, etag='"v1"'):
+    """.part berisi written byte pertama dan sidecar-nya, seperti setelah proses mati."""
+    partial = PartialDownload(folder / 'buku.pdf', url)
+    partial.part_path.write_bytes(DATA[:written])
+    partial.etag = etag
+    partial.total = len(DATA)
+    partial.written = written
+    partial.save()
+    return partial
+
+
+# PartialDownload
+def test_sidecar_roundtrip_and_find(tmp_path):
+    saved = interrupted(tmp_path, 'http://contoh/buku.pdf', 1000)
+    
+    found = PartialDownload.find(tmp_path, 'http://contoh/buku.pdf')
+    
+    assert found.filepath == saved.filepath
+    assert (found.etag, found.total, found.offset) == ('"v1"', len(DATA), 1000)
+    assert PartialDownload.find(tmp_path, 'http://contoh/lain.pdf') is None
+
+
+def test_offset_is_limited_by_part_size(tmp_path):
+    partial = interrupted(tmp_path, 'http://contoh/buku.pdf', 1000)
+    # Sidecar mencatat lebih banyak dari isi .part (mis. .part terpotong): pakai ukuran .part
+    partial.written = 5000
+    assert partial.offset == 1000
+    partial.part_path.unlink()
+    assert partial.offset == 0
+
+
+def test_range_headers_need_strong_validator(tmp_path):
+    partial = interrupted(tmp_path, 'http://contoh/buku.pdf', 1000)
+    assert partial.range_headers() == {'Range': 'bytes=1000-', 'If-Range': '"v1"'}
+    
+    partial.etag = 'W/"lemah"'
+    partial.last_modified = 'Wed, 01 Jan 2025 00:00:00 GMT'
+    assert partial.range_headers()['If-Range'] == partial.last_modified
+    
+    partial.last_modified = None
+    assert partial.range_headers() == {}
+
+
+def test_begin_resumes_on_matching_206(tmp_path):
+    partial = interrupted(tmp_path, 'http://contoh/buku.pdf', 1000)
+    headers = {'Content-Range': f'bytes 1000-{len(DATA) - 1}/{len(DATA)}',
+               'content-length': str(len(DATA) - 1000)}
+    
+    assert partial.begin(206, headers) == 1000
+    assert partial.total == len(DATA)
+    assert partial.etag == '"v1"'
+    assert partial.part_path.exists()
+
+
+@pytest.mark.parametrize('status, content_range', [
+    (200, ''),                                    # server mengabaikan Range / If-Range tidak cocok
+    (206, f'bytes 0-{len(DATA) - 1}/{len(DATA)}'),  # rentang lain dari yang diminta
+])
+def test_begin_restarts_when_range_not_honoured(tmp_path, status, content_range):
+    partial = interrupted(tmp_path, 'http://contoh/buku.pdf', 1000)
+    
+    offset = partial.begin(status, {'Content-Range': content_range, 'ETag': '"v2"',
+                                    'content-length': str(len(DATA))})
+    
+    assert offset == 0
+    assert not partial.part_path.exists()
+    assert partial.etag == '"v2"'
+    assert partial.total == len(DATA)
+
+
+# EbookDownloader.fetch
+def test_fetch_resumes_after_connection_drop(server, downloader, tmp_path):
+    if downloader.retry.retries == 0:
+        pytest.skip("melanjutkan di sesi yang sama butuh percobaan ulang")
+    server.drop_after = 50_000
+    
+    filepath, size = downloader.fetch(server.url)
+    
+    assert (filepath, size) == (tmp_path / 'buku.pdf', len(DATA))
+    assert filepath.read_bytes() == DATA
+    assert server.requests[0]['range'] is None
+    assert server.requests[1] == {'range': 'bytes=50000-', 'if_range': '"v1"'}
+    assert not list(tmp_path.glob('*.part*'))
+
+
+def test_fetch_continues_part_from_previous_session(server, downloader, tmp_path):
+    interrupted(tmp_path, server.url, 120_000)
+    
+    filepath, size = downloader.fetch(server.url)
+    
+    assert filepath == tmp_path / 'buku.pdf'
+    assert size == len(DATA)
+    assert filepath.read_bytes() == DATA
+    assert server.requests == [{'range': 'bytes=120000-', 'if_range': '"v1"'}]
+    assert not list(tmp_path.glob('*.part*'))
+
+
+def test_fetch_restarts_when_file_changed_on_server(server, downloader, tmp_path):
+    # Isi .part dari versi lama: If-Range tidak cocok, server mengirim file utuh
+    partial = interrupted(tmp_path, server.url, 120_000, etag='"v0"')
+    partial.part_path.write_bytes(b'x' * 120_000)
+    
+    filepath, size = downloader.fetch(server.url)
+    
+    assert size == len(DATA)
+    assert filepath.read_bytes() == DATA
+    assert server.requests == [{'range': 'bytes=120000-', 'if_range': '"v0"'}]
+
+
+def test_complete_part_is_finished_on_416(server, downloader, tmp_path):
+    # Proses berhenti setelah byte terakhir ditulis, sebelum .part di-rename
+    interrupted(tmp_path, server.url, len(DATA))
+    
+    filepath, size = downloader.fetch(server.url)
+    
+    assert (filepath, size) == (tmp_path / 'buku.pdf', len(DATA))
+    assert filepath.read_bytes() == DATA
+    assert server.requests == [{'range': f'bytes={len(DATA)}-', 'if_range': '"v1"'}]
+    assert not list(tmp_path.glob('*.part*'))
+
+
+def test_oversized_part_restarts_on_416_without_using_retries(server, downloader, tmp_path):
+    # .part lebih besar dari file di server: 416 dengan ukuran lain, unduh ulang dari awal
+    partial = interrupted(tmp_path, server.url, 0)
+    partial.part_path.write_bytes(b'x' * (len(DATA) + 100))
+    partial.total = partial.written = len(DATA) + 100
+    partial.save()
+    
+    filepath, size = downloader.fetch(server.url)
+    
+    assert size == len(DATA)
+    assert filepath.read_bytes() == DATA
+    assert [request['range'] for request in server.requests] == [f'bytes={len(DATA) + 100}-', None]
+
+
+def test_complete_part_with_truncated_pdf_is_rejected(server, downloader, tmp_path):
+    partial = interrupted(tmp_path, server.url, len(DATA))
+    partial.part_path.write_bytes(DATA[:-7] + b'\0' * 7)
+    
+    with pytest.raises(CorruptFileError):
+        downloader.fetch(server.url)
+    assert not list(tmp_path.glob('*.part*'))
+
+
+def test_async_engine_finishes_complete_part_on_416(server, downloader, tmp_path):
+    pytest.importorskip('aiohttp')
+    from async_engine import AsyncEngine
+    interrupted(tmp_path, server.url, len(DATA))
+    engine = AsyncEngine(downloader).start()
+    try:
+        result = engine.submit_download(server.url).result(timeout=30)
+    finally:
+        engine.stop()
+    
+    assert result.ok, result.error
+    assert result.path.read_bytes() == DATA
+    assert len(server.requests) == 1
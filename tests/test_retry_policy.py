@@ -0,0 +1,198 @@
+"""Test backoff, Retry-After dan circuit breaker (termasuk half-open)."""
+
+import http.server
+import threading
+from email.utils import formatdate
+from types import SimpleNamespace
+
+import pytest
+import requests
+
+import retry_policy
+from ebook_downloader import ConnectionPool, EbookDownloader
+from rate_limit import RateLimiter
+from retry_policy import CircuitBreaker, CircuitOpenError, RetryPolicy, parse_retry_after
+
+A = 'http://a.contoh/buku.pdf'
+B = 'http://b.contoh/buku.pdf'
+DATA = b'%PDF-1.4\n' + b'x' * 5000 + b'\n%%EOF\n'
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Waktu palsu untuk retry_policy (time dan monotonic maju bersama)."""
+    now = SimpleNamespace(value=1_000_000.0)
+    monkeypatch.setattr(retry_policy, 'time', SimpleNamespace(time=lambda: now.value, monotonic=lambda: now.value))
+    return now
+
+
+# RetryPolicy
+def test_parse_retry_after(clock):
+    assert parse_retry_after(None) is None
+    assert parse_retry_after(' 7 ') == 7.0
+    assert parse_retry_after('besok') is None
+    assert parse_retry_after(formatdate(clock.value + 30, usegmt=True)) == pytest.approx(30)
+    assert parse_retry_after(formatdate(clock.value - 30, usegmt=True)) == 0.0
+
+
+def test_backoff_is_capped_full_jitter(monkeypatch):
+    monkeypatch.setattr(retry_policy.random, 'uniform', lambda low, high: (low, high))
+    policy = RetryPolicy(base=0.5, cap=3.0)
+    
+    assert [policy.backoff(attempt) for attempt in range(4)] == [(0, 0.5), (0, 1.0), (0, 2.0), (0, 3.0)]
+
+
+def test_delay_prefers_retry_after_within_limit():
+    policy = RetryPolicy(base=0.01, max_retry_after=60)
+    
+    assert policy.delay(0, '5') == 5.0
+    assert policy.delay(0, '61') is None
+    assert 0 <= policy.delay(2) <= 0.04
+    assert policy.should_retry(503) and policy.should_retry(429)
+    assert not policy.should_retry(404)
+
+
+# CircuitBreaker
+def test_circuit_opens_after_consecutive_failures(clock):
+    breaker = CircuitBreaker(failure_threshold=3, reset_timeout=30)
+    breaker.record_failure(A)
+    breaker.record_failure(A)
+    breaker.record_success(A)
+    breaker.record_failure(A)
+    breaker.record_failure(A)
+    breaker.check(A)
+    
+    breaker.record_failure(A)
+    
+    with pytest.raises(CircuitOpenError) as error:
+        breaker.check(A)
+    assert (error.value.host, error.value.retry_in) == ('a.contoh', 30)
+    assert breaker.is_open(A) and not breaker.is_open(B)
+    assert breaker.open_hosts() == ['a.contoh']
+    breaker.check(B)
+
+
+def test_half_open_allows_single_probe(clock):
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=30)
+    breaker.record_failure(A)
+    
+    clock.value += 30
+    assert not breaker.is_open(A)
+    breaker.check(A)
+    
+    # Request lain menunggu hasil request percobaan
+    assert breaker.is_open(A)
+    with pytest.raises(CircuitOpenError):
+        breaker.check(A)
+
+
+def test_failed_probe_reopens_circuit(clock):
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=30)
+    breaker.record_failure(A)
+    breaker.record_failure(A)
+    clock.value += 30
+    breaker.check(A)
+    
+    clock.value += 5
+    breaker.record_failure(A)
+    
+    clock.value += 29
+    with pytest.raises(CircuitOpenError):
+        breaker.check(A)
+    clock.value += 1
+    breaker.check(A)
+
+
+def test_successful_probe_closes_circuit(clock):
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=30)
+    breaker.record_failure(A)
+    clock.value += 30
+    breaker.check(A)
+    
+    breaker.record_success(A)
+    
+    breaker.check(A)
+    breaker.check(A)
+    assert breaker.open_hosts() == []
+
+
+# EbookDownloader.fetch
+class FlakyServer(http.server.ThreadingHTTPServer):
+    """Server yang membalas 503 untuk sejumlah request pertama."""
+    
+    def __init__(self):
+        super().__init__(('127.0.0.1', 0), FlakyHandler)
+        self.failures = 0
+        self.retry_after = '0'
+        self.requests = 0
+        self.url = f"http://127.0.0.1:{self.server_port}/buku.pdf"
+
+
+class FlakyHandler(http.server.BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    
+    def log_message(self, *args):
+        pass
+    
+    def do_GET(self):
+        server = self.server
+        server.requests += 1
+        if server.failures:
+            server.failures -= 1
+            body = b'sedang sibuk'
+            self.send_response(503)
+            self.send_header('Retry-After', server.retry_after)
+        else:
+            body = DATA
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/pdf')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+@pytest.fixture
+def server():
+    server = FlakyServer()
+    thread = threading.Thread(target=server.serve_forever, args=(0.05,), daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def make_downloader(folder, breaker, retries=2):
+    return EbookDownloader(download_folder=folder, pool=ConnectionPool(), limiter=RateLimiter(),
+                           retry=RetryPolicy(retries=retries, base=0.01, max_retry_after=5), breaker=breaker)
+
+
+def test_fetch_retries_unavailable_server(server, tmp_path):
+    server.failures = 2
+    breaker = CircuitBreaker(failure_threshold=3)
+    
+    filepath, size = make_downloader(tmp_path, breaker).fetch(server.url)
+    
+    assert filepath.read_bytes() == DATA
+    assert server.requests == 3
+    assert breaker.open_hosts() == []
+
+
+def test_long_retry_after_is_not_waited_for(server, tmp_path):
+    server.failures = 1
+    server.retry_after = '3600'
+    
+    with pytest.raises(requests.exceptions.HTTPError):
+        make_downloader(tmp_path, CircuitBreaker()).fetch(server.url)
+    assert server.requests == 1
+
+
+def test_open_circuit_rejects_without_request(server, tmp_path):
+    server.failures = 10
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=60)
+    downloader = make_downloader(tmp_path, breaker, retries=1)
+    
+    with pytest.raises(requests.exceptions.HTTPError):
+        downloader.fetch(server.url)
+    with pytest.raises(CircuitOpenError):
+        downloader.fetch(server.url)
+    assert server.requests == 2
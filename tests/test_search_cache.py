@@ -0,0 +1,109 @@
+"""Test cache hasil pencarian: normalisasi query, TTL + masa tenggang, LRU."""
+
+import json
+from types import SimpleNamespace
+
+import pytest
+
+import search_cache
+from search_cache import SearchCache, normalize_query
+
+RESULTS = [{'title': 'Sejarah Bandung', 'url': 'http://contoh/1.pdf', 'source': 'repo', 'is_direct': True}]
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Waktu palsu untuk search_cache (detik, bisa dimajukan)."""
+    now = SimpleNamespace(value=1_000_000.0)
+    monkeypatch.setattr(search_cache, 'time', SimpleNamespace(time=lambda: now.value))
+    return now
+
+
+@pytest.fixture
+def cache(tmp_path, clock):
+    cache = SearchCache(tmp_path / "search.sqlite3", source_ttl={'repo_id': 100}, stale_grace=50)
+    yield cache
+    cache.close()
+
+
+def test_normalize_query():
+    assert normalize_query('  Sejarah   BANDUNG\t') == 'sejarah bandung'
+    assert normalize_query('ｓｋｒｉｐｓｉ') == 'skripsi'
+
+
+def test_hit_uses_normalized_key(cache):
+    cache.put('Sejarah Bandung', 'repo_id', RESULTS)
+    
+    assert cache.get('  sejarah   bandung ', 'repo_id') == (RESULTS, True)
+    assert cache.get('Sejarah Bandung', 'scholar') is None
+    assert cache.stats()['hits'] == 1
+    assert cache.stats()['misses'] == 1
+
+
+def test_entry_is_stale_after_ttl_then_expires(cache, clock):
+    cache.put('skripsi', 'repo_id', RESULTS)
+    
+    clock.value += 100
+    assert cache.get('skripsi', 'repo_id') == (RESULTS, True)
+    clock.value += 1
+    assert cache.get('skripsi', 'repo_id') == (RESULTS, False)
+    clock.value += 49
+    assert cache.get('skripsi', 'repo_id') == (RESULTS, False)
+    clock.value += 1
+    assert cache.get('skripsi', 'repo_id') is None
+    
+    stats = cache.stats()
+    assert (stats['hits'], stats['stale_hits'], stats['misses']) == (1, 2, 1)
+    assert stats['hit_rate'] == 0.75
+
+
+def test_per_source_ttl(cache, clock):
+    assert cache.ttl('repo_id') == 100
+    assert cache.ttl('scholar') == search_cache.SOURCE_TTL['scholar']
+    assert cache.ttl('tidak-dikenal') == search_cache.DEFAULT_TTL
+    cache.put('skripsi', 'scholar', RESULTS)
+    clock.value += 1000
+    assert cache.get('skripsi', 'scholar') == (RESULTS, True)
+
+
+def test_library_source_is_never_cached(cache):
+    cache.put('skripsi', 'library', RESULTS)
+    
+    assert cache.get('skripsi', 'library') is None
+    assert cache.stats()['entries'] == 0
+    assert cache.stats()['misses'] == 0
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path, clock):
+    entry_size = len(json.dumps(RESULTS, ensure_ascii=False))
+    cache = SearchCache(tmp_path / "search.sqlite3", max_bytes=3 * entry_size)
+    try:
+        for query in ('a', 'b', 'c'):
+            clock.value += 1
+            cache.put(query, 'repo_id', RESULTS)
+        # 'a' dipakai lagi: yang paling lama tidak dipakai sekarang 'b'
+        clock.value += 1
+        assert cache.get('a', 'repo_id')
+        clock.value += 1
+        cache.put('d', 'repo_id', RESULTS)
+        
+        assert cache.get('b', 'repo_id') is None
+        assert all(cache.get(query, 'repo_id') for query in ('a', 'c', 'd'))
+        assert cache.stats()['bytes'] == 3 * entry_size
+    finally:
+        cache.close()
+
+
+def test_entries_survive_reopen(tmp_path, clock):
+    path = tmp_path / "search.sqlite3"
+    cache = SearchCache(path)
+    cache.put('skripsi', 'repo_id', RESULTS)
+    cache.close()
+    
+    cache = SearchCache(path)
+    try:
+        assert cache.get('skripsi', 'repo_id') == (RESULTS, True)
+        cache.clear()
+        assert cache.get('skripsi', 'repo_id') is None
+    finally:
+        cache.close()
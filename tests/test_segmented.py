@@ -0,0 +1,114 @@
+"""Test download tersegmentasi (beberapa rentang byte paralel)."""
+
+import http.server
+import os
+import re
+import threading
+
+import pytest
+
+from ebook_downloader import ConnectionPool, CorruptFileError, EbookDownloader
+from rate_limit import RateLimiter
+from retry_policy import CircuitBreaker, RetryPolicy
+
+DATA = b'%PDF-1.4\n' + os.urandom(400_000) + b'\n%%EOF\n'
+
+
+class RangeServer(http.server.ThreadingHTTPServer):
+    """Server satu file dengan Range bytes=a-b; bisa memotong satu segmen sekali."""
+    
+    def __init__(self):
+        super().__init__(('127.0.0.1', 0), RangeHandler)
+        self.data = DATA
+        self.short_start = None  # segmen yang dimulai di offset ini diputus di tengah (sekali)
+        self.ranges = []
+        self.url = f"http://127.0.0.1:{self.server_port}/buku.pdf"
+
+
+class RangeHandler(http.server.BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    
+    def log_message(self, *args):
+        pass
+    
+    def _headers(self, status, length, extra=()):
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/pdf')
+        self.send_header('Accept-Ranges', 'bytes')
+        self.send_header('ETag', '"v1"')
+        self.send_header('Content-Length', str(length))
+        for name, value in extra:
+            self.send_header(name, value)
+        self.end_headers()
+    
+    def do_HEAD(self):
+        self._headers(200, len(self.server.data))
+    
+    def do_GET(self):
+        data = self.server.data
+        match = re.match(r'bytes=(\d+)-(\d*)$', self.headers.get('Range') or '')
+        if not match:
+            self._headers(200, len(data))
+            self.wfile.write(data)
+            return
+        start = int(match.group(1))
+        end = int(match.group(2)) if match.group(2) else len(data) - 1
+        self.server.ranges.append((start, end))
+        body = data[start:end + 1]
+        self._headers(206, len(body), [('Content-Range', f'bytes {start}-{end}/{len(data)}')])
+        if start == self.server.short_start:
+            self.server.short_start = None
+            self.wfile.write(body[:len(body) // 2])
+            self.wfile.flush()
+            self.close_connection = True
+            return
+        self.wfile.write(body)
+
+
+@pytest.fixture
+def server():
+    server = RangeServer()
+    thread = threading.Thread(target=server.serve_forever, args=(0.05,), daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def downloader(tmp_path):
+    pool = ConnectionPool()
+    downloader = EbookDownloader(download_folder=tmp_path, pool=pool, segments=4, limiter=RateLimiter(),
+                                 retry=RetryPolicy(retries=2, base=0.01), breaker=CircuitBreaker())
+    downloader.MIN_SEGMENT_SIZE = 50_000
+    yield downloader
+    pool.close()
+
+
+def test_segments_are_assembled_in_order(server, downloader, tmp_path):
+    filepath, size = downloader.fetch(server.url)
+    
+    assert (filepath, size) == (tmp_path / 'buku.pdf', len(DATA))
+    assert filepath.read_bytes() == DATA
+    assert len(server.ranges) == 4
+    assert not list(tmp_path.glob('*.part*'))
+
+
+def test_interrupted_segment_resumes_from_its_position(server, downloader, tmp_path):
+    server.short_start = 0
+    
+    filepath, _ = downloader.fetch(server.url)
+    
+    assert filepath.read_bytes() == DATA
+    # Segmen pertama diminta ulang mulai dari byte yang belum diterima
+    first_end = next(end for start, end in server.ranges if start == 0)
+    starts = sorted(start for start, end in server.ranges if end == first_end)
+    assert len(starts) == 2 and starts[0] == 0 < starts[1]
+
+
+def test_pdf_without_eof_marker_is_rejected(server, downloader, tmp_path):
+    server.data = DATA[:-7] + b'\0' * 7
+    
+    with pytest.raises(CorruptFileError):
+        downloader.fetch(server.url)
+    assert not list(tmp_path.iterdir())
@@ -0,0 +1,325 @@
+"""
+Text Extract untuk Ebook Downloader
+===================================
+Ekstraksi teks dari PDF dan EPUB untuk indeks perpustakaan lokal
+(library_index) dan deteksi duplikat.
+
+- PDF: jika pypdf terpasang, teks diambil dengan pypdf. Tanpa pypdf,
+  content stream setiap halaman dibaca langsung (lewat pdf_metadata):
+  string dari operator Tj/TJ/'/" didekode dengan CMap /ToUnicode font
+  jika ada, atau Latin-1 untuk font sederhana. Font CID tanpa ToUnicode
+  dilewati karena kodenya tidak bisa diterjemahkan ke huruf.
+- EPUB: semua dokumen (X)HTML di dalam arsip, tag dibuang; judul dan
+  penulis dari file OPF.
+"""
+
+import re
+import zipfile
+from dataclasses import dataclass
+from html.parser import HTMLParser
+from pathlib import Path
+from typing import Optional
+
+from pdf_metadata import PdfMetadataError, Ref, Name, open_pdf, pdf_metadata, parse_string
+
+try:
+    import pypdf
+except ImportError:  # pypdf opsional
+    pypdf = None
+
+SUPPORTED_SUFFIXES = ('.pdf', '.epub')
+
+# Teks maksimum yang diambil per dokumen (karakter)
+MAX_CHARS = 1_000_000
+
+CONTENT_TOKEN = re.compile(
+    rb'\((?:\\.|[^\\()]|\((?:\\.|[^\\()])*\))*\)'  # string literal (satu tingkat kurung bersarang)
+    rb'|<[0-9A-Fa-f\s]*>'                            # string hex
+    rb'|/[^\s/\[\]()<>{}%]+'                          # name
+    rb'|[\[\]]'
+    rb'|[+-]?(?:\d+\.?\d*|\.\d+)'
+    rb'|[A-Za-z\'"*]+',
+    re.DOTALL,
+)
+# Kerning TJ yang lebih lebar dari ini (seperseribu em) dianggap spasi
+TJ_SPACE = 200
+
+
+@dataclass
+class DocumentText:
+    """Teks dan metadata satu dokumen."""
+    text: str
+    title: Optional[str] = None
+    author: Optional[str] = None
+    pages: Optional[int] = None
+
+
+def extract_document(path, max_chars=MAX_CHARS):
+    """
+    Ambil teks, judul, penulis dan jumlah halaman PDF/EPUB.
+    
+    Returns:
+        DocumentText
+    
+    Raises:
+        ValueError: Jika jenis file tidak didukung atau isinya tidak bisa dibaca
+        OSError: Jika file tidak bisa dibuka
+    """
+    suffix = Path(path).suffix.lower()
+    if suffix == '.pdf':
+        return _pdf_document(path, max_chars)
+    if suffix == '.epub':
+        return _epub_document(path, max_chars)
+    raise ValueError(f"Jenis file tidak didukung: {suffix}")
+
+
+# PDF
+def _pdf_document(path, max_chars):
+    with open_pdf(path) as reader:
+        meta = pdf_metadata(reader)
+        if meta.encrypted:
+            # Content stream ikut terenkripsi; cukup metadata saja
+            return DocumentText('', meta.title, meta.author, meta.pages)
+        if pypdf is None:
+            text = _pdf_text(reader, max_chars)
+    if pypdf is not None:
+        text = _pypdf_text(path, max_chars)
+    return DocumentText(text, meta.title, meta.author, meta.pages)
+
+
+def _pypdf_text(path, max_chars):
+    parts = []
+    total = 0
+    try:
+        for page in pypdf.PdfReader(str(path)).pages:
+            text = page.extract_text() or ''
+            parts.append(text)
+            total += len(text)
+            if total >= max_chars:
+                break
+    except pypdf.errors.PyPdfError as e:
+        raise PdfMetadataError(str(e)) from e
+    return '\n'.join(parts)[:max_chars]
+
+
+def _pdf_text(reader, max_chars):
+    parts = []
+    total = 0
+    fonts = {}
+    for page, resources in reader.pages():
+        try:
+            text = _page_text(reader, page, resources, fonts)
+        except PdfMetadataError:
+            continue
+        parts.append(text)
+        total += len(text)
+        if total >= max_chars:
+            break
+    return '\n'.join(parts)[:max_chars]
+
+
+def _page_text(reader, page, resources, fonts):
+    contents = reader.resolve(page.get('Contents'))
+    refs = contents if isinstance(contents, list) else [page.get('Contents')]
+    data = b'\n'.join(reader.stream_data(ref) or b'' for ref in refs if isinstance(ref, Ref))
+    
+    font_dict = reader.resolve(resources.get('Font'))
+    font_dict = font_dict if isinstance(font_dict, dict) else {}
+    
+    out = []
+    operands = []
+    font = None
+    pos = 0
+    while True:
+        match = CONTENT_TOKEN.search(data, pos)
+        if not match:
+            break
+        pos = match.end()
+        token = match.group()
+        first = token[:1]
+        if first == b'[':
+            operands.append('[')
+        elif first == b']':
+            array = []
+            while operands and operands[-1] != '[':
+                array.append(operands.pop())
+            if operands:
+                operands.pop()
+            operands.append(list(reversed(array)))
+        elif first in b'(<':
+            operands.append(parse_string(token) if first == b'(' else _hex_string(token))
+        elif first == b'/':
+            operands.append(Name(token[1:].decode('latin-1')))
+        elif first.isalpha() or first in b'\'"*':
+            op = token
+            if op == b'BI':
+                # Gambar inline: data biner sampai EI
+                end = data.find(b'EI', pos)
+                pos = len(data) if end < 0 else end + 2
+            elif op == b'Tf' and operands and isinstance(operands[0], Name):
+                font = _font_decoder(reader, font_dict.get(str(operands[0])), fonts)
+            elif op in (b'Tj', b"'", b'"') and operands and isinstance(operands[-1], bytes):
+                if op != b'Tj':
+                    out.append('\n')
+                out.append(_decode(operands[-1], font))
+            elif op == b'TJ' and operands and isinstance(operands[-1], list):
+                for item in operands[-1]:
+                    if isinstance(item, bytes):
+                        out.append(_decode(item, font))
+                    elif isinstance(item, (int, float)) and item < -TJ_SPACE:
+                        out.append(' ')
+            elif op in (b'Td', b'TD', b'T*', b'Tm'):
+                out.append(' ')
+            elif op == b'ET':
+                out.append('\n')
+            operands = []
+        else:
+            try:
+                operands.append(float(token) if b'.' in token else int(token))
+            except ValueError:
+                pass
+    return re.sub(r'[ \t]+', ' ', ''.join(out)).strip()
+
+
+def _hex_string(token):
+    digits = re.sub(rb'\s', b'', token[1:-1]).decode('ascii')
+    return bytes.fromhex(digits + '0' * (len(digits) % 2))
+
+
+def _font_decoder(reader, ref, cache):
+    """
+    Dekoder untuk satu font: (lebar kode byte, dict kode -> teks), None
+    untuk Latin-1, atau False jika kode font tidak bisa didekode.
+    """
+    key = ref.num if isinstance(ref, Ref) else id(ref)
+    if key in cache:
+        return cache[key]
+    font = reader.resolve(ref)
+    decoder = None
+    if isinstance(font, dict):
+        to_unicode = font.get('ToUnicode')
+        if isinstance(to_unicode, Ref):
+            try:
+                decoder = parse_cmap(reader.stream_data(to_unicode) or b'')
+            except PdfMetadataError:
+                decoder = None
+        if decoder is None and font.get('Subtype') == 'Type0':
+            decoder = False
+    cache[key] = decoder
+    return decoder
+
+
+def _utf16(hex_digits):
+    try:
+        return bytes.fromhex(hex_digits.decode()).decode('utf-16-be', errors='ignore')
+    except ValueError:
+        return ''
+
+
+def parse_cmap(data, max_range=65536):
+    """
+    Baca CMap /ToUnicode (bfchar dan bfrange).
+    
+    Returns:
+        Tuple (lebar kode dalam byte, dict kode -> teks), atau None jika kosong
+    """
+    mapping = {}
+    width = None
+    for block in re.findall(rb'beginbfchar(.*?)endbfchar', data, re.DOTALL):
+        for src, dst in re.findall(rb'<([0-9A-Fa-f]+)>\s*<([0-9A-Fa-f]*)>', block):
+            width = width or len(src) // 2
+            mapping[int(src, 16)] = _utf16(dst)
+    for block in re.findall(rb'beginbfrange(.*?)endbfrange', data, re.DOTALL):
+        for start, end, dst in re.findall(
+                rb'<([0-9A-Fa-f]+)>\s*<([0-9A-Fa-f]+)>\s*(<[0-9A-Fa-f]*>|\[[^\]]*\])', block):
+            width = width or len(start) // 2
+            first, last = int(start, 16), int(end, 16)
+            if last < first or last - first > max_range:
+                continue
+            if dst.startswith(b'['):
+                for code, item in zip(range(first, last + 1), re.findall(rb'<([0-9A-Fa-f]*)>', dst)):
+                    mapping[code] = _utf16(item)
+                continue
+            base = dst[1:-1]
+            if not base:
+                continue
+            prefix, last_unit = base[:-4], int(base[-4:], 16)
+            for offset in range(last - first + 1):
+                mapping[first + offset] = _utf16(prefix + b'%04X' % (last_unit + offset))
+    if not mapping:
+        return None
+    return width or 1, mapping
+
+
+def _decode(raw, font):
+    if font is False:
+        return ''
+    if font is None:
+        return raw.decode('latin-1')
+    width, mapping = font
+    return ''.join(mapping.get(int.from_bytes(raw[i:i + width], 'big'), '')
+                   for i in range(0, len(raw) - width + 1, width))
+
+
+# EPUB
+class _HTMLText(HTMLParser):
+    SKIP = {'script', 'style', 'head'}
+    BLOCK = {'p', 'div', 'br', 'li', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'tr', 'section'}
+    
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.parts = []
+        self._skip = 0
+    
+    def handle_starttag(self, tag, attrs):
+        if tag in self.SKIP:
+            self._skip += 1
+        elif tag in self.BLOCK:
+            self.parts.append('\n')
+    
+    def handle_endtag(self, tag):
+        if tag in self.SKIP and self._skip:
+            self._skip -= 1
+    
+    def handle_data(self, data):
+        if not self._skip:
+            self.parts.append(data)
+
+
+def html_text(markup):
+    """Teks dari dokumen HTML/XHTML (tanpa tag, script dan style)."""
+    parser = _HTMLText()
+    parser.feed(markup)
+    parser.close()
+    return re.sub(r'[ \t]+', ' ', ''.join(parser.parts))
+
+
+def _opf_field(opf, tag):
+    match = re.search(rf'<dc:{tag}\b[^>]*>(.*?)</dc:{tag}>', opf, re.DOTALL)
+    if not match:
+        return None
+    return html_text(match.group(1)).strip() or None
+
+
+def _epub_document(path, max_chars):
+    try:
+        with zipfile.ZipFile(path) as epub:
+            names = epub.namelist()
+            title = author = None
+            opf_names = [name for name in names if name.lower().endswith('.opf')]
+            if opf_names:
+                opf = epub.read(opf_names[0]).decode('utf-8', errors='replace')
+                title, author = _opf_field(opf, 'title'), _opf_field(opf, 'creator')
+            parts = []
+            total = 0
+            for name in names:
+                if not name.lower().endswith(('.xhtml', '.html', '.htm')):
+                    continue
+                text = html_text(epub.read(name).decode('utf-8', errors='replace'))
+                parts.append(text)
+                total += len(text)
+                if total >= max_chars:
+                    break
+    except zipfile.BadZipFile as e:
+        raise ValueError(f"EPUB rusak: {e}") from e
+    return DocumentText('\n'.join(parts)[:max_chars], title, author, len(parts) or None)